@@ -0,0 +1 @@
+"""Process package benchmarks."""
@@ -0,0 +1,72 @@
+"""Benchmark aggregating partitioned event files on a pool of processes.
+
+Writes --partitions Parquet partitions of encounters, then aggregates them
+with each number of workers in --workers, into a fresh output directory.
+
+Run with ``python -m benchmarks.process.aggregate_partitions``.
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.process.aggregate_timesteps import synthetic_events
+from cyclops.process.aggregate import Aggregator, aggregate_partitions
+from cyclops.process.column_names import (
+    ENCOUNTER_ID,
+    EVENT_NAME,
+    EVENT_TIMESTAMP,
+    EVENT_VALUE,
+)
+from cyclops.process.constants import MEAN
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**7)
+    parser.add_argument("--events-per-encounter", type=int, default=100)
+    parser.add_argument("--partitions", type=int, default=32)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()]
+    )
+    args = parser.parse_args()
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+        agg_meta_for=[EVENT_VALUE],
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dir = os.path.join(tmp_dir, "events")
+        os.makedirs(input_dir)
+        data = synthetic_events(args.rows, args.rows // args.events_per_encounter)
+        partition = data[ENCOUNTER_ID] % args.partitions
+        for i in range(args.partitions):
+            data[partition == i].to_parquet(
+                os.path.join(input_dir, f"batch_{i:04d}.parquet")
+            )
+        del data, partition
+
+        for num_workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            aggregate_partitions(
+                aggregator,
+                input_dir,
+                os.path.join(tmp_dir, f"aggregated_{num_workers}"),
+                num_workers=num_workers,
+            )
+            seconds = time.perf_counter() - start
+            print(
+                f"{args.rows:.0e} rows, {num_workers} workers: {seconds:.2f} s, "
+                f"{args.rows / seconds / 1e6:.2f}M rows/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
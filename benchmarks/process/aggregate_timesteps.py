@@ -0,0 +1,102 @@
+"""Benchmark computing the timesteps of events in Aggregator.
+
+Compares the whole-frame computation against the previous per-group apply,
+which is only run up to --apply-max-rows rows, since it is much slower.
+100M rows need about 16 GB of memory.
+
+Run with ``python -m benchmarks.process.aggregate_timesteps``.
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cyclops.process.aggregate import Aggregator
+from cyclops.process.column_names import (
+    ENCOUNTER_ID,
+    EVENT_NAME,
+    EVENT_TIMESTAMP,
+    EVENT_VALUE,
+    START_TIMESTAMP,
+    TIMESTEP,
+)
+from cyclops.process.constants import MEAN
+
+
+def synthetic_events(n_rows: int, n_encounters: int, seed: int = 42):
+    """Create synthetic events, spread over a week per encounter."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            ENCOUNTER_ID: rng.integers(0, n_encounters, n_rows),
+            EVENT_NAME: rng.integers(0, 100, n_rows).astype(str),
+            EVENT_VALUE: rng.normal(size=n_rows),
+            EVENT_TIMESTAMP: pd.Timestamp("2020-01-01")
+            + pd.to_timedelta(rng.integers(0, 7 * 24 * 3600, n_rows), unit="s"),
+        }
+    )
+
+
+def compute_timesteps_by_group(aggregator: Aggregator, data: pd.DataFrame):
+    """Compute the timesteps with a per-group apply, as done previously."""
+
+    def compute_timestep(group):
+        start = aggregator.window_times.loc[group[ENCOUNTER_ID].values[0]][
+            START_TIMESTAMP
+        ]
+        group[TIMESTEP] = (group[EVENT_TIMESTAMP] - start) / pd.Timedelta(
+            hours=aggregator.timestep_size
+        )
+        group[TIMESTEP] = group[TIMESTEP].astype("int")
+        return group
+
+    return data.groupby(ENCOUNTER_ID, sort=False, group_keys=False).apply(
+        compute_timestep
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10**6, 10**7, 10**8]
+    )
+    parser.add_argument("--events-per-encounter", type=int, default=100)
+    parser.add_argument("--apply-max-rows", type=int, default=10**6)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'apply (s)':>10} {'vectorized (s)':>15} {'speed-up':>9}")
+    for n_rows in args.rows:
+        data = synthetic_events(n_rows, n_rows // args.events_per_encounter)
+        aggregator = Aggregator(
+            {EVENT_VALUE: MEAN},
+            EVENT_TIMESTAMP,
+            time_by=ENCOUNTER_ID,
+            agg_by=[ENCOUNTER_ID, EVENT_NAME],
+            timestep_size=1,
+        )
+        aggregator.window_times = aggregator._compute_window_times(data)
+        data = aggregator._restrict_by_timestamp(data)
+
+        start_time = time.perf_counter()
+        vectorized = aggregator._compute_timesteps(data)
+        vectorized_time = time.perf_counter() - start_time
+
+        if n_rows > args.apply_max_rows:
+            print(f"{n_rows:>10} {'-':>10} {vectorized_time:>15.3f} {'-':>9}")
+            continue
+        start_time = time.perf_counter()
+        by_group = compute_timesteps_by_group(aggregator, data)
+        apply_time = time.perf_counter() - start_time
+        assert (by_group[TIMESTEP].values == vectorized[TIMESTEP].values).all()
+        print(
+            f"{n_rows:>10} {apply_time:>10.3f} {vectorized_time:>15.3f} "
+            f"{apply_time / vectorized_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark the memory use of sparse against dense vectorized event tensors.
+
+Aggregates synthetic events, spread over --event-types event types, then
+vectorizes them densely and sparsely, comparing their memory use and the time
+to vectorize, normalize and densify in batches.
+
+Run with ``python -m benchmarks.process.sparse_vectorized``.
+
+"""
+
+import argparse
+import time
+
+from benchmarks.process.aggregate_timesteps import synthetic_events
+from cyclops.process.aggregate import Aggregator
+from cyclops.process.column_names import (
+    ENCOUNTER_ID,
+    EVENT_NAME,
+    EVENT_TIMESTAMP,
+    EVENT_VALUE,
+)
+from cyclops.process.constants import MEAN, STANDARD
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--events-per-encounter", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--dense", action="store_true", help="Also vectorize densely, to compare."
+    )
+    args = parser.parse_args()
+
+    data = synthetic_events(args.rows, args.rows // args.events_per_encounter)
+    aggregator = Aggregator(
+        {EVENT_VALUE: MEAN},
+        EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+        window_duration=7 * 24,
+    )
+    aggregated = aggregator(data, include_timestep_start=False)
+    del data
+
+    for sparse in [True, False] if args.dense else [True]:
+        start_time = time.perf_counter()
+        vectorized = aggregator.vectorize(aggregated, sparse=sparse)
+        vectorize_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        vectorized.add_normalizer(EVENT_NAME, normalization_method=STANDARD)
+        vectorized.fit_normalizer()
+        vectorized.normalize()
+        normalize_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for _ in vectorized.yield_dense_batches(ENCOUNTER_ID, args.batch_size):
+            pass
+        batches_time = time.perf_counter() - start_time
+
+        print(
+            f"{'sparse' if sparse else 'dense'} {vectorized.shape}: "
+            f"{vectorized.data.nbytes / 2**20:.1f} MB, "
+            f"vectorize {vectorize_time:.2f} s, normalize {normalize_time:.2f} s, "
+            f"dense batches {batches_time:.2f} s"
+        )
+        del vectorized
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark vectorizing aggregated data with Aggregator.vectorize.
+
+Compares scattering into a preallocated array, as float64, float32 and into a
+memory-mapped file, against the previous reindex over the product of the index
+levels, which is only run up to --reindex-max-rows rows. Reports the time and
+peak traced memory of each.
+
+Run with ``python -m benchmarks.process.vectorize``.
+
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.process.aggregate_timesteps import synthetic_events
+from cyclops.process.aggregate import Aggregator
+from cyclops.process.column_names import (
+    ENCOUNTER_ID,
+    EVENT_NAME,
+    EVENT_TIMESTAMP,
+    EVENT_VALUE,
+    TIMESTEP,
+)
+from cyclops.process.constants import MEAN
+
+
+def vectorize_by_reindex(aggregator: Aggregator, aggregated: pd.DataFrame):
+    """Vectorize with a reindex over the product of the index, as done previously."""
+    index = aggregator.agg_by + [TIMESTEP]
+    aggregated = aggregated.reset_index().set_index(index)
+    idx = pd.MultiIndex.from_product(
+        [aggregated.index.levels[i] for i in range(len(aggregator.agg_by))]
+        + [range(int(aggregator.window_duration / aggregator.timestep_size))],
+        names=index,
+    )
+    reindexed = aggregated.reindex(idx)
+    shape = [len(level) for level in reindexed.index.levels]
+    return np.stack(
+        [reindexed[col].values.reshape(shape) for col in aggregator.aggfuncs]
+    )
+
+
+def measure(func):
+    """Run a function, returning its result, time in seconds and peak memory."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10**5, 10**6])
+    parser.add_argument("--events-per-encounter", type=int, default=50)
+    parser.add_argument("--reindex-max-rows", type=int, default=2 * 10**5)
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        aggregator = Aggregator(
+            {EVENT_VALUE: MEAN},
+            EVENT_TIMESTAMP,
+            time_by=ENCOUNTER_ID,
+            agg_by=[ENCOUNTER_ID, EVENT_NAME],
+            timestep_size=1,
+            window_duration=48,
+        )
+        data = synthetic_events(n_rows, n_rows // args.events_per_encounter)
+        aggregated = aggregator(data, include_timestep_start=False)
+        del data
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            runs = {
+                "scatter float64": lambda: aggregator.vectorize(aggregated).data,
+                "scatter float32": lambda: aggregator.vectorize(
+                    aggregated, dtype=np.float32
+                ).data,
+            }
+            expected, _, _ = measure(runs["scatter float64"])
+            out = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, "vectorized.npy"),
+                mode="w+",
+                dtype=np.float32,
+                shape=expected.shape,
+            )
+            runs["scatter memmap"] = lambda: aggregator.vectorize(
+                aggregated, out=out
+            ).data
+            if n_rows <= args.reindex_max_rows:
+                runs["reindex"] = lambda: vectorize_by_reindex(aggregator, aggregated)
+
+            print(f"{n_rows} rows, vectorized shape {expected.shape}")
+            for name, run in runs.items():
+                result, seconds, peak = measure(run)
+                assert np.allclose(result, expected, equal_nan=True)
+                print(f"  {name:>16}: {seconds:.2f} s, peak {peak / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
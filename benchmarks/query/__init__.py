@@ -0,0 +1 @@
+"""Query package benchmarks."""
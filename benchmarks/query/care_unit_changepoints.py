@@ -0,0 +1,69 @@
+"""Benchmark processing care unit changepoints across many encounters.
+
+Run with ``python -m benchmarks.query.care_unit_changepoints``.
+
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.query.util import best_of
+from cyclops.process.column_names import CARE_UNIT, ENCOUNTER_ID
+from cyclops.query.post_process.mimiciv import (
+    CARE_UNIT_HIERARCHY,
+    process_mimic_care_unit_changepoints,
+)
+
+
+def synthetic_transfers(n_rows: int, n_encounters: int, seed: int = 42):
+    """Create synthetic care unit transfers, with overlapping stays."""
+    rng = np.random.default_rng(seed)
+    admit = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 24 * 30, n_rows), unit="h"
+    )
+    return pd.DataFrame(
+        {
+            ENCOUNTER_ID: rng.integers(0, n_encounters, n_rows),
+            "admit": admit,
+            "discharge": admit + pd.to_timedelta(rng.integers(1, 72, n_rows), unit="h"),
+            CARE_UNIT: np.array(CARE_UNIT_HIERARCHY)[
+                rng.integers(0, len(CARE_UNIT_HIERARCHY), n_rows)
+            ],
+        }
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--apply-rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    transfers = synthetic_transfers(args.rows, args.rows // 5)
+    seconds, changepoints = best_of(
+        lambda: process_mimic_care_unit_changepoints(
+            transfers, encounter_col=ENCOUNTER_ID
+        ),
+        repeat=3,
+    )
+    print(
+        f"whole table, {args.rows} transfers: {seconds:.2f} s, "
+        f"{len(changepoints)} changepoints"
+    )
+
+    # Per-encounter groupby-apply, on fewer transfers.
+    transfers = synthetic_transfers(args.apply_rows, args.apply_rows // 5)
+    seconds, _ = best_of(
+        lambda: transfers.groupby(ENCOUNTER_ID).apply(
+            process_mimic_care_unit_changepoints
+        ),
+        repeat=1,
+    )
+    print(f"groupby-apply, {args.apply_rows} transfers: {seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Benchmark the memory use of query results with compact data types.
+
+Run with ``python -m benchmarks.query.compact_dtypes``.
+
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.query.util import sqlite_database, synthetic_events
+from cyclops.query.dtypes import DtypeOptions, memory_summary
+from cyclops.query.interface import QueryInterface
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = sqlite_database(
+            os.path.join(tmp_dir, "bench.db"), synthetic_events(args.rows)
+        )
+        for name, options in [
+            ("default", None),
+            ("compact", DtypeOptions()),
+            ("float32", DtypeOptions(float32=True)),
+        ]:
+            database.dtype_options = options
+            interface = QueryInterface(database, database.main.events)
+            interface.run()
+            summary = memory_summary(interface.data)
+            timings = ", ".join(
+                f"{step} {seconds:.2f} s" for step, seconds in interface.timings.items()
+            )
+            print(f"{name}: {summary.loc['total', 'memory_bytes'] / 2**20:.1f} MB")
+            print(f"  {timings}")
+            print(summary.drop(index="total")[["dtype", "memory_bytes"]].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark flattening the nested subqueries of chained query operations.
+
+Run with ``python -m benchmarks.query.flatten_subqueries``.
+
+"""
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import select
+
+from benchmarks.query.util import best_of, sqlite_database, synthetic_events
+from cyclops.query import ops as qo
+
+
+def events_pipeline(events):
+    """Build a typical events query, as produced by a dataset querier."""
+    table = qo.Rename({"event_name": "name", "event_value": "value"})(events)
+    table = qo.ConditionIn("name", [f"event_{i}" for i in range(10)])(table)
+    table = qo.DropNulls("value")(table)
+    table = qo.AddNumeric("value", 1.0)(table)
+    table = qo.Substring("name", 0, 5, "name_prefix")(table)
+    table = qo.Literal(1, "source")(table)
+    table = qo.Rename({"encounter_id": "visit_id"})(table)
+    table = qo.FilterColumns(["visit_id", "name", "value", "event_timestamp"])(table)
+    table = qo.ConditionEquals("visit_id", 0, not_=True)(table)
+    table = qo.Drop("event_timestamp")(table)
+
+    return table
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = sqlite_database(
+            os.path.join(tmp_dir, "bench.db"), synthetic_events(args.rows)
+        )
+        nested = events_pipeline(database.main.events.data)
+        flat = qo.Compile()(nested)
+
+        def run(query):
+            with database.engine.connect() as conn:
+                return pd.read_sql_query(select(query), conn)
+
+        def compile_query(query):
+            return str(select(query).compile(database.engine))
+
+        print(f"{'query':>8} {'depth':>6} {'compile (ms)':>13} {'run (s)':>8}")
+        for name, query in [("nested", nested), ("compiled", flat)]:
+            compile_time, sql = best_of(lambda: compile_query(query), args.repeat)
+            run_time, data = best_of(lambda: run(query), args.repeat)
+            print(
+                f"{name:>8} {sql.count('SELECT'):>6} {compile_time * 1e3:>13.2f} "
+                f"{run_time:>8.3f}"
+            )
+            assert len(data) > 0
+
+        flatten_time, _ = best_of(lambda: qo.Compile()(nested), args.repeat)
+        print(f"Flattening takes {flatten_time * 1e3:.2f} ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark ConditionIn with inlined values against a temporary table of values.
+
+Run with ``python -m benchmarks.query.in_list``.
+
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+from sqlalchemy import func, select
+
+from benchmarks.query.util import best_of, sqlite_database, synthetic_events
+from cyclops.query import ops as qo
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--encounters", type=int, default=10**5)
+    parser.add_argument(
+        "--values", type=int, nargs="+", default=[10, 100, 1000, 10000, 30000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = sqlite_database(
+            os.path.join(tmp_dir, "bench.db"),
+            synthetic_events(args.rows, n_encounters=args.encounters),
+        )
+        events = select(database.main.events.data).subquery()
+
+        print(f"{'values':>8} {'inlined (s)':>12} {'table (s)':>10} {'speed-up':>9}")
+        for n_values in args.values:
+            values = rng.choice(args.encounters, n_values, replace=False).tolist()
+            times = []
+            for threshold in [n_values, 0]:
+                # Count the rows, so that fetching does not dominate.
+                query = select(func.count()).select_from(
+                    qo.ConditionIn("encounter_id", values, table_threshold=threshold)(
+                        events
+                    )
+                )
+                run_time, data = best_of(
+                    lambda: database.run_query(query),  # pylint: disable=W0640
+                    args.repeat,
+                )
+                times.append(run_time)
+            print(
+                f"{n_values:>8} {times[0]:>12.3f} {times[1]:>10.3f} "
+                f"{times[0] / times[1]:>8.2f}x"
+            )
+            assert data.iloc[0, 0] > 0
+
+
+if __name__ == "__main__":
+    main()
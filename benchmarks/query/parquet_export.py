@@ -0,0 +1,75 @@
+"""Benchmark Parquet export of queries against the previous CSV round-trip.
+
+Run with ``python -m benchmarks.query.parquet_export``.
+
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from benchmarks.query.util import best_of, sqlite_database, synthetic_events
+from cyclops.query.orm import Database
+from cyclops.query.util import _to_select
+
+
+def save_via_csv(database: Database, query, path: str) -> str:
+    """Save a query to Parquet by writing, and re-reading, a CSV file.
+
+    This is the export path used before the streamed Arrow export.
+
+    """
+    csv_path = path.replace(".parquet", ".csv")
+    result = database.engine.execute(_to_select(query))
+    with open(csv_path, "w", encoding="utf-8") as file_descriptor:
+        outcsv = csv.writer(file_descriptor)
+        outcsv.writerow(result.keys())
+        outcsv.writerows(result)
+    table = pv.read_csv(csv_path)
+    os.remove(csv_path)
+    pq.write_table(table, path)
+
+    return path
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10**4, 10**5, 10**6]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'csv (s)':>10} {'arrow (s)':>10} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in args.rows:
+            database = sqlite_database(
+                os.path.join(tmp_dir, f"bench_{n_rows}.db"), synthetic_events(n_rows)
+            )
+            query = database.main.events
+            csv_time, _ = best_of(
+                lambda: save_via_csv(
+                    database, query, os.path.join(tmp_dir, "csv.parquet")
+                ),
+                args.repeat,
+            )
+            arrow_time, path = best_of(
+                lambda: database.save_query_to_parquet(
+                    query, os.path.join(tmp_dir, "arrow.parquet")
+                ),
+                args.repeat,
+            )
+            assert pq.ParquetFile(path).metadata.num_rows == n_rows
+            print(
+                f"{n_rows:>10} {csv_time:>10.3f} {arrow_time:>10.3f} "
+                f"{csv_time / arrow_time:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark parallel, partitioned extraction of queries to Parquet.
+
+Run with ``python -m benchmarks.query.partitioned_export``.
+
+SQLite decodes rows in the calling Python thread, so on the SQLite stand-in
+this mostly measures the overhead of partitioning. Against a database server,
+the partition sub-queries run concurrently on the server.
+
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.query.util import best_of, sqlite_database, synthetic_events
+from cyclops.query.interface import QueryInterface
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--partitions", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = sqlite_database(
+            os.path.join(tmp_dir, "bench.db"), synthetic_events(args.rows)
+        )
+        query_interface = QueryInterface(database, database.main.events)
+        single_time, _ = best_of(
+            lambda: database.save_query_to_parquet(
+                database.main.events, os.path.join(tmp_dir, "single.parquet")
+            ),
+            args.repeat,
+        )
+
+        print(f"{'workers':>8} {'time (s)':>10} {'speed-up':>9}")
+        print(f"{'single':>8} {single_time:>10.3f} {1:>8.2f}x")
+        for workers in args.workers:
+            save_dir = os.path.join(tmp_dir, "partitioned")
+            partitioned_time, _ = best_of(
+                lambda: query_interface.save_partitioned(
+                    save_dir,
+                    "encounter_id",
+                    args.partitions,
+                    workers=workers,  # pylint: disable=cell-var-from-loop
+                ),
+                args.repeat,
+            )
+            shutil.rmtree(save_dir)
+            print(
+                f"{workers:>8} {partitioned_time:>10.3f} "
+                f"{single_time / partitioned_time:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark sampling rows with Sample against RandomizeOrder and Limit.
+
+Run with ``python -m benchmarks.query.sample``.
+
+"""
+
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import select
+
+from benchmarks.query.util import best_of, sqlite_database, synthetic_events
+from cyclops.query import ops as qo
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10**6)
+    parser.add_argument("--fraction", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = sqlite_database(
+            os.path.join(tmp_dir, "bench.db"),
+            synthetic_events(args.rows, n_encounters=args.rows // 100),
+        )
+        events = select(database.main.events.data).subquery()
+        n_sample = int(args.rows * args.fraction)
+        queries = {
+            "randomize + limit": qo.Limit(n_sample)(qo.RandomizeOrder()(events)),
+            "sample": qo.Sample(args.fraction)(events),
+            "sample by hash": qo.Sample(
+                args.fraction, method="hash", col="encounter_id"
+            )(events),
+        }
+        for name, query in queries.items():
+            run_time, data = best_of(
+                lambda: database.run_query(  # pylint: disable=W0640
+                    query, use_cache=False  # pylint: disable=W0640
+                ),
+                args.repeat,
+            )
+            print(f"{name:>18}: {run_time:.3f} s, {len(data)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Utilities for the query package benchmarks."""
+
+import time
+from typing import Callable, Tuple
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from omegaconf import OmegaConf
+from sqlalchemy import create_engine
+
+from cyclops.query.orm import Database
+
+
+def synthetic_events(n_rows: int, n_encounters: int = 1000, seed: int = 42):
+    """Create synthetic events data.
+
+    Parameters
+    ----------
+    n_rows: int
+        Number of events.
+    n_encounters: int
+        Number of encounters over which the events are spread.
+    seed: int
+        Random seed.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Events data.
+
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"event_{i}" for i in range(100)])
+    return pd.DataFrame(
+        {
+            "encounter_id": rng.integers(0, n_encounters, n_rows),
+            "event_name": names[rng.integers(0, len(names), n_rows)],
+            "event_value": rng.normal(size=n_rows),
+            "event_timestamp": pd.Timestamp("2020-01-01")
+            + pd.to_timedelta(rng.integers(0, 10**6, n_rows), unit="s"),
+        }
+    )
+
+
+def sqlite_database(db_path: str, events: pd.DataFrame) -> Database:
+    """Create a SQLite file database standing in for a database server.
+
+    Parameters
+    ----------
+    db_path: str
+        Path of the SQLite database file.
+    events: pandas.DataFrame
+        Data to load as the 'events' table.
+
+    Returns
+    -------
+    cyclops.query.orm.Database
+        Database object on the SQLite database.
+
+    """
+    engine = create_engine(f"sqlite:///{db_path}")
+    events.to_sql("events", engine, index=False, if_exists="replace")
+    config = OmegaConf.create(
+        {
+            "dbms": "sqlite",
+            "host": "localhost",
+            "port": 5432,
+            "database": db_path,
+            "user": "user",
+            "password": "pwd",
+        }
+    )
+    with patch("cyclops.query.orm.socket.socket") as socket_mock, patch(
+        "cyclops.query.orm.create_engine", return_value=engine
+    ):
+        socket_mock.return_value.connect_ex.return_value = 0
+        return Database(config)
+
+
+def best_of(func: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """Time a function, taking the best of several runs.
+
+    Parameters
+    ----------
+    func: Callable
+        Function, without arguments, to time.
+    repeat: int
+        Number of runs.
+
+    Returns
+    -------
+    tuple
+        Best run time in seconds, and the result of the last run.
+
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start_time)
+
+    return min(times), result
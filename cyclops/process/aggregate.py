@@ -1,11 +1,15 @@
 """Aggregation functions."""
 
 import logging
+import multiprocessing
+import os
 from collections import OrderedDict
+from multiprocessing.context import BaseContext
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
+from pandas.core.groupby import DataFrameGroupBy
 
 from cyclops.process.clean import dropna_rows
 from cyclops.process.column_names import (
@@ -18,10 +22,12 @@ from cyclops.process.column_names import (
     TIMESTEP,
 )
 from cyclops.process.constants import ALL, FIRST, LAST, MEAN, MEDIAN
+from cyclops.process.feature.sparse import SparseData
 from cyclops.process.feature.vectorized import Vectorized
 from cyclops.process.impute import AggregatedImputer, numpy_2d_ffill
 from cyclops.process.util import has_columns, is_timestamp_series
 from cyclops.utils.common import to_list, to_list_optional
+from cyclops.utils.file import join
 from cyclops.utils.log import setup_logging
 from cyclops.utils.profile import time_function
 
@@ -36,8 +42,6 @@ AGGFUNCS = {MEAN: np.mean, MEDIAN: np.median}
 class Aggregator:  # pylint: disable=too-many-instance-attributes
     """Equal-spaced aggregation, or binning, of temporal data.
 
-    Computing aggregation metadata is expensive and should be done sparingly.
-
     Attributes
     ----------
     aggfuncs: dict
@@ -75,9 +79,6 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
         agg_meta_for: Optional[List[str]] = None,
     ):
         """Init."""
-        if agg_meta_for is not None:
-            LOGGER.warning("Calculation of aggregation metadata slows aggregation.")
-
         self.aggfuncs = self._process_aggfuncs(aggfuncs)
         self.timestamp_col = timestamp_col
         self.time_by = to_list(time_by)
@@ -257,7 +258,7 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
         # Take the earliest timestamp for each time_by group
         earliest_time = (
             data[self.time_by + [self.timestamp_col]]
-            .groupby(self.time_by, sort=False)
+            .groupby(self.time_by, sort=False, observed=True)
             .agg({self.timestamp_col: "min"})
         )
 
@@ -317,7 +318,7 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
             # Take the latest timestamp for each time_by group
             latest_time = (
                 data[self.time_by + [self.timestamp_col]]
-                .groupby(self.time_by, sort=False)
+                .groupby(self.time_by, sort=False, observed=True)
                 .agg({self.timestamp_col: "max"})
             )
 
@@ -380,36 +381,41 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
 
         return window_times
 
-    def _compute_timestep(self, group: pd.DataFrame) -> pd.DataFrame:
+    def _compute_timesteps(self, data: pd.DataFrame) -> pd.DataFrame:
         """Compute which timestep, or bin, each occurence falls into.
 
+        The window start timestamps are joined once, and the timesteps of all
+        rows are computed together with integer nanosecond arithmetic.
+
         Parameters
         ----------
-        group: pandas.DataFrame
-            A time_by group.
+        data: pandas.DataFrame
+            Data restricted to the windows.
 
         Returns
         -------
         pandas.DataFrame
-            The inputted group with an additional TIMESTEP column.
+            The inputted data with an additional TIMESTEP column.
 
         """
-        loc = tuple(group[self.time_by].values[0])
-        start = self.window_times.loc[loc][START_TIMESTAMP]
-        group[TIMESTEP] = (group[self.timestamp_col] - start) / pd.Timedelta(
-            hours=self.timestep_size
+        starts = data[self.time_by].join(
+            self.window_times[START_TIMESTAMP], on=self.time_by
+        )[START_TIMESTAMP]
+        elapsed = data[self.timestamp_col].values.view("int64") - starts.values.view(
+            "int64"
         )
-        group[TIMESTEP] = group[TIMESTEP].astype("int")
 
-        return group
+        return data.assign(
+            **{TIMESTEP: elapsed // pd.Timedelta(hours=self.timestep_size).value}
+        )
 
-    def _compute_agg_meta(self, group: pd.DataFrame) -> pd.DataFrame:
-        """Compute the aggregation metadata for an agg_by group.
+    def _compute_agg_meta(self, grouped: DataFrameGroupBy) -> pd.DataFrame:
+        """Compute the aggregation metadata for each agg_by group and timestep.
 
         Parameters
         ----------
-        group: pandas.DataFrame
-            An agg_by group.
+        grouped: pandas.core.groupby.DataFrameGroupBy
+            The data grouped by the agg_by columns and timestep.
 
         Returns
         -------
@@ -417,86 +423,78 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
             The aggergation metadata information.
 
         """
-        # Note: .counts() returns the number of non-null values in the Series.
-        meta = group.agg(
-            {
-                col: [lambda x: x.count(), len]
-                for col in self.agg_meta_for  # type: ignore
-            },
-            dropna=False,
-        )
+        # Note: .count() returns the number of non-null values in each group.
+        counts = grouped[self.agg_meta_for].count()
+        sizes = grouped.size()
 
-        keep = []
+        meta = {}
         for col in self.agg_meta_for:  # type: ignore
-            meta[col + "_count"] = meta[(col, "len")]
-            meta[col + "_null_fraction"] = 1 - (
-                meta[(col, "<lambda_0>")] / meta[(col, "len")]
-            )
-            keep.extend([col + "_count", col + "_null_fraction"])
+            meta[col + "_count"] = sizes
+            meta[col + "_null_fraction"] = 1 - counts[col] / sizes
 
-        meta = meta[keep]
-        meta.columns = meta.columns.droplevel(1)
-        return meta
+        return pd.DataFrame(meta)
 
-    def _compute_aggregation(self, group: pd.DataFrame) -> pd.DataFrame:
-        """Compute the aggregation for an agg_by group by timestep.
+    def _compute_aggregation(
+        self, data: pd.DataFrame, by: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Compute the aggregation of data with timesteps, by timestep.
 
         Parameters
         ----------
-        group: pandas.DataFrame
-            An agg_by group.
+        data: pandas.DataFrame
+            Data with a timestep column, e.g., an agg_by group.
+        by: list of str, optional
+            Columns by which to group, along with the timestep, e.g., agg_by.
+            If None, the data is aggregated as a single group.
 
         Returns
         -------
         pandas.DataFrame
-            The aggregated group.
+            The aggregated data, indexed by the by columns and timestep.
 
         """
-        group = group.groupby(TIMESTEP, sort=False, dropna=False)
+        index = (by or []) + [TIMESTEP]
+        grouped = data.groupby(index, sort=False, observed=True)
 
-        # Compute aggregation meta
+        # Compute aggregation meta, before imputation
+        agg_meta = None
         if self.agg_meta_for is not None:
-            agg_meta = self._compute_agg_meta(group)
-        else:
-            agg_meta = None
+            agg_meta = self._compute_agg_meta(grouped)
 
-        if self.imputer is not None:
-            if self.imputer.intra is not None:
-                group = self.imputer.intra(group)
+        # Impute within each timestep
+        if self.imputer is not None and self.imputer.intra_imputer is not None:
+            data = self.imputer.intra(data, by=index)
+            grouped = data.groupby(index, sort=False, observed=True)
 
-        AggregatedImputer(group)
-
-        group = group.agg(self.aggfuncs)
+        # Aggregate
+        aggregated = grouped.agg(self.aggfuncs)
 
         # Include aggregation meta
         if agg_meta is not None:
-            group = group.join(agg_meta)
+            aggregated = aggregated.join(agg_meta)
+
+        # With metadata or imputation, order rows by group, then timestep, as
+        # first seen, as when aggregating each group in turn
+        has_order = self.agg_meta_for is not None or self.imputer is not None
+        if by and has_order:
+            group_order = (
+                data.groupby(by, sort=False, observed=True)
+                .ngroup()
+                .groupby([data[col] for col in index], sort=False, observed=True)
+                .first()
+            )
+            aggregated = aggregated.iloc[np.argsort(group_order.values, kind="stable")]
 
-        return group
+        return aggregated
 
     def _aggregate(
         self, data: pd.DataFrame, include_timestep_start: bool = True
     ) -> pd.DataFrame:
         # Get the timestep according to the timestep for each event
-        data_with_timesteps = data.groupby(
-            self.time_by, sort=False, group_keys=False
-        ).apply(self._compute_timestep)
+        data_with_timesteps = self._compute_timesteps(data)
 
         # Aggregate
-        has_inter_imputer = True
-        if self.imputer is None:
-            has_inter_imputer = False
-        elif self.imputer.inter is None:
-            has_inter_imputer = False
-
-        if self.agg_meta_for is None and not has_inter_imputer:
-            # EFFICIENT - Can perform if no imputation or metadata calculation is done
-            grouped = data_with_timesteps.groupby(self.agg_by + [TIMESTEP], sort=False)
-            aggregated = grouped.agg(self.aggfuncs)
-        else:
-            # INEFFICIENT - Perform with a custom function to allow addded functionality
-            grouped = data_with_timesteps.groupby(self.agg_by, sort=False)
-            aggregated = grouped.apply(self._compute_aggregation)
+        aggregated = self._compute_aggregation(data_with_timesteps, by=self.agg_by)
 
         if not include_timestep_start:
             return aggregated
@@ -579,17 +577,38 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
         return self._aggregate(data, include_timestep_start=include_timestep_start)
 
     @time_function
-    def vectorize(self, aggregated: pd.DataFrame) -> np.ndarray:
+    def vectorize(
+        self,
+        aggregated: pd.DataFrame,
+        dtype: Optional[Union[str, np.dtype]] = None,
+        out: Optional[np.ndarray] = None,
+        sparse: bool = False,
+    ) -> Vectorized:
         """Vectorize aggregated data.
 
+        The values are scattered directly into the output array, using the sorted
+        unique values of each agg_by level as the index of its axis. Missing
+        groups/timesteps are null and timesteps beyond the window are dropped.
+        With sparse storage, only the non-null values are stored.
+
         Parameters
         ----------
         aggregated: pandas.DataFrame
             Aggregated data.
+        dtype: str or numpy.dtype, optional
+            Data type of the vectorized data, e.g., float32 to halve its memory
+            use. By default, that of the aggregated columns, as floats.
+        out: numpy.ndarray, optional
+            A C-contiguous array of the vectorized shape in which to write the
+            data, e.g., a numpy.memmap, to avoid holding another copy in memory.
+            Its data type is used.
+        sparse: bool, default = False
+            Whether to store the data sparsely, which uses far less memory when
+            most groups/timesteps are missing. Cannot be used with out.
 
         Returns
         -------
-        numpy.ndarray
+        cyclops.process.feature.vectorized.Vectorized
             Vectorized aggregated data of shape:
             (# of aggfuncs, *# of unique in each agg_by, window_duration/timestep_size)
 
@@ -606,30 +625,80 @@ class Aggregator:  # pylint: disable=too-many-instance-attributes
         if not aggregated.index.names == self.agg_by + [TIMESTEP]:
             raise ValueError(f"Index must be: {self.agg_by + [TIMESTEP]}.")
 
-        # Reindex to add missing groups/timesteps
-        index = self.agg_by + [TIMESTEP]
-        aggregated = aggregated.reset_index().set_index(index)
-        idx = pd.MultiIndex.from_product(
-            [aggregated.index.levels[i] for i in range(len(self.agg_by))]
-            + [range(num_timesteps)],
-            names=index,
-        )
-        vectorized = aggregated.reindex(idx)
-
-        # Calculate new shape and indexes
-        shape = [
-            len(vectorized.index.levels[i]) for i in range(len(vectorized.index.levels))
-        ]
+        # Compute integer codes of each index level, nulls having code -1
+        codes = []
         indexes = [list(self.aggfuncs.keys())]
-        indexes.extend([ind.values for ind in vectorized.index.levels])
+        for level in range(len(self.agg_by)):
+            level_codes, uniques = pd.factorize(
+                aggregated.index.get_level_values(level), sort=True
+            )
+            codes.append(level_codes)
+            indexes.append(np.asarray(uniques))
+        timesteps = aggregated.index.get_level_values(TIMESTEP).to_numpy()
+        codes.append(
+            np.where((timesteps >= 0) & (timesteps < num_timesteps), timesteps, -1)
+        )
+        indexes.append(np.arange(num_timesteps))
 
-        # Reshape and vectorize
-        vectorized = np.stack(
-            [vectorized[aggfunc].values.reshape(shape) for aggfunc in self.aggfuncs]
+        keep = np.logical_and.reduce([level_codes >= 0 for level_codes in codes])
+        shape = tuple(len(index) for index in indexes[1:])
+        positions = np.ravel_multi_index(
+            [level_codes[keep] for level_codes in codes], shape
         )
+        if pd.Index(positions).has_duplicates:
+            raise ValueError("Index must have no duplicate values.")
+
+        # Allocate, or check, the output
+        full_shape = (len(self.aggfuncs),) + shape
+        if out is None:
+            if dtype is None:
+                dtype = np.result_type(
+                    *[
+                        aggregated[col].dtype
+                        if pd.api.types.is_float_dtype(aggregated[col].dtype)
+                        or pd.api.types.is_object_dtype(aggregated[col].dtype)
+                        else np.float64
+                        for col in self.aggfuncs
+                    ]
+                )
+            if not sparse:
+                out = np.empty(full_shape, dtype=dtype)
+        elif sparse:
+            raise ValueError("Cannot write sparse data into an output array.")
+        elif out.shape != full_shape or not out.flags.c_contiguous:
+            raise ValueError(
+                f"Output must be a C-contiguous array of shape {full_shape}."
+            )
+
+        if sparse:
+            # Store the non-null values of each aggregated column, with one
+            # row per aggfunc and agg_by group and one column per timestep
+            rows_per_col = int(np.prod(shape[:-1]))
+            rows, cols, values = [], [], []
+            for i, col in enumerate(self.aggfuncs):
+                col_values = aggregated[col].to_numpy(dtype=dtype, na_value=np.nan)
+                notnull = ~pd.isnull(col_values[keep])
+                rows.append(i * rows_per_col + positions[notnull] // num_timesteps)
+                cols.append(positions[notnull] % num_timesteps)
+                values.append(col_values[keep][notnull])
+            data = SparseData.from_coordinates(
+                np.concatenate(rows),
+                np.concatenate(cols),
+                np.concatenate(values),
+                full_shape,
+            )
+        else:
+            # Scatter the values of each aggregated column
+            out.fill(np.nan)
+            flat = out.reshape(len(self.aggfuncs), -1)
+            for i, col in enumerate(self.aggfuncs):
+                flat[i, positions] = aggregated[col].to_numpy(
+                    dtype=out.dtype, na_value=np.nan
+                )[keep]
+            data = out
 
         return Vectorized(
-            data=vectorized,
+            data=data,
             indexes=indexes,
             axis_names=["aggfuncs"] + self.agg_by + [TIMESTEP],
         )
@@ -760,3 +829,199 @@ def timestamp_ffill_agg(
         arr = np.nan_to_num(arr, nan=fill_nan)
 
     return arr
+
+
+class _PartitionAggregation:  # pylint: disable=too-few-public-methods
+    """Aggregation of one partition file, as run by an aggregation worker."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        aggregator: Aggregator,
+        columns: Optional[List[str]],
+        filter_fn: Optional[Callable],
+        aggregate_kwargs: Dict[str, Any],
+    ):
+        """Init."""
+        self.aggregator = aggregator
+        self.columns = columns
+        self.filter_fn = filter_fn
+        self.aggregate_kwargs = aggregate_kwargs
+
+    def __call__(self, paths: Tuple[str, str]) -> str:
+        """Aggregate a partition file, writing the result atomically.
+
+        Parameters
+        ----------
+        paths: tuple
+            The paths of the partition file and its aggregated output.
+
+        Returns
+        -------
+        str
+            The path of the aggregated output.
+
+        """
+        input_path, output_path = paths
+        data = pd.read_parquet(input_path, columns=self.columns)
+        if self.filter_fn is not None:
+            data = self.filter_fn(data)
+        aggregated = self.aggregator(
+            data.reset_index(drop=True), **self.aggregate_kwargs
+        )
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        aggregated.to_parquet(tmp_path)
+        os.replace(tmp_path, output_path)
+
+        return output_path
+
+
+_WORKER_AGGREGATION: Optional[_PartitionAggregation] = None
+
+
+def _init_aggregation_worker(aggregation: _PartitionAggregation) -> None:
+    """Store the partition aggregation of an aggregation worker process."""
+    global _WORKER_AGGREGATION  # pylint: disable=global-statement
+    _WORKER_AGGREGATION = aggregation
+
+
+def _run_aggregation_worker(paths: Tuple[str, str]) -> str:
+    """Aggregate a partition file in an aggregation worker process."""
+    return _WORKER_AGGREGATION(paths)  # type: ignore
+
+
+def find_partitions(input_dir: str) -> List[str]:
+    """Find the Parquet partition files of a directory, recursively.
+
+    Parameters
+    ----------
+    input_dir: str
+        Directory of Parquet partition files.
+
+    Returns
+    -------
+    list of str
+        Sorted paths of the partition files, relative to the directory.
+
+    """
+    partitions = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = [dir_ for dir_ in dirs if not dir_.startswith(".")]
+        partitions.extend(
+            os.path.relpath(join(root, file), input_dir).replace("\\", "/")
+            for file in files
+            if file.endswith(".parquet") and not file.startswith(".")
+        )
+
+    return sorted(partitions)
+
+
+def aggregate_partitions(  # pylint: disable=too-many-arguments
+    aggregator: Aggregator,
+    input_dir: str,
+    output_dir: str,
+    window_start_time: Optional[pd.DataFrame] = None,
+    window_stop_time: Optional[pd.DataFrame] = None,
+    filter_fn: Optional[Callable] = None,
+    columns: Optional[List[str]] = None,
+    num_workers: Optional[int] = None,
+    max_partitions_per_worker: Optional[int] = None,
+    mp_context: Optional[BaseContext] = None,
+) -> List[str]:
+    """Aggregate a directory of event partitions on a pool of processes.
+
+    The events must be partitioned by the aggregator's time_by columns, so that
+    each partition is aggregated on its own, e.g., Parquet batches of
+    encounters. A worker only holds one partition at a time, and its output is
+    written under the same relative path in the output directory. Partitions
+    with an existing output are skipped, so an interrupted run can be resumed.
+
+    The aggregator and filter function are sent to the worker processes, so
+    they must be picklable, e.g., a module-level function or a
+    functools.partial of one rather than a lambda or a nested function.
+    Otherwise, aggregating fails with the 'spawn' start method, which is the
+    default on macOS and Windows.
+
+    Parameters
+    ----------
+    aggregator: Aggregator
+        Aggregator to run on each partition.
+    input_dir: str
+        Directory of Parquet partition files, searched recursively.
+    output_dir: str
+        Directory in which to write the aggregated partitions.
+    window_start_time: pandas.DataFrame, optional
+        An optionally provided window start time, for all partitions.
+    window_stop_time: pandas.DataFrame, optional
+        An optionally provided window stop time, for all partitions.
+    filter_fn: callable, optional
+        Function filtering the events of a partition before aggregating. Must
+        be picklable.
+    columns: list of str, optional
+        Columns to load from each partition. By default, only those used by the
+        aggregator are loaded.
+    num_workers: int, optional
+        Number of worker processes. Defaults to the number of CPUs. If 1, the
+        partitions are aggregated in the calling process.
+    max_partitions_per_worker: int, optional
+        Number of partitions after which a worker is replaced by a fresh
+        process, releasing its memory. By default, workers are kept.
+    mp_context: multiprocessing.context.BaseContext, optional
+        Context with which to start the worker processes, e.g.,
+        multiprocessing.get_context("spawn"). Defaults to the default context.
+
+    Returns
+    -------
+    list of str
+        Paths of the aggregated partitions, in the order of the partitions.
+
+    """
+    if columns is None:
+        columns = list(
+            OrderedDict.fromkeys(
+                [aggregator.timestamp_col]
+                + aggregator.time_by
+                + aggregator.agg_by
+                + list(aggregator.aggfuncs)
+            )
+        )
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers < 1:
+        raise ValueError("The number of workers must be positive.")
+
+    partitions = find_partitions(input_dir)
+    output_paths = [join(output_dir, partition) for partition in partitions]
+    pending = [
+        (join(input_dir, partition), output_path)
+        for partition, output_path in zip(partitions, output_paths)
+        if not os.path.exists(output_path)
+    ]
+    LOGGER.info(
+        "Aggregating %d partitions, skipping %d already aggregated.",
+        len(pending),
+        len(partitions) - len(pending),
+    )
+
+    aggregation = _PartitionAggregation(
+        aggregator,
+        columns,
+        filter_fn,
+        {"window_start_time": window_start_time, "window_stop_time": window_stop_time},
+    )
+    if num_workers == 1 or len(pending) <= 1:
+        for paths in pending:
+            aggregation(paths)
+    else:
+        context = mp_context or multiprocessing.get_context()
+        with context.Pool(
+            processes=min(num_workers, len(pending)),
+            initializer=_init_aggregation_worker,
+            initargs=(aggregation,),
+            maxtasksperchild=max_partitions_per_worker,
+        ) as pool:
+            for _ in pool.imap_unordered(_run_aggregation_worker, pending):
+                pass
+
+    return output_paths
@@ -10,6 +10,7 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
 from cyclops.process.constants import MIN_MAX, STANDARD
+from cyclops.process.feature.sparse import SparseData
 from cyclops.process.util import has_columns, has_range_index
 from cyclops.utils.common import to_list_optional
 from cyclops.utils.index import index_axis
@@ -274,7 +275,7 @@ class GroupbyNormalizer:
             self.normalizers = get_normalizer_for_group(data)
         else:
             has_columns(data, self.by, raise_error=True)
-            grouped = data.groupby(self.by)
+            grouped = data.groupby(self.by, observed=True)
             self.normalizers = grouped.apply(get_normalizer_for_group).droplevel(
                 level=-1
             )
@@ -324,7 +325,7 @@ class GroupbyNormalizer:
             data = data.reset_index()
 
             data.set_index(self.by, inplace=True)
-            grouped = data.groupby(self.by, as_index=False, sort=False)
+            grouped = data.groupby(self.by, as_index=False, sort=False, observed=True)
             data = grouped.apply(transform_group)
             data = data.reset_index(drop=True)
             data = data.set_index("index")
@@ -419,13 +420,15 @@ class VectorizedNormalizer:
         if len(missing) != 0:
             raise ValueError(f"Missing features {', '.join(missing)} in the data.")
 
-    def fit(self, data: np.ndarray, index_map: Dict[str, int]) -> None:
+    def fit(
+        self, data: Union[np.ndarray, SparseData], index_map: Dict[str, int]
+    ) -> None:
         """Fit the normalizing objects.
 
         Parameters
         ----------
-        data: numpy.ndarray
-            Data over which to fit.
+        data: numpy.ndarray or SparseData
+            Data over which to fit. For sparse data, only the stored values.
         index_map: dict
             Map from feature name to index in the normalizer's given axis.
 
@@ -442,22 +445,30 @@ class VectorizedNormalizer:
                 )
 
             ind = index_map[feat]
-            values = data[index_axis(ind, self.axis, data.shape)]
-            values = values.flatten()
+            if isinstance(data, SparseData):
+                values = data.values[data.index_codes(self.axis) == ind]
+                if len(values) == 0:
+                    values = np.array([np.nan])
+            else:
+                values = data[index_axis(ind, self.axis, data.shape)]
+                values = values.flatten()
             normalizer.fit(values)
             self.normalizers[feat] = normalizer
 
         self.is_fit = True
 
     def _transform_by_method(
-        self, data: np.ndarray, index_map: Dict[str, int], method: str
-    ) -> np.ndarray:
+        self,
+        data: Union[np.ndarray, SparseData],
+        index_map: Dict[str, int],
+        method: str,
+    ) -> Union[np.ndarray, SparseData]:
         """Apply a method from the normalizer object to the data.
 
         Parameters
         ----------
-        data: numpy.ndarray
-            Data to transform.
+        data: numpy.ndarray or SparseData
+            Data to transform, in place.
         index_map: dict
             Map from feature name to index in the normalizer's given axis.
         method: str
@@ -465,7 +476,7 @@ class VectorizedNormalizer:
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or SparseData
             The data with the method applied.
 
         """
@@ -474,6 +485,14 @@ class VectorizedNormalizer:
 
         self._check_missing(index_map)
 
+        if isinstance(data, SparseData):
+            codes = data.index_codes(self.axis)
+            for feat, normalizer in self.normalizers.items():
+                mask = codes == index_map[feat]
+                if mask.any():
+                    data.values[mask] = getattr(normalizer, method)(data.values[mask])
+            return data
+
         for feat, normalizer in self.normalizers.items():
             ind = index_map[feat]
             data_indexing = index_axis(ind, self.axis, data.shape)
@@ -485,19 +504,19 @@ class VectorizedNormalizer:
 
         return data
 
-    def transform(self, data: np.ndarray, index_map: Dict[str, int]):
+    def transform(self, data: Union[np.ndarray, SparseData], index_map: Dict[str, int]):
         """Normalize the data.
 
         Parameters
         ----------
-        data: numpy.ndarray
-            Data to transform.
+        data: numpy.ndarray or SparseData
+            Data to transform, in place.
         index_map: dict
             Map from feature name to index in the normalizer's given axis.
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or SparseData
             The normalized data.
 
         """
@@ -506,19 +525,21 @@ class VectorizedNormalizer:
 
         return self._transform_by_method(data, index_map, "transform")
 
-    def inverse_transform(self, data: np.ndarray, index_map: Dict[str, int]):
+    def inverse_transform(
+        self, data: Union[np.ndarray, SparseData], index_map: Dict[str, int]
+    ):
         """Inversely normalize the data.
 
         Parameters
         ----------
-        data: numpy.ndarray
-            Data to transform.
+        data: numpy.ndarray or SparseData
+            Data to transform, in place.
         index_map: dict
             Map from feature name to index in the normalizer's given axis.
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or SparseData
             The inversely normalized data.
 
         """
@@ -0,0 +1,215 @@
+"""Sparse storage of vectorized data."""
+
+from __future__ import annotations
+
+from typing import List, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+
+class SparseData:
+    """Sparse storage of vectorized data, whose missing values are null.
+
+    The data is stored as a CSR matrix over the flattened non-time axes, with one
+    row per combination of their indices, in C order, and one column per index
+    of the time axis, the last axis. Only the non-null values are stored, so an
+    explicitly stored zero is a zero, and anything not stored is null.
+
+    Attributes
+    ----------
+    matrix: scipy.sparse.csr_matrix
+        The non-null values, of shape (# of rows, # of timesteps).
+    shape: tuple
+        Shape of the data.
+
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, shape: Tuple[int, ...]) -> None:
+        """Init."""
+        if len(shape) < 2:
+            raise ValueError("Sparse data must have at least 2 axes.")
+
+        if matrix.shape != (int(np.prod(shape[:-1])), shape[-1]):
+            raise ValueError(
+                f"Matrix of shape {matrix.shape} does not match the shape {shape}."
+            )
+
+        self.matrix = matrix
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        values: np.ndarray,
+        shape: Tuple[int, ...],
+    ) -> SparseData:
+        """Create sparse data from the coordinates of its non-null values.
+
+        Parameters
+        ----------
+        rows: numpy.ndarray
+            Row, i.e., flattened non-time index, of each value.
+        cols: numpy.ndarray
+            Column, i.e., timestep, of each value.
+        values: numpy.ndarray
+            The non-null values, with no duplicate coordinates.
+        shape: tuple
+            Shape of the data.
+
+        Returns
+        -------
+        SparseData
+            The sparse data.
+
+        """
+        n_rows = int(np.prod(shape[:-1]))
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        matrix = sparse.csr_matrix(
+            (values[order], cols[order], indptr), shape=(n_rows, shape[-1])
+        )
+
+        return cls(matrix, shape)
+
+    @classmethod
+    def from_dense(cls, data: np.ndarray) -> SparseData:
+        """Create sparse data from a dense array, storing its non-null values.
+
+        Parameters
+        ----------
+        data: numpy.ndarray
+            Dense data, with at least 2 axes.
+
+        Returns
+        -------
+        SparseData
+            The sparse data.
+
+        """
+        if data.ndim < 2:
+            raise ValueError("Sparse data must have at least 2 axes.")
+
+        flat = data.reshape(-1, data.shape[-1])
+        rows, cols = np.nonzero(~np.isnan(flat))
+
+        return cls.from_coordinates(rows, cols, flat[rows, cols], data.shape)
+
+    @property
+    def ndim(self) -> int:
+        """Get the number of axes.
+
+        Returns
+        -------
+        int
+            Number of axes.
+
+        """
+        return len(self.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Get the data type of the values.
+
+        Returns
+        -------
+        numpy.dtype
+            Data type.
+
+        """
+        return self.matrix.dtype
+
+    @property
+    def values(self) -> np.ndarray:
+        """Get the stored, non-null values, which can be modified in place.
+
+        Returns
+        -------
+        numpy.ndarray
+            The stored values.
+
+        """
+        return self.matrix.data
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory used by the stored values and their coordinates.
+
+        Returns
+        -------
+        int
+            Number of bytes.
+
+        """
+        return (
+            self.matrix.data.nbytes
+            + self.matrix.indices.nbytes
+            + self.matrix.indptr.nbytes
+        )
+
+    def index_codes(self, axis: int) -> np.ndarray:
+        """Get the index along an axis of each stored value.
+
+        Parameters
+        ----------
+        axis: int
+            The axis.
+
+        Returns
+        -------
+        numpy.ndarray
+            Index of each stored value along the axis.
+
+        """
+        if axis == self.ndim - 1:
+            return self.matrix.indices
+
+        rows = np.repeat(np.arange(self.matrix.shape[0]), np.diff(self.matrix.indptr))
+        stride = int(np.prod(self.shape[axis + 1 : -1]))  # noqa: E203
+        return (rows // stride) % self.shape[axis]
+
+    def take(self, indices: Union[List[int], np.ndarray], axis: int) -> SparseData:
+        """Take indices along an axis.
+
+        Parameters
+        ----------
+        indices: list of int or numpy.ndarray
+            Indices to take along the axis.
+        axis: int
+            The axis.
+
+        Returns
+        -------
+        SparseData
+            The sparse data with the given indices along the axis.
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        shape = list(self.shape)
+        shape[axis] = len(indices)
+
+        if axis == self.ndim - 1:
+            return SparseData(self.matrix[:, indices], tuple(shape))
+
+        rows = np.arange(self.matrix.shape[0]).reshape(self.shape[:-1])
+        rows = np.take(rows, indices, axis=axis).ravel()
+
+        return SparseData(self.matrix[rows], tuple(shape))
+
+    def toarray(self) -> np.ndarray:
+        """Densify the data, filling the values not stored with nulls.
+
+        Returns
+        -------
+        numpy.ndarray
+            Dense data.
+
+        """
+        dense = np.full(self.matrix.shape, np.nan, dtype=self.dtype)
+        coo = self.matrix.tocoo()
+        dense[coo.row, coo.col] = coo.data
+
+        return dense.reshape(self.shape)
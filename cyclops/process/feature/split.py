@@ -168,7 +168,7 @@ def split_idx_stratified(
 
     # Stratify by label values
     series = pd.Series(stratify_labels)
-    groups = series.groupby(series)
+    groups = series.groupby(series, observed=True)
     stratified_idx = groups.apply(
         lambda group: [
             group.index.values[idx]
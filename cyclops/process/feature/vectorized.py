@@ -4,11 +4,22 @@ from __future__ import annotations
 
 import copy
 import logging
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 
 from cyclops.process.feature.normalize import VectorizedNormalizer
+from cyclops.process.feature.sparse import SparseData
 from cyclops.process.feature.split import split_idx
 from cyclops.process.impute import np_fill_null_num
 from cyclops.utils.common import list_swap
@@ -153,8 +164,8 @@ class Vectorized:  # pylint: disable=too-many-public-methods
 
     Attributes
     ----------
-    data: numpy.ndarray
-        Data.
+    data: numpy.ndarray or SparseData
+        Data, either dense or sparse, where only the non-null values are stored.
     indexes: list of numpy.ndarray
         Names of each index in each dimension. E.g., for an array with shape
         (2, 10, 5), len(indexes) == 3, and len(indexes[0]) = 2.
@@ -169,14 +180,14 @@ class Vectorized:  # pylint: disable=too-many-public-methods
 
     def __init__(  # pylint: disable=too-many-arguments
         self,
-        data: np.ndarray,
+        data: Union[np.ndarray, SparseData],
         indexes: List[Union[List, np.ndarray]],
         axis_names: List[str],
         is_normalized: bool = False,
     ) -> None:
         """Init."""
-        if not isinstance(data, np.ndarray):
-            raise ValueError("Data must be a numpy.ndarray.")
+        if not isinstance(data, (np.ndarray, SparseData)):
+            raise ValueError("Data must be a numpy.ndarray or SparseData.")
 
         if len(indexes) != data.ndim:
             raise ValueError(
@@ -211,7 +222,7 @@ class Vectorized:  # pylint: disable=too-many-public-methods
 
             indexes[i] = index
 
-        self.data: np.ndarray = data
+        self.data: Union[np.ndarray, SparseData] = data
         self.indexes: List[np.ndarray] = indexes
         self.index_maps: List[Dict[str, int]] = [
             {val: i for i, val in enumerate(index)} for index in indexes
@@ -233,17 +244,126 @@ class Vectorized:  # pylint: disable=too-many-public-methods
         """
         return self.data.shape
 
-    def get_data(self) -> np.ndarray:
+    @property
+    def is_sparse(self) -> bool:
+        """Get whether the data is sparse, as an attribute.
+
+        Returns
+        -------
+        bool
+            Whether the data is sparse.
+
+        """
+        return isinstance(self.data, SparseData)
+
+    def get_data(self) -> Union[np.ndarray, SparseData]:
         """Get the vectorized data.
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or SparseData
             The data.
 
         """
         return self.data
 
+    def _copy_with_data(self, data: Union[np.ndarray, SparseData]) -> Vectorized:
+        """Create a Vectorized object with the same indexes and normalizer.
+
+        Parameters
+        ----------
+        data: numpy.ndarray or SparseData
+            Data of the same shape.
+
+        Returns
+        -------
+        Vectorized
+            The new Vectorized object.
+
+        """
+        vec = Vectorized(
+            data,
+            list(self.indexes),
+            list(self.axis_names),
+            is_normalized=self.is_normalized,
+        )
+        if self.normalizer is not None:
+            vec.add_normalizer_direct(copy.deepcopy(self.normalizer))
+
+        return vec
+
+    def to_sparse(self) -> Vectorized:
+        """Get the data with sparse storage, where only non-null values are stored.
+
+        The time axis, whose index is the column of the sparse matrix, must be last.
+
+        Returns
+        -------
+        Vectorized
+            Vectorized object with sparse data.
+
+        """
+        if self.is_sparse:
+            return self
+
+        return self._copy_with_data(SparseData.from_dense(self.data))
+
+    def to_dense(self) -> Vectorized:
+        """Get the data with dense storage, filling the values not stored with nulls.
+
+        Returns
+        -------
+        Vectorized
+            Vectorized object with dense data.
+
+        """
+        if not self.is_sparse:
+            return self
+
+        return self._copy_with_data(self.data.toarray())
+
+    def yield_dense_batches(
+        self, axis: Union[str, int], batch_size: int
+    ) -> Generator[Vectorized, None, None]:
+        """Yield consecutive batches over an axis, with dense data.
+
+        Sparse data is only densified one batch at a time.
+
+        Parameters
+        ----------
+        axis: int or str
+            Axis index or name over which to batch, e.g., the encounters.
+        batch_size: int
+            Number of indices of the axis in each batch.
+
+        Yields
+        ------
+        Vectorized
+            A batch with dense data.
+
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be positive.")
+
+        axis_index = self.get_axis(axis)
+        for start in range(0, self.shape[axis_index], batch_size):
+            indices = np.arange(start, min(start + batch_size, self.shape[axis_index]))
+            yield self.take_with_indices(axis_index, indices).to_dense()
+
+    def _check_dense(self, operation: str) -> None:
+        """Check that the data is dense, for an operation not supporting sparse data.
+
+        Parameters
+        ----------
+        operation: str
+            Name of the operation.
+
+        """
+        if self.is_sparse:
+            raise NotImplementedError(
+                f"Cannot {operation} sparse data. Consider using to_dense first."
+            )
+
     def add_normalizer(
         self,
         axis: Union[str, int],
@@ -370,6 +490,7 @@ class Vectorized:  # pylint: disable=too-many-public-methods
             Processed save path for upstream use.
 
         """
+        self._check_dense("save")
         return save_array(self.data, save_path, file_format=file_format)
 
     def take_with_indices(
@@ -393,7 +514,10 @@ class Vectorized:  # pylint: disable=too-many-public-methods
         axis_index = self.get_axis(axis)
 
         # Index the data accordingly
-        data = take_indices_over_axis(self.data, axis_index, indices)
+        if self.is_sparse:
+            data = self.data.take(indices, axis_index)
+        else:
+            data = take_indices_over_axis(self.data, axis_index, indices)
 
         # Create the corresponding indexes
         new_indexes = list(self.indexes)
@@ -734,6 +858,8 @@ class Vectorized:  # pylint: disable=too-many-public-methods
             Second axis to swap.
 
         """
+        self._check_dense("swap the axes of")
+
         # Process axes
         axis1_index: int = self.get_axis(axis1)
         axis2_index: int = self.get_axis(axis2)
@@ -766,6 +892,7 @@ class Vectorized:  # pylint: disable=too-many-public-methods
             Index name in the axis for which to get the value counts.
 
         """
+        self._check_dense("count the values of")
         axis_index = self.get_axis(axis)
         index_map = self.index_maps[axis_index]
         data = take_indices_over_axis(self.data, axis_index, [index_map[index]])
@@ -812,6 +939,7 @@ class Vectorized:  # pylint: disable=too-many-public-methods
             A tuple of slice objects enabling imputation of only a subset of the data.
 
         """
+        self._check_dense("impute")
         axis_index = self.get_axis(axis)
 
         if index_exp is not None:
@@ -883,6 +1011,7 @@ class Vectorized:  # pylint: disable=too-many-public-methods
             Vectorized object with the concatenated data and indexes.
 
         """
+        self._check_dense("concatenate")
         axis_index = self.get_axis(axis)
         concat_index = np.array(concat_index)
 
@@ -1,7 +1,7 @@
 """Imputation functions."""
 
 import logging
-from typing import Any, Callable, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -221,6 +221,16 @@ IMPUTEFUNCS = {
     LINEAR_INTERP: lambda series, _: series.interpolate(method="linear"),
 }
 
+# Imputation functions applied to all groups at once, taking the series and its
+# groupby, for the functions with a native grouped equivalent.
+GROUPED_IMPUTEFUNCS = {
+    MEAN: lambda series, grouped: series.fillna(grouped.transform("mean")),
+    MEDIAN: lambda series, grouped: series.fillna(grouped.transform("median")),
+    FFILL: lambda _, grouped: grouped.ffill(),
+    BFILL: lambda _, grouped: grouped.bfill(),
+    FFILL_BFILL: lambda _, grouped: grouped.ffill().groupby(grouped.ngroup()).bfill(),
+}
+
 
 class SeriesImputer:
     """Imputation of a Pandas Series.
@@ -264,6 +274,7 @@ class SeriesImputer:
             )
 
         self.imputefunc = self._process_imputefunc(imputefunc)
+        self.imputefunc_name = imputefunc if isinstance(imputefunc, str) else None
         self.allow_nulls_returned = allow_nulls_returned
 
         if limit_area is not None:
@@ -406,6 +417,44 @@ class SeriesImputer:
 
         return series, null_percent
 
+    def impute_groups(self, series: pd.Series, by: List[pd.Series]) -> pd.Series:
+        """Impute each group of a series separately.
+
+        Imputation functions with a native grouped equivalent, e.g., MEAN or
+        FFILL, impute all groups at once. Others are applied group by group.
+
+        Parameters
+        ----------
+        series: pandas.Series
+            The series to impute.
+        by: list of pandas.Series
+            The keys by which to group the series, aligned with it.
+
+        Returns
+        -------
+        pandas.Series
+            The imputed series, in the original order.
+
+        """
+        if self.imputefunc is None:
+            return series
+
+        if self.using_drop:
+            raise ValueError("Cannot impute groups using the DROP strategy.")
+
+        grouped = series.groupby(by, sort=False, observed=True)
+        if self.limit_area is None and self.imputefunc_name in GROUPED_IMPUTEFUNCS:
+            series = GROUPED_IMPUTEFUNCS[self.imputefunc_name](series, grouped)
+        else:
+            series = grouped.transform(lambda group: self(group.copy())[0])
+
+        if not self.allow_nulls_returned and series.isnull().values.any():
+            raise ValueError(
+                "Nulls returned from imputation function when not allowed."
+            )
+
+        return series
+
 
 class TabularImputer:  # pylint: disable=too-few-public-methods
     """Imputation of tabular data.
@@ -519,7 +568,9 @@ class AggregatedImputer:
                         f"extra_imputer SeriesImputer limit_area='{EXTRA}'."
                     )
 
-    def intra(self, group: pd.DataFrame) -> pd.DataFrame:
+    def intra(
+        self, group: pd.DataFrame, by: Optional[List[str]] = None
+    ) -> pd.DataFrame:
         """Perform intra-imputation.
 
         Intra imputation describes the imputation occurring within a single timestep,
@@ -527,13 +578,16 @@ class AggregatedImputer:
 
         Parameters
         ----------
-        group: pandas.Series
+        group: pandas.DataFrame
             The group of non-aggregated data being imputed, which will subsequently
             be aggregated.
+        by: list of str, optional
+            Columns identifying the timesteps, or buckets. If given, the data holds
+            many timesteps and each is imputed separately.
 
         Returns
         -------
-        pandas.Series
+        pandas.DataFrame
             The imputed group.
 
         """
@@ -541,7 +595,16 @@ class AggregatedImputer:
             return group
 
         has_columns(group, list(self.intra_imputer.imputers.keys()), raise_error=True)
-        return self.intra_imputer(group)
+        if by is None:
+            return self.intra_imputer(group)[0]
+
+        keys = [group[col] for col in by]
+        return group.assign(
+            **{
+                col: imputer.impute_groups(group[col], keys)
+                for col, imputer in self.intra_imputer.imputers.items()
+            }
+        )
 
     def inter(self, group: pd.DataFrame) -> pd.DataFrame:
         """Perform interpolation imputation.
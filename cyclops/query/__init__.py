@@ -1 +1,3 @@
 """Queries package."""
+
+from cyclops.query.interface import gather
@@ -3,6 +3,7 @@
 import logging
 from typing import Callable, Dict, Optional, Union
 
+import pandas as pd
 from hydra import compose, initialize
 from omegaconf import OmegaConf
 from sqlalchemy.sql.selectable import Subquery
@@ -61,6 +62,77 @@ class DatasetQuerier:
         self._table_map = table_map
         self._column_map = column_map
 
+    @property
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        """Get the hit/miss statistics of the query result cache.
+
+        Returns
+        -------
+        dict, optional
+            Cache statistics, or None if no cache directory is configured.
+
+        """
+        if self._db.cache is None:
+            return None
+
+        return self._db.cache.stats.to_dict()
+
+    def clear_cache(self) -> None:
+        """Remove all results from the query result cache, if configured."""
+        if self._db.cache is not None:
+            self._db.cache.clear()
+
+    def drop_materialized(self) -> None:
+        """Drop the tables materialized by queries of this querier.
+
+        See cyclops.query.ops.Materialize and
+        cyclops.query.interface.QueryInterface.materialize.
+
+        """
+        self._db.drop_materialized()
+
+    def upload_table(
+        self,
+        data: pd.DataFrame,
+        name: str,
+        temporary: bool = True,
+        batch_size: int = 10000,
+    ) -> Subquery:
+        """Upload a DataFrame, e.g., a cohort, into a table to join queries against.
+
+        See cyclops.query.orm.Database.upload_table.
+
+        Parameters
+        ----------
+        data
+            Data to upload.
+        name
+            Name of the table.
+        temporary
+            Whether to upload into a temporary table, loaded on each connection
+            running a query using it, rather than a table created once.
+        batch_size
+            Number of rows inserted at a time, when not using COPY.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Subquery selecting from the table, e.g., to use with
+            cyclops.query.ops.Join.
+
+        """
+        return self._db.upload_table(
+            data, name, temporary=temporary, batch_size=batch_size
+        )
+
+    def __enter__(self) -> "DatasetQuerier":
+        """Enter the querier's context, dropping materialized tables on exit."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Exit the querier's context, dropping materialized tables."""
+        self.drop_materialized()
+
     @table_params_to_type(Subquery)
     def get_interface(
         self,
@@ -0,0 +1,331 @@
+"""Persistent, on-disk cache of query results."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Generator, Optional, Union
+
+import pandas as pd
+from sqlalchemy import Table
+from sqlalchemy.engine.base import Engine
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.selectable import Select
+
+from cyclops.utils.file import join
+from cyclops.utils.log import setup_logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
+# Logging.
+LOGGER = logging.getLogger(__name__)
+setup_logging(print_level="INFO", logger=LOGGER)
+
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+
+
+@contextmanager
+def _file_lock(path: str) -> Generator[None, None, None]:
+    """Hold an exclusive lock on a file, blocking other processes locking it.
+
+    Parameters
+    ----------
+    path
+        Path of the lock file, created if it does not exist.
+
+    """
+    with open(path, "a+b") as file_descriptor:
+        if fcntl is not None:
+            fcntl.flock(file_descriptor.fileno(), fcntl.LOCK_EX)
+        else:
+            file_descriptor.seek(0)
+            msvcrt.locking(file_descriptor.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file_descriptor.fileno(), fcntl.LOCK_UN)
+            else:
+                file_descriptor.seek(0)
+                msvcrt.locking(file_descriptor.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@dataclass
+class CacheStats:
+    """Query cache statistics.
+
+    Parameters
+    ----------
+    hits: int
+        Number of lookups which found a valid cached result.
+    misses: int
+        Number of lookups which found no valid cached result.
+    expirations: int
+        Number of cached results invalidated for being older than the TTL.
+    evictions: int
+        Number of cached results evicted to respect the maximum cache size.
+
+    """
+
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """Get the statistics as a dictionary.
+
+        Returns
+        -------
+        dict
+            The statistics.
+
+        """
+        return asdict(self)
+
+
+def get_cache_key(query: Union[Select, str], engine: Engine, **run_args: Any) -> str:
+    """Get the cache key of a query.
+
+    The key combines the compiled SQL text, the bound parameters, the
+    identity of the database, the data of any uploaded tables, see
+    cyclops.query.orm.Database.upload_table, and any arguments affecting
+    the result.
+
+    Parameters
+    ----------
+    query
+        Query to run.
+    engine
+        Engine used to run the query.
+    **run_args
+        Other arguments which affect the query result, e.g., an index column.
+
+    Returns
+    -------
+    str
+        Cache key.
+
+    """
+    tables = {}
+    if isinstance(query, str):
+        sql, params = query, {}
+    else:
+        compiled = query.compile(dialect=engine.dialect)
+        sql, params = str(compiled), compiled.params
+        # Uploaded tables are identified by their data, not only their name.
+        for elem in visitors.iterate(query):
+            if isinstance(elem, Table) and "digest" in elem.info:
+                tables[str(elem)] = elem.info["digest"]
+
+    components = {
+        "database": engine.url.render_as_string(hide_password=True),
+        "sql": sql,
+        "params": params,
+        "run_args": run_args,
+    }
+    if tables:
+        components["tables"] = tables
+    serialized = json.dumps(components, sort_keys=True, default=repr)
+
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """Cache storing query results as Parquet files in a directory.
+
+    An index in the directory tracks the size, creation time and last access
+    time of each result, allowing for TTL invalidation and size-bounded,
+    least recently used (LRU) eviction. The cache persists across processes,
+    and can be shared by concurrent processes, as the index is only read and
+    updated while holding a lock on a file in the directory, and results are
+    written atomically.
+
+    Attributes
+    ----------
+    cache_dir: str
+        Directory in which results are cached.
+    max_bytes: int, optional
+        Maximum total size of the cached results. If exceeded, the least
+        recently used results are evicted.
+    ttl: float, optional
+        Time to live of a cached result, in seconds.
+    stats: cyclops.query.cache.CacheStats
+        Hit/miss statistics of this cache object.
+
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Initialize.
+
+        Parameters
+        ----------
+        cache_dir
+            Directory in which results are cached. Created if it does not exist.
+        max_bytes
+            Maximum total size of the cached results.
+        ttl
+            Time to live of a cached result, in seconds.
+
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked(self) -> Generator[None, None, None]:
+        """Lock the cache index against other threads and processes."""
+        with self._lock, _file_lock(join(self.cache_dir, LOCK_FILE)):
+            yield
+
+    def _path(self, key: str) -> str:
+        """Get the path of a cached result."""
+        return join(self.cache_dir, key + ".parquet")
+
+    def _load_index(self) -> Dict[str, Dict[str, float]]:
+        """Load the cache index, dropping entries whose files are missing."""
+        index_path = join(self.cache_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as file_descriptor:
+                index = json.load(file_descriptor)
+        except (OSError, ValueError):
+            LOGGER.warning("Query cache index is corrupt, resetting the cache.")
+            return {}
+
+        return {
+            key: val for key, val in index.items() if os.path.exists(self._path(key))
+        }
+
+    def _save_index(self, index: Dict[str, Dict[str, float]]) -> None:
+        """Save the cache index atomically."""
+        index_path = join(self.cache_dir, INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file_descriptor:
+            json.dump(index, file_descriptor)
+        os.replace(tmp_path, index_path)
+
+    def _remove(self, index: Dict[str, Dict[str, float]], key: str) -> None:
+        """Remove a cached result."""
+        index.pop(key, None)
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def _is_expired(self, entry: Dict[str, float], now: float) -> bool:
+        """Check whether a cached result is older than the TTL."""
+        return self.ttl is not None and now - entry["created"] > self.ttl
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Get a cached result.
+
+        Parameters
+        ----------
+        key
+            Cache key.
+
+        Returns
+        -------
+        pandas.DataFrame, optional
+            The cached result, or None if there is no valid cached result.
+
+        """
+        with self._locked():
+            index = self._load_index()
+            now = time.time()
+            entry = index.get(key)
+            if entry is not None and self._is_expired(entry, now):
+                self._remove(index, key)
+                self._save_index(index)
+                self.stats.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            data = pd.read_parquet(self._path(key))
+            entry["accessed"] = now
+            self._save_index(index)
+            self.stats.hits += 1
+
+        return data
+
+    def put(self, key: str, data: pd.DataFrame) -> None:
+        """Cache a result, evicting others if the cache is too large.
+
+        Parameters
+        ----------
+        key
+            Cache key.
+        data
+            Result to cache.
+
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            data.to_parquet(tmp_path)
+        except (ValueError, TypeError, ImportError) as error:
+            LOGGER.warning("Could not cache the query result: %s", error)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._locked():
+            os.replace(tmp_path, path)
+            now = time.time()
+            index = self._load_index()
+            index[key] = {
+                "size": os.path.getsize(path),
+                "created": now,
+                "accessed": now,
+            }
+
+            for old_key in [
+                k for k, val in index.items() if self._is_expired(val, now)
+            ]:
+                self._remove(index, old_key)
+                self.stats.expirations += 1
+
+            if self.max_bytes is not None:
+                # Evict least recently used results, but always keep the new one.
+                lru_keys = sorted(index, key=lambda k: index[k]["accessed"])
+                total = sum(val["size"] for val in index.values())
+                for old_key in lru_keys:
+                    if total <= self.max_bytes:
+                        break
+                    if old_key == key:
+                        continue
+                    total -= index[old_key]["size"]
+                    self._remove(index, old_key)
+                    self.stats.evictions += 1
+
+            self._save_index(index)
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._locked():
+            index = self._load_index()
+            for key in list(index):
+                self._remove(index, key)
+            self._save_index(index)
@@ -0,0 +1,188 @@
+"""Compact data types for query results."""
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import types
+
+from cyclops.utils.log import setup_logging
+
+# Logging.
+LOGGER = logging.getLogger(__name__)
+setup_logging(print_level="INFO", logger=LOGGER)
+
+
+@dataclass
+class DtypeOptions:
+    """Options for compacting the data types of query results.
+
+    Parameters
+    ----------
+    category_max_ratio: float, optional
+        Text columns with at most this ratio of unique values to rows become
+        categorical. If None, text columns are left as objects.
+    downcast_ints: bool
+        Whether to store integers, e.g., ids, using the narrowest width
+        holding their values, and nullable integers if there are nulls.
+    min_int_bits: int
+        Narrowest width, in bits, to which integers are downcast. Defaults to
+        32, as narrower integers overflow easily in later arithmetic.
+    float32: bool
+        Whether to store floating point values as float32.
+
+    """
+
+    category_max_ratio: Optional[float] = 0.5
+    downcast_ints: bool = True
+    min_int_bits: int = 32
+    float32: bool = False
+
+
+def _narrowest_int_dtype(series: pd.Series, nullable: bool, min_bits: int = 32) -> str:
+    """Get the narrowest integer dtype, of at least min_bits, holding a series."""
+    min_value, max_value = series.min(), series.max()
+    for dtype in ("int8", "int16", "int32", "int64"):
+        info = np.iinfo(dtype)
+        if info.bits < min_bits:
+            continue
+        if info.min <= min_value and max_value <= info.max:
+            return dtype.capitalize() if nullable else dtype
+
+    return "Int64" if nullable else "int64"
+
+
+def _is_integral(series: pd.Series) -> bool:
+    """Check whether the non-null values of a series are all integers."""
+    values = series.dropna()
+    if pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return True
+    if pd.api.types.is_float_dtype(values):
+        return bool(np.all(np.mod(values, 1) == 0))
+
+    return bool(values.map(lambda value: isinstance(value, (int, np.integer))).all())
+
+
+def _compact_column(
+    series: pd.Series,
+    sql_type: Optional[types.TypeEngine],
+    options: DtypeOptions,
+) -> pd.Series:
+    """Compact the data type of a column, given its SQL type if known."""
+    if series.empty or series.isna().all():
+        return series
+    dtype = series.dtype
+
+    if isinstance(sql_type, types.Boolean) or pd.api.types.is_bool_dtype(dtype):
+        return series.astype("boolean") if series.isna().any() else series.astype(bool)
+
+    if isinstance(sql_type, types.Integer) or pd.api.types.is_integer_dtype(dtype):
+        if not options.downcast_ints or not _is_integral(series):
+            return series
+        nullable = bool(series.isna().any())
+        return series.astype(
+            _narrowest_int_dtype(series.dropna(), nullable, options.min_int_bits)
+        )
+
+    if isinstance(sql_type, (types.Float, types.Numeric)) or (
+        pd.api.types.is_float_dtype(dtype)
+    ):
+        if dtype == object:
+            series = series.map(
+                lambda value: float(value) if isinstance(value, Decimal) else value
+            )
+        series = pd.to_numeric(series, errors="ignore")
+        if options.float32 and pd.api.types.is_float_dtype(series.dtype):
+            return series.astype("float32")
+        return series
+
+    if isinstance(sql_type, types.DateTime) or pd.api.types.is_datetime64_any_dtype(
+        dtype
+    ):
+        if dtype == object:
+            return pd.to_datetime(series, utc=bool(getattr(sql_type, "timezone", 0)))
+        return series
+
+    is_text = isinstance(sql_type, (types.String, types.Enum)) or (
+        sql_type is None and dtype == object and series.dropna().map(type).eq(str).all()
+    )
+    if is_text and options.category_max_ratio is not None:
+        if series.nunique() <= options.category_max_ratio * len(series):
+            return series.astype("category")
+
+    return series
+
+
+def compact_dtypes(
+    data: pd.DataFrame,
+    sql_types: Optional[Dict[str, types.TypeEngine]] = None,
+    options: Optional[DtypeOptions] = None,
+) -> pd.DataFrame:
+    """Compact the data types of a query result, to reduce its memory use.
+
+    Text columns with few unique values become categorical, integers are
+    downcast to the narrowest width, or nullable integers if there are nulls,
+    decimals become floats, float32 if requested, and timestamps become
+    datetime64. The SQL types of the columns, if given, decide the conversions,
+    otherwise the values do.
+
+    Parameters
+    ----------
+    data
+        Query result.
+    sql_types
+        SQL types of the columns of the query, by column name.
+    options
+        Compaction options.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Query result with compact data types.
+
+    """
+    if sql_types is None:
+        sql_types = {}
+    if options is None:
+        options = DtypeOptions()
+
+    compacted = {
+        col: _compact_column(data[col], sql_types.get(col), options)
+        for col in data.columns
+    }
+
+    return pd.DataFrame(compacted, index=data.index)
+
+
+def memory_summary(data: pd.DataFrame) -> pd.DataFrame:
+    """Summarize the memory use of a DataFrame, per column.
+
+    Parameters
+    ----------
+    data
+        Data to summarize.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The dtype, memory use in bytes and share of the total memory use of
+        each column, including the index, with a final 'total' row.
+
+    """
+    memory = data.memory_usage(index=True, deep=True)
+    dtypes = data.dtypes.astype(str)
+    summary = pd.DataFrame(
+        {
+            "dtype": [str(data.index.dtype)] + dtypes.tolist(),
+            "memory_bytes": memory.values,
+        },
+        index=["Index"] + list(data.columns),
+    )
+    total = summary["memory_bytes"].sum()
+    summary["share"] = summary["memory_bytes"] / total if total else 0.0
+    summary.loc["total"] = ["", total, 1.0]
+
+    return summary
@@ -1,15 +1,29 @@
 """A query interface class to wrap database objects and queries."""
 
+import asyncio
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Callable, Dict, Literal, Optional, Union
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+from typing import Any, Callable, Dict, Generator, List, Literal, Optional, Union
 
 import dask.dataframe as dd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import and_, func, or_, select, true
+from sqlalchemy.sql.selectable import Subquery
 
+from cyclops.query.dtypes import memory_summary
 from cyclops.query.orm import Database
-from cyclops.query.util import TableTypes
-from cyclops.utils.file import save_dataframe
+from cyclops.query.util import TableTypes, _to_subquery, get_column
+from cyclops.utils.file import join, process_dir_save_path, save_dataframe
 from cyclops.utils.log import setup_logging
 
 # Logging.
@@ -17,6 +31,234 @@ LOGGER = logging.getLogger(__name__)
 setup_logging(print_level="INFO", logger=LOGGER)
 
 
+MANIFEST_FILE = "manifest.json"
+
+
+def _load_manifest(dir_path: str) -> Optional[Dict]:
+    """Load the manifest of a partitioned dataset, if it exists."""
+    path = join(dir_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file_descriptor:
+        return json.load(file_descriptor)
+
+
+def _save_manifest(dir_path: str, manifest: Dict) -> None:
+    """Save the manifest of a partitioned dataset atomically."""
+    path = join(dir_path, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as file_descriptor:
+        json.dump(manifest, file_descriptor, indent=2, default=str)
+    os.replace(path + ".tmp", path)
+
+
+def _encode_watermark(value: Any) -> Dict:
+    """Encode a watermark value such that it can be stored as JSON."""
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, (int, np.integer)):
+        return {"type": "int", "value": int(value)}
+    if isinstance(value, (float, np.floating)):
+        return {"type": "float", "value": float(value)}
+
+    return {"type": "str", "value": str(value)}
+
+
+def _decode_watermark(encoded: Dict) -> Any:
+    """Decode a watermark value stored as JSON."""
+    decoders = {
+        "datetime": datetime.fromisoformat,
+        "date": date.fromisoformat,
+        "int": int,
+        "float": float,
+        "str": str,
+    }
+
+    return decoders[encoded["type"]](encoded["value"])
+
+
+def compact_partitions(dir_path: str, target_rows: int) -> str:
+    """Compact the small partitions of a partitioned Parquet dataset.
+
+    Consecutive partitions listed in the dataset manifest are merged into
+    partitions of at most target_rows rows, where possible. Partitions are
+    only merged with their neighbours, so ranges of partition values and
+    watermarks remain in order, and the range boundaries between merged
+    partitions are removed from the manifest.
+
+    Merged partitions are written to new files, and the manifest updated
+    atomically before the merged files are removed, so the dataset stays
+    readable through its manifest if interrupted. The manifest, rather than
+    file names, gives the order of the partitions.
+
+    Parameters
+    ----------
+    dir_path
+        Directory of the dataset, as saved by QueryInterface.save_incremental
+        or QueryInterface.save_partitioned.
+    target_rows
+        Maximum number of rows of a merged partition.
+
+    Returns
+    -------
+    str
+        Directory path for upstream use.
+
+    """
+    manifest = _load_manifest(dir_path)
+    if manifest is None:
+        raise ValueError(f"No dataset manifest found in {dir_path}.")
+
+    # Greedily group consecutive partitions.
+    groups: List[List[Dict]] = []
+    for partition in manifest["partitions"]:
+        if groups and (
+            sum(part["num_rows"] for part in groups[-1]) + partition["num_rows"]
+            <= target_rows
+        ):
+            groups[-1].append(partition)
+        else:
+            groups.append([partition])
+
+    # Merged partitions are written to new files, numbered after the last
+    # file, so the files listed in the manifest are never modified.
+    part_index = 1 + max(
+        (int(part["file"][5:-8]) for part in manifest["partitions"]), default=-1
+    )
+    partitions = []
+    for group in groups:
+        if len(group) == 1:
+            partitions.append(group[0])
+            continue
+
+        file_name = f"part_{part_index:04d}.parquet"
+        part_index += 1
+        path = join(dir_path, file_name)
+        table = pa.concat_tables(
+            [pq.read_table(join(dir_path, part["file"])) for part in group]
+        )
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        merged = {
+            "file": file_name,
+            "num_rows": sum(part["num_rows"] for part in group),
+        }
+        if "watermark_to" in group[0]:
+            merged["watermark_from"] = group[0]["watermark_from"]
+            merged["watermark_to"] = group[-1]["watermark_to"]
+        partitions.append(merged)
+
+    # Only keep the range boundaries between partitions which were not merged.
+    boundaries = manifest.get("boundaries")
+    if boundaries is not None:
+        if len(boundaries) == len(manifest["partitions"]) - 1:
+            ends = np.cumsum([len(group) for group in groups])[:-1] - 1
+            manifest["boundaries"] = [boundaries[end] for end in ends]
+        else:
+            del manifest["boundaries"]
+
+    manifest["partitions"] = partitions
+    _save_manifest(dir_path, manifest)
+
+    # Remove merged files only once the manifest no longer references them.
+    for group in groups:
+        if len(group) > 1:
+            for part in group:
+                os.remove(join(dir_path, part["file"]))
+    LOGGER.info(
+        "Compacted %d partitions into %d in %s",
+        sum(len(group) for group in groups),
+        len(groups),
+        dir_path,
+    )
+
+    return dir_path
+
+
+def _range_boundaries(min_value: Any, max_value: Any, n_partitions: int) -> List:
+    """Get boundaries splitting a range of values into equal-width partitions.
+
+    Parameters
+    ----------
+    min_value
+        Minimum value.
+    max_value
+        Maximum value.
+    n_partitions
+        Number of partitions.
+
+    Returns
+    -------
+    list
+        The inner boundaries, in increasing order and without duplicates.
+
+    """
+    if min_value is None or max_value is None:
+        return []
+
+    # Values of, e.g., NUMERIC columns on PostgreSQL are Decimals.
+    if isinstance(min_value, Decimal) or isinstance(max_value, Decimal):
+        is_integral = all(
+            Decimal(value) == Decimal(value).to_integral_value()
+            for value in (min_value, max_value)
+        )
+        min_value, max_value = (
+            (int(min_value), int(max_value))
+            if is_integral
+            else (float(min_value), float(max_value))
+        )
+
+    if isinstance(min_value, (datetime, date)):
+        boundaries = pd.date_range(
+            min_value, max_value, periods=n_partitions + 1
+        ).to_pydatetime()[1:-1]
+        if not isinstance(min_value, datetime):
+            boundaries = [boundary.date() for boundary in boundaries]
+    elif isinstance(min_value, (int, float, np.number)):
+        boundaries = np.linspace(min_value, max_value, n_partitions + 1)[1:-1]
+        if isinstance(min_value, (int, np.integer)):
+            boundaries = np.ceil(boundaries).astype(int)
+        boundaries = boundaries.tolist()
+    else:
+        raise ValueError(
+            "Range partitioning requires a numeric or datetime partition column, "
+            "use quantile partitioning instead."
+        )
+
+    return sorted(set(boundaries) - {min_value})
+
+
+def _partition_conditions(column: Any, boundaries: List) -> List:
+    """Get the conditions selecting each partition defined by boundaries.
+
+    The first partition also contains rows where the column is null, such that
+    the partitions cover all rows.
+
+    Parameters
+    ----------
+    column
+        Partition column.
+    boundaries
+        Inner partition boundaries, in increasing order.
+
+    Returns
+    -------
+    list
+        Condition for each partition.
+
+    """
+    if not boundaries:
+        return [true()]
+
+    conditions = [or_(column < boundaries[0], column.is_(None))]
+    for lower, upper in zip(boundaries[:-1], boundaries[1:]):
+        conditions.append(and_(column >= lower, column < upper))
+    conditions.append(column >= boundaries[-1])
+
+    return conditions
+
+
 @dataclass
 class QueryInterface:
     """An interface dataclass to wrap queries, and run them.
@@ -29,6 +271,9 @@ class QueryInterface:
         The query.
     data: pandas.DataFrame or dask.DataFrame
         Data returned from executing the query, as Pandas DataFrame.
+    timings: dict
+        Time in seconds spent on each step of the last query run, e.g.,
+        'compile', 'execute', 'fetch' and 'build'.
     _run_args: dict
         Private dictionary attribute to keep track of arguments
         passed to run() method.
@@ -38,6 +283,7 @@ class QueryInterface:
     database: Database
     query: TableTypes
     data: Optional[Union[pd.DataFrame, dd.DataFrame]] = None
+    timings: Dict[str, float] = field(default_factory=dict)
     _run_args: Dict = field(default_factory=dict)
 
     def run(
@@ -70,18 +316,418 @@ class QueryInterface:
         # Only re-run when new run arguments are given.
         if self.data is None or not self._run_args == locals():
             self._run_args = locals()
+            self.timings = {}
             self.data = self.database.run_query(
                 self.query,
                 limit=limit,
                 backend=backend,
                 index_col=index_col,
                 n_partitions=n_partitions,
+                timings=self.timings,
             )
 
         return self.data
 
+    async def arun(
+        self,
+        limit: Optional[int] = None,
+        backend: Literal["pandas", "dask"] = "pandas",
+        index_col: Optional[str] = None,
+        n_partitions: Optional[int] = None,
+    ) -> Union[pd.DataFrame, dd.DataFrame]:
+        """Run the query asynchronously, and fetch data.
+
+        The query runs in a worker thread, on its own pooled connection, so
+        other queries can run concurrently. See cyclops.query.gather.
+
+        Parameters
+        ----------
+        limit
+            No. of rows to limit the query return.
+        backend
+            Backend computing framework to use, Pandas or Dask.
+        index_col
+            Column which becomes the index, and defines the partitioning.
+            Should be a indexed column in the SQL server, and any orderable type.
+        n_partitions
+            Number of partitions. Check dask documentation for additional details.
+
+        Returns
+        -------
+        pandas.DataFrame or dask.DataFrame
+            Query result dataframe.
+
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            partial(
+                self.run,
+                limit=limit,
+                backend=backend,
+                index_col=index_col,
+                n_partitions=n_partitions,
+            ),
+        )
+
+    def explain(self, analyze: bool = False) -> pd.DataFrame:
+        """Get the plan of the query, as estimated by the database.
+
+        Parameters
+        ----------
+        analyze
+            Whether to also run the query and report the actual row counts and
+            times. Only supported for PostgreSQL.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The plan, with one row per plan node, including estimated rows and
+            cost. See cyclops.query.orm.Database.explain.
+
+        """
+        return self.database.explain(self.query, analyze=analyze)
+
+    def memory_summary(self) -> pd.DataFrame:
+        """Summarize the memory use of the data returned by the query, per column.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The dtype, memory use in bytes and share of the total memory use of
+            each column. See cyclops.query.dtypes.memory_summary.
+
+        """
+        if self.data is None:
+            raise ValueError("Query has not been run, run it first!")
+        if isinstance(self.data, dd.DataFrame):
+            raise ValueError("Memory summary is only supported with Pandas!")
+
+        return memory_summary(self.data)
+
+    def materialize(self, name: Optional[str] = None) -> Subquery:
+        """Run the query once into a table, which other queries can then use.
+
+        Parameters
+        ----------
+        name
+            Name of the table. Defaults to a name derived from the query.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Subquery selecting from the table, e.g., to join against.
+            See cyclops.query.orm.Database.materialize.
+
+        """
+        return self.database.materialize(self.query, name=name)
+
+    def iter_batches(
+        self, batch_size: int, group_col: Optional[str] = None
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Run the query, yielding the data in batches.
+
+        Rows are streamed from the database, so memory use is bounded by the
+        batch size rather than the size of the query result.
+
+        Parameters
+        ----------
+        batch_size
+            Maximum number of rows fetched from the database at a time.
+        group_col
+            If specified, the results are ordered by this column and rows sharing
+            a value are never split across batches. A batch may then exceed
+            batch_size if a single group is larger than it.
+
+        Yields
+        ------
+        pandas.DataFrame
+            A batch of the query result.
+
+        """
+        if group_col is None:
+            yield from self.database.yield_query_batches(self.query, batch_size)
+            return
+
+        table = _to_subquery(self.query)
+        query = select(table).order_by(get_column(table, group_col))
+
+        # Hold back the pieces of the last group of each batch, since it may
+        # continue in the next batch, and concatenate them once it ends.
+        carry: List[pd.DataFrame] = []
+        for batch in self.database.yield_query_batches(query, batch_size):
+            if batch.empty:
+                continue
+            last_value = batch[group_col].iloc[-1]
+            is_last_group = batch[group_col] == last_value
+            if not is_last_group.all():
+                yield pd.concat(carry + [batch[~is_last_group]], ignore_index=True)
+                carry = []
+            elif carry and carry[0][group_col].iloc[0] != last_value:
+                yield pd.concat(carry, ignore_index=True)
+                carry = []
+            carry.append(batch[is_last_group])
+
+        if carry:
+            yield pd.concat(carry, ignore_index=True)
+
+    def save_in_grouped_batches(
+        self,
+        dir_path: str,
+        group_col: str,
+        batch_size: int,
+        file_format: Literal["parquet", "csv"] = "parquet",
+    ) -> str:
+        """Save the query in batches, keeping groups within the same batch.
+
+        The batches are saved as batch_0000, batch_0001, etc., such that they
+        can be loaded with cyclops.utils.file.yield_dataframes.
+
+        Parameters
+        ----------
+        dir_path
+            Directory in which to save the batches.
+        group_col
+            Column by which to group, e.g., an encounter ID column.
+        batch_size
+            Maximum number of rows fetched from the database at a time.
+        file_format
+            File format of the batch files.
+
+        Returns
+        -------
+        str
+            Processed directory path for upstream use.
+
+        """
+        dir_path = process_dir_save_path(dir_path)
+        n_batches = 0
+        for batch in self.iter_batches(batch_size, group_col=group_col):
+            save_dataframe(
+                batch,
+                join(dir_path, "batch_" + f"{n_batches:04d}"),
+                file_format=file_format,
+                log=False,
+            )
+            n_batches += 1
+        LOGGER.info("Saved query in %d batches to %s", n_batches, dir_path)
+
+        return dir_path
+
+    def _partition_boundaries(
+        self,
+        partition_col: str,
+        n_partitions: int,
+        method: Literal["range", "quantile"],
+    ) -> List:
+        """Compute partition boundaries with a single query.
+
+        Parameters
+        ----------
+        partition_col
+            Column by which to partition.
+        n_partitions
+            Number of partitions.
+        method
+            Equal-width partitions between the minimum and maximum values with
+            'range', or partitions with roughly equal numbers of rows with
+            'quantile'.
+
+        Returns
+        -------
+        list
+            The inner boundaries, in increasing order.
+
+        """
+        table = _to_subquery(self.query)
+        col = get_column(table, partition_col)
+        with self.database.connect(table) as conn:
+            if method == "range":
+                min_value, max_value = conn.execute(
+                    select(func.min(col), func.max(col))
+                ).one()
+                return _range_boundaries(min_value, max_value, n_partitions)
+            if method == "quantile":
+                tiles = (
+                    select(
+                        col.label("value"),
+                        func.ntile(n_partitions).over(order_by=col).label("tile"),
+                    )
+                    .where(col.is_not(None))
+                    .subquery()
+                )
+                lower_bounds = conn.execute(
+                    select(func.min(tiles.c.value))
+                    .group_by(tiles.c.tile)
+                    .order_by(tiles.c.tile)
+                ).scalars()
+                return sorted(set(list(lower_bounds)[1:]))
+
+        raise ValueError("Invalid method, can either be 'range' or 'quantile'!")
+
+    def save_partitioned(  # pylint: disable=too-many-arguments
+        self,
+        dir_path: str,
+        partition_col: str,
+        n_partitions: int,
+        workers: Optional[int] = None,
+        method: Literal["range", "quantile"] = "range",
+    ) -> str:
+        """Save the query in partitions, extracting the partitions in parallel.
+
+        Partition boundaries are computed once, after which the query is
+        restricted to each partition's range of partition_col values and the
+        sub-queries are run concurrently, each on its own pooled connection.
+        Each partition is saved as a Parquet file, part_0000.parquet,
+        part_0001.parquet, etc., described by a manifest.json file. Partition
+        files of an earlier save in the directory, which are not part of the
+        new manifest, are removed once it is saved.
+
+        Parameters
+        ----------
+        dir_path
+            Directory in which to save the partitions.
+        partition_col
+            Orderable column by which to partition, ideally indexed.
+        n_partitions
+            Number of partitions. Fewer partitions are saved if the column
+            has too few distinct values.
+        workers
+            Number of concurrent extraction threads. Defaults to n_partitions.
+        method
+            Equal-width partitions between the minimum and maximum values with
+            'range', or partitions with roughly equal numbers of rows with
+            'quantile'.
+
+        Returns
+        -------
+        str
+            Processed directory path for upstream use.
+
+        """
+        if n_partitions < 1:
+            raise ValueError("Number of partitions must be a positive integer.")
+
+        dir_path = process_dir_save_path(dir_path)
+        boundaries = self._partition_boundaries(partition_col, n_partitions, method)
+        table = _to_subquery(self.query)
+        conditions = _partition_conditions(get_column(table, partition_col), boundaries)
+
+        def save_partition(index: int) -> Dict:
+            path = self.database.save_query_to_parquet(
+                select(table).where(conditions[index]),
+                join(dir_path, f"part_{index:04d}"),
+            )
+            return {
+                "file": os.path.basename(path),
+                "num_rows": pq.read_metadata(path).num_rows,
+            }
+
+        with ThreadPoolExecutor(max_workers=workers or len(conditions)) as executor:
+            partitions = list(executor.map(save_partition, range(len(conditions))))
+
+        manifest = {
+            "partition_col": partition_col,
+            "method": method,
+            "boundaries": boundaries,
+            "partitions": partitions,
+        }
+        _save_manifest(dir_path, manifest)
+
+        # Remove partition files of earlier saves, e.g., with more partitions.
+        files = {part["file"] for part in partitions}
+        for entry in os.scandir(dir_path):
+            if (
+                entry.name.startswith("part_")
+                and entry.name.endswith(".parquet")
+                and entry.name not in files
+            ):
+                os.remove(entry.path)
+        LOGGER.info("Saved query in %d partitions to %s", len(partitions), dir_path)
+
+        return dir_path
+
+    def save_incremental(self, dir_path: str, watermark_col: str) -> str:
+        """Save the rows added since the last save, as a new Parquet partition.
+
+        The highest value of watermark_col saved so far, the high-watermark,
+        is stored in the manifest.json file of the dataset. Only rows past the
+        watermark, and up to the current highest value, are queried. Rows which
+        arrive later with a value at or below the watermark are not extracted,
+        so watermark_col should be, e.g., a monotonically increasing ID or
+        insertion timestamp. See also cyclops.query.interface.compact_partitions.
+
+        Parameters
+        ----------
+        dir_path
+            Directory of the dataset, with partitions part_0000.parquet,
+            part_0001.parquet, etc.
+        watermark_col
+            Orderable column by which new rows are identified.
+
+        Returns
+        -------
+        str
+            Processed directory path for upstream use.
+
+        """
+        dir_path = process_dir_save_path(dir_path)
+        manifest = _load_manifest(dir_path)
+        if manifest is None:
+            manifest = {"watermark_col": watermark_col, "partitions": []}
+        elif manifest.get("watermark_col") != watermark_col:
+            raise ValueError(
+                f"Dataset in {dir_path} was saved using a different watermark "
+                "column, or not incrementally."
+            )
+
+        table = _to_subquery(self.query)
+        col = get_column(table, watermark_col)
+        cond = col.is_not(None)
+        if manifest.get("watermark") is not None:
+            cond = and_(cond, col > _decode_watermark(manifest["watermark"]))
+
+        with self.database.connect(table) as conn:
+            new_watermark = conn.execute(select(func.max(col)).where(cond)).scalar()
+        if new_watermark is None:
+            LOGGER.info("No new rows to save in %s.", dir_path)
+            return dir_path
+
+        # Bound the rows by the new watermark, so rows added meanwhile are
+        # saved in the next partition.
+        # Partition files may have been merged by compaction, so number the new
+        # partition after the last file.
+        part_index = 1 + max(
+            (int(part["file"][5:-8]) for part in manifest["partitions"]), default=-1
+        )
+        file_name = f"part_{part_index:04d}.parquet"
+        path = self.database.save_query_to_parquet(
+            select(table).where(and_(cond, col <= new_watermark)),
+            join(dir_path, file_name),
+        )
+        partition = {
+            "file": file_name,
+            "num_rows": pq.read_metadata(path).num_rows,
+            "watermark_from": manifest.get("watermark"),
+            "watermark_to": _encode_watermark(new_watermark),
+        }
+        manifest["partitions"].append(partition)
+        manifest["watermark"] = _encode_watermark(new_watermark)
+        _save_manifest(dir_path, manifest)
+        LOGGER.info(
+            "Saved %d new rows to %s, up to %s.",
+            partition["num_rows"],
+            path,
+            new_watermark,
+        )
+
+        return dir_path
+
     def save(
-        self, path: str, file_format: Literal["parquet", "csv"] = "parquet"
+        self,
+        path: str,
+        file_format: Literal["parquet", "csv"] = "parquet",
+        watermark_col: Optional[str] = None,
     ) -> str:
         """Save the query.
 
@@ -91,6 +737,10 @@ class QueryInterface:
             Path where the file will be saved.
         file_format
             File format of the file to save.
+        watermark_col
+            If specified, save incrementally into the directory path, only
+            adding rows past the last saved value of this column. See
+            save_incremental.
 
         Returns
         -------
@@ -98,6 +748,11 @@ class QueryInterface:
             Processed save path for upstream use.
 
         """
+        if watermark_col is not None:
+            if file_format != "parquet":
+                raise ValueError("Incremental saving requires the Parquet format.")
+            return self.save_incremental(path, watermark_col)
+
         # If the query was already run.
         if self.data is not None:
             path = save_dataframe(self.data, path, file_format=file_format)
@@ -144,6 +799,9 @@ class QueryInterfaceProcessed:
         passed to run() method.
     data: pandas.DataFrame or dask.DataFrame
         Data returned from executing the query, as Pandas DataFrame.
+    timings: dict
+        Time in seconds spent on each step of the last query run, e.g.,
+        'compile', 'execute', 'fetch', 'build' and 'process'.
 
     """
 
@@ -152,6 +810,7 @@ class QueryInterfaceProcessed:
     process_fn: Callable
     data: Optional[Union[pd.DataFrame, dd.DataFrame, None]] = None
     _run_args: Dict = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
 
     def run(
         self,
@@ -183,22 +842,68 @@ class QueryInterfaceProcessed:
         # Only re-run when new run arguments are given.
         if self.data is None or not self._run_args == locals():
             self._run_args = locals()
+            self.timings = {}
             self.data = self.database.run_query(
                 self._query,
                 limit=limit,
                 backend=backend,
                 index_col=index_col,
                 n_partitions=n_partitions,
+                timings=self.timings,
             )
 
             LOGGER.info(
                 "Applying post-processing fn %s to query output",
                 self.process_fn.__name__,
             )
-            return self.process_fn(self.data)
+            start_time = time.perf_counter()
+            self.data = self.process_fn(self.data)
+            self.timings["process"] = time.perf_counter() - start_time
 
         return self.data
 
+    async def arun(
+        self,
+        limit: Optional[int] = None,
+        backend: Literal["pandas", "dask"] = "pandas",
+        index_col: Optional[str] = None,
+        n_partitions: Optional[int] = None,
+    ) -> Union[pd.DataFrame, dd.DataFrame]:
+        """Run the query asynchronously, and fetch data.
+
+        The query runs in a worker thread, on its own pooled connection, so
+        other queries can run concurrently. See cyclops.query.gather.
+
+        Parameters
+        ----------
+        limit
+            No. of rows to limit the query return.
+        backend
+            Backend computing framework to use, Pandas or Dask.
+        index_col
+            Column which becomes the index, and defines the partitioning.
+            Should be a indexed column in the SQL server, and any orderable type.
+        n_partitions
+            Number of partitions. Check dask documentation for additional details.
+
+        Returns
+        -------
+        pandas.DataFrame or dask.DataFrame
+            Query result dataframe.
+
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            partial(
+                self.run,
+                limit=limit,
+                backend=backend,
+                index_col=index_col,
+                n_partitions=n_partitions,
+            ),
+        )
+
     def save(
         self, path: str, file_format: Literal["parquet", "csv"] = "parquet"
     ) -> str:
@@ -231,3 +936,44 @@ class QueryInterfaceProcessed:
 
         """
         self.data = None
+
+
+async def gather(
+    *interfaces: Union[QueryInterface, QueryInterfaceProcessed],
+    max_concurrency: Optional[int] = None,
+    **run_kwargs: Any,
+) -> List[Union[pd.DataFrame, dd.DataFrame]]:
+    """Run several queries concurrently.
+
+    The total run time approaches that of the slowest query, rather than the
+    sum of the run times of all queries.
+
+    Parameters
+    ----------
+    *interfaces
+        Query interfaces to run.
+    max_concurrency
+        Maximum number of queries running at once. If not specified, all
+        queries run at once, up to the number of worker threads.
+    **run_kwargs
+        Keyword arguments passed to the run method of each interface.
+
+    Returns
+    -------
+    list of pandas.DataFrame or dask.DataFrame
+        Query results, in the order of the interfaces.
+
+    Examples
+    --------
+    >>> encounters, events = await gather(encounters_interface, events_interface)
+
+    """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError("Maximum concurrency must be a positive integer.")
+    semaphore = asyncio.Semaphore(max_concurrency or max(len(interfaces), 1))
+
+    async def run(interface):
+        async with semaphore:
+            return await interface.arun(**run_kwargs)
+
+    return list(await asyncio.gather(*[run(interface) for interface in interfaces]))
@@ -0,0 +1,277 @@
+"""Local, file-backed databases over Parquet snapshots of datasets.
+
+A snapshot directory holds one sub-directory per schema, each holding one
+Parquet file, or one directory of Parquet files, per table, e.g.::
+
+    snapshot/
+        mimic_core/
+            patients.parquet
+            admissions/
+                part-0.parquet
+                part-1.parquet
+        mimic_hosp/
+            diagnoses_icd.parquet
+
+With DuckDB, the tables are registered as views scanning the Parquet files,
+so nothing is copied. DuckDB is installed with the 'duckdb' extra, i.e.,
+``pip install pycyclops[duckdb]``.
+
+SQLite, which needs no extra packages, is a slower fallback. It cannot read
+Parquet, so the tables are copied once into one row-oriented database file per
+schema, and copied again when the Parquet files change. Loading large
+snapshots takes a while and doubles their disk use, and analytical queries
+run slower than on DuckDB's columnar scans.
+
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column, MetaData, Table, create_engine, event, types
+from sqlalchemy.engine.base import Engine
+
+from cyclops.utils.file import join
+from cyclops.utils.log import setup_logging
+
+# Logging.
+LOGGER = logging.getLogger(__name__)
+setup_logging(print_level="INFO", logger=LOGGER)
+
+
+LOCAL_DBMS = ("duckdb", "sqlite")
+LOCAL_DB_DIR = ".cyclops"
+SQLITE_MAIN_SCHEMA = "main"
+SQLITE_BATCH_SIZE = 65536
+
+
+def find_parquet_tables(data_dir: str) -> Dict[str, Dict[str, List[str]]]:
+    """Find the tables of a Parquet snapshot directory.
+
+    Parameters
+    ----------
+    data_dir
+        Snapshot directory, with one sub-directory per schema.
+
+    Returns
+    -------
+    dict
+        Sorted paths of the Parquet files of each table, by schema and table name.
+
+    """
+    tables: Dict[str, Dict[str, List[str]]] = {}
+    for schema_entry in sorted(os.scandir(data_dir), key=lambda entry: entry.name):
+        if not schema_entry.is_dir() or schema_entry.name.startswith("."):
+            continue
+        schema_tables = {}
+        for entry in sorted(os.scandir(schema_entry.path), key=lambda e: e.name):
+            if entry.is_file() and entry.name.endswith(".parquet"):
+                schema_tables[entry.name[: -len(".parquet")]] = [entry.path]
+            elif entry.is_dir() and not entry.name.startswith("."):
+                files = sorted(
+                    join(root, file)
+                    for root, _, files in os.walk(entry.path)
+                    for file in files
+                    if file.endswith(".parquet")
+                )
+                if files:
+                    schema_tables[entry.name] = files
+        if schema_tables:
+            tables[schema_entry.name] = schema_tables
+
+    return tables
+
+
+def _arrow_to_sql_type(arrow_type: pa.DataType) -> types.TypeEngine:
+    """Get the SQLAlchemy type corresponding to an Arrow type."""
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_boolean(arrow_type):
+        return types.Boolean()
+    if pa.types.is_integer(arrow_type):
+        return types.BigInteger()
+    if pa.types.is_floating(arrow_type):
+        return types.Float()
+    if pa.types.is_decimal(arrow_type):
+        return types.Numeric(arrow_type.precision, arrow_type.scale)
+    if pa.types.is_timestamp(arrow_type):
+        return types.DateTime(timezone=arrow_type.tz is not None)
+    if pa.types.is_date(arrow_type):
+        return types.Date()
+    if pa.types.is_time(arrow_type):
+        return types.Time()
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return types.LargeBinary()
+
+    return types.String()
+
+
+def _get_files_fingerprint(files: List[str]) -> List[List[Any]]:
+    """Get a fingerprint of files, which changes when any file changes."""
+    return [[path, os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in files]
+
+
+def _define_parquet_table(
+    table_name: str, files: List[str], metadata: MetaData
+) -> Table:
+    """Define a table with the columns of its Parquet files."""
+    schema = pq.read_schema(files[0])
+
+    return Table(
+        table_name,
+        metadata,
+        *[Column(field.name, _arrow_to_sql_type(field.type)) for field in schema],
+    )
+
+
+def define_parquet_tables(data_dir: str) -> Dict[str, MetaData]:
+    """Define the tables of a Parquet snapshot from the Parquet files' schemas.
+
+    DuckDB views cannot be reflected by duckdb-engine, so the tables are
+    defined from the Parquet files instead.
+
+    Parameters
+    ----------
+    data_dir
+        Snapshot directory, with one sub-directory per schema.
+
+    Returns
+    -------
+    dict
+        Metadata of each schema, holding its tables, by schema name.
+
+    """
+    schemas = {}
+    for schema_name, tables in find_parquet_tables(data_dir).items():
+        metadata = MetaData(schema=schema_name)
+        for table_name, files in tables.items():
+            _define_parquet_table(table_name, files, metadata)
+        schemas[schema_name] = metadata
+
+    return schemas
+
+
+def _load_sqlite_schema(db_path: str, tables: Dict[str, List[str]]) -> None:
+    """Load the Parquet files of a schema's tables into an SQLite database file.
+
+    Parameters
+    ----------
+    db_path
+        Path of the database file, which is replaced atomically.
+    tables
+        Paths of the Parquet files of each table, by table name.
+
+    """
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        for table_name, files in tables.items():
+            table = _define_parquet_table(table_name, files, MetaData())
+            with engine.begin() as conn:
+                table.create(conn)
+                for path in files:
+                    parquet_file = pq.ParquetFile(path)
+                    for batch in parquet_file.iter_batches(
+                        batch_size=SQLITE_BATCH_SIZE, columns=table.columns.keys()
+                    ):
+                        conn.execute(table.insert(), batch.to_pylist())
+    finally:
+        engine.dispose()
+    os.replace(tmp_path, db_path)
+
+
+def build_sqlite_schemas(data_dir: str, db_dir: str) -> Dict[str, str]:
+    """Load a Parquet snapshot into SQLite database files, one per schema.
+
+    A schema is only reloaded if its Parquet files changed since it was
+    last loaded.
+
+    Parameters
+    ----------
+    data_dir
+        Snapshot directory, with one sub-directory per schema.
+    db_dir
+        Directory in which to store the database files.
+
+    Returns
+    -------
+    dict
+        Path of the database file of each schema, by schema name.
+
+    """
+    os.makedirs(db_dir, exist_ok=True)
+    db_paths = {}
+    for schema_name, tables in find_parquet_tables(data_dir).items():
+        db_path = join(db_dir, f"{schema_name}.db")
+        fingerprint_path = join(db_dir, f"{schema_name}.json")
+        fingerprint = {
+            table: _get_files_fingerprint(files) for table, files in tables.items()
+        }
+        is_current = False
+        if os.path.exists(db_path) and os.path.exists(fingerprint_path):
+            with open(fingerprint_path, "r", encoding="utf-8") as file_descriptor:
+                is_current = json.load(file_descriptor) == fingerprint
+        if not is_current:
+            LOGGER.info("Loading schema %s from Parquet into SQLite...", schema_name)
+            _load_sqlite_schema(db_path, tables)
+            with open(fingerprint_path, "w", encoding="utf-8") as file_descriptor:
+                json.dump(fingerprint, file_descriptor)
+        db_paths[schema_name] = db_path
+
+    return db_paths
+
+
+def attach_sqlite_schemas(engine: Engine, db_paths: Dict[str, str]) -> None:
+    """Attach database files as schemas to each new connection of an engine.
+
+    Parameters
+    ----------
+    engine
+        SQLite engine.
+    db_paths
+        Path of the database file of each schema, by schema name. The main
+        schema, which is the engine's own database file, is skipped.
+
+    """
+    attached = {
+        name: path for name, path in db_paths.items() if name != SQLITE_MAIN_SCHEMA
+    }
+
+    def attach(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for name, path in attached.items():
+            cursor.execute("ATTACH DATABASE ? AS ?", (path, name))
+        cursor.close()
+
+    event.listen(engine, "connect", attach)
+
+
+def register_duckdb_views(engine: Engine, data_dir: str) -> None:
+    """Register the tables of a Parquet snapshot as DuckDB views.
+
+    The views scan the Parquet files when queried, so nothing is loaded.
+
+    Parameters
+    ----------
+    engine
+        DuckDB engine, backed by a database file in which the views persist.
+    data_dir
+        Snapshot directory, with one sub-directory per schema.
+
+    """
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for schema_name, tables in find_parquet_tables(data_dir).items():
+            schema = preparer.quote(schema_name)
+            conn.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+            for table_name, files in tables.items():
+                paths = ", ".join("'" + path.replace("'", "''") + "'" for path in files)
+                conn.exec_driver_sql(
+                    f"CREATE OR REPLACE VIEW {schema}.{preparer.quote(table_name)} "
+                    f"AS SELECT * FROM read_parquet([{paths}])"
+                )
@@ -1,15 +1,22 @@
 """OMOP query API."""
 
+import hashlib
 import logging
-from typing import Dict, List, Optional, Union
+import os
+import threading
+from functools import partial
+from typing import Callable, Dict, List, Optional, Union
 
+import pandas as pd
 from sqlalchemy.sql.selectable import Subquery
 
 import cyclops.query.ops as qo
 from cyclops.query.base import DatasetQuerier
-from cyclops.query.interface import QueryInterface
+from cyclops.query.interface import QueryInterface, QueryInterfaceProcessed
+from cyclops.query.orm import Database
 from cyclops.query.util import TableTypes, table_params_to_type
 from cyclops.utils.common import to_list
+from cyclops.utils.file import join
 from cyclops.utils.log import setup_logging
 
 # Logging.
@@ -63,6 +70,7 @@ COLUMN_MAP: dict = {}
 # Other constants
 ID = "id"
 NAME = "name"
+CONCEPT_BATCH_SIZE = 10000
 
 
 def _get_table_map(schema_name: str) -> Dict:
@@ -90,12 +98,175 @@ def _get_table_map(schema_name: str) -> Dict:
     }
 
 
+class ConceptCache:
+    """In-memory cache of concept names, by concept ID.
+
+    Only the concepts referenced by query results are loaded from the concept
+    table, in one query per batch of new IDs, and the concept ID columns are
+    mapped to names client-side, instead of joining the concept table once per
+    column in the query. The cache is optionally persisted as a Parquet file,
+    so it is reused between sessions. IDs missing from the concept table are
+    only cached for the session, so they are looked up again once added.
+
+    Parameters
+    ----------
+    database
+        Database used to query the concept table.
+    get_concept_table
+        Function returning the concept table, called when it is first needed.
+    path
+        Path of the Parquet file in which to persist the cache, if any.
+
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        get_concept_table: Callable[[], Subquery],
+        path: Optional[str] = None,
+    ) -> None:
+        """Initialize, loading the persisted cache if any."""
+        self._database = database
+        self._get_concept_table = get_concept_table
+        self._concept_table: Optional[Subquery] = None
+        self.path = path
+        self._lock = threading.Lock()
+        self.names = pd.Series(dtype=object, index=pd.Index([], dtype="int64"))
+        if path is not None and os.path.exists(path):
+            concepts = pd.read_parquet(path)
+            self.names = pd.Series(
+                concepts[CONCEPT_NAME].values,
+                index=concepts[CONCEPT_ID].astype("int64"),
+            )
+            LOGGER.info("Loaded %d cached concept names from %s.", len(self), path)
+
+    def __len__(self) -> int:
+        """Get the number of cached concepts."""
+        return len(self.names)
+
+    @property
+    def concept_table(self) -> Subquery:
+        """Get the concept table."""
+        if self._concept_table is None:
+            self._concept_table = self._get_concept_table()
+
+        return self._concept_table
+
+    def _query_concepts(self, table: Subquery) -> pd.DataFrame:
+        """Query concept IDs and names, and add them to the cache."""
+        table = qo.FilterColumns([CONCEPT_ID, CONCEPT_NAME])(table)
+        concepts = self._database.run_query(table, use_cache=False)
+        concepts = concepts.dropna(subset=[CONCEPT_ID])
+        concepts[CONCEPT_ID] = concepts[CONCEPT_ID].astype("int64")
+        self._add(concepts[CONCEPT_ID], concepts[CONCEPT_NAME])
+
+        return concepts
+
+    def _add(self, concept_ids: pd.Series, concept_names: pd.Series) -> None:
+        """Add concepts to the cache, and persist it if configured."""
+        new = pd.Series(concept_names.values, index=concept_ids.values)
+        new = new[~new.index.isin(self.names.index)]
+        new = new[~new.index.duplicated()]
+        if new.empty:
+            return
+        self.names = pd.concat([self.names, new])
+        if self.path is not None and new.notna().any():
+            names = self.names.dropna()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            pd.DataFrame(
+                {CONCEPT_ID: names.index, CONCEPT_NAME: names.values}
+            ).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+
+    def load(self, concept_ids: Union[List[int], pd.Series]) -> None:
+        """Load the names of the concepts not yet in the cache.
+
+        The IDs are queried in batches of CONCEPT_BATCH_SIZE.
+
+        Parameters
+        ----------
+        concept_ids
+            Concept IDs. Missing values are ignored.
+
+        """
+        concept_ids = pd.Series(concept_ids).dropna().astype("int64").unique()
+        with self._lock:
+            missing = concept_ids[~pd.Index(concept_ids).isin(self.names.index)]
+            if len(missing) == 0:
+                return
+            LOGGER.info("Loading %d concept names...", len(missing))
+            missing = sorted(missing.tolist())
+            for start in range(0, len(missing), CONCEPT_BATCH_SIZE):
+                table = qo.ConditionIn(
+                    CONCEPT_ID, missing[start : start + CONCEPT_BATCH_SIZE]
+                )(self.concept_table)
+                self._query_concepts(table)
+            # Cache concepts missing from the concept table as nulls, so they
+            # are not queried again in this session. They are not persisted.
+            self._add(
+                pd.Series(missing),
+                pd.Series([None] * len(missing), dtype=object),
+            )
+
+    def find_ids(
+        self, condition: Callable, names: Union[str, List[str]], **cond_kwargs
+    ) -> List[int]:
+        """Find the IDs of concepts whose names satisfy a condition.
+
+        Parameters
+        ----------
+        condition
+            Condition operation on the concept name column, e.g.,
+            cyclops.query.ops.ConditionIn or cyclops.query.ops.ConditionSubstring.
+        names
+            Concept names, or substrings, given to the condition.
+        **cond_kwargs
+            Keyword arguments given to the condition.
+
+        Returns
+        -------
+        list of int
+            Concept IDs.
+
+        """
+        table = condition(CONCEPT_NAME, names, **cond_kwargs)(self.concept_table)
+        with self._lock:
+            concepts = self._query_concepts(table)
+
+        return concepts[CONCEPT_ID].unique().tolist()
+
+    def map_names(self, data: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+        """Map concept ID columns to concept name columns.
+
+        Parameters
+        ----------
+        data
+            Query result with concept ID columns.
+        cols
+            Concept ID columns, each mapped to a column named with 'id'
+            replaced by 'name'.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Query result with the concept name columns added.
+
+        """
+        self.load(pd.concat([data[col] for col in cols], ignore_index=True))
+        for col in cols:
+            data[col.replace(ID, NAME)] = data[col].map(self.names)
+
+        return data
+
+
 class OMOPQuerier(DatasetQuerier):
     """OMOP querier."""
 
     def __init__(
         self,
         schema_name: str,
+        concept_cache: bool = False,
         **config_overrides,
     ):
         """Initialize.
@@ -104,6 +275,11 @@ class OMOPQuerier(DatasetQuerier):
         ----------
         schema_name: str
             Name of database schema.
+        concept_cache: bool, optional
+            Map concept IDs to names client-side using a cache of concept names,
+            rather than joining the concept table in each query. Queries then
+            return a cyclops.query.interface.QueryInterfaceProcessed, and the
+            cache is persisted in the 'concept_cache_dir' directory, if set.
         **config_overrides
             Override configuration parameters, specified as kwargs.
 
@@ -113,6 +289,21 @@ class OMOPQuerier(DatasetQuerier):
             overrides = config_overrides
         super().__init__(_get_table_map(schema_name), COLUMN_MAP, **overrides)
 
+        self._concepts: Optional[ConceptCache] = None
+        if concept_cache:
+            path = None
+            config = self._db.config
+            if config.get("concept_cache_dir"):
+                source = (
+                    f"{config.dbms}://{config.get('host')}:{config.get('port')}/"
+                    f"{config.get('database')}/{schema_name}"
+                )
+                digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+                path = join(config.concept_cache_dir, f"concepts_{digest}.parquet")
+            self._concepts = ConceptCache(
+                self._db, partial(self.get_table, CONCEPT), path
+            )
+
     def _map_concept_ids_to_name(
         self, source_table: Subquery, source_cols: Union[str, List[str]]
     ) -> Subquery:
@@ -128,13 +319,19 @@ class OMOPQuerier(DatasetQuerier):
         Returns
         -------
         Subquery
-            Query with mapped columns from concept table.
+            Query with mapped columns from concept table. With the concept
+            cache, the query is returned unchanged, and the columns are mapped
+            after running it, see ``_get_concept_interface``.
 
         """
-        concept_table = self.get_table(CONCEPT)
         for col in to_list(source_cols):
             if ID not in col:
                 raise ValueError("Specified column not a concept ID column!")
+        if self._concepts is not None:
+            return source_table
+
+        concept_table = self.get_table(CONCEPT)
+        for col in to_list(source_cols):
             source_table = qo.Join(
                 concept_table,
                 on=(col, CONCEPT_ID),
@@ -147,6 +344,72 @@ class OMOPQuerier(DatasetQuerier):
 
         return source_table
 
+    def _get_concept_interface(
+        self, table: Subquery, concept_id_cols: List[str]
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
+        """Get a query interface, which maps concept IDs with the concept cache.
+
+        Parameters
+        ----------
+        table: Subquery
+            Query.
+        concept_id_cols: list of str
+            Concept ID columns mapped by ``_map_concept_ids_to_name``.
+
+        Returns
+        -------
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
+            Query interface, with post-processing if the concept cache is used.
+
+        """
+        if self._concepts is None:
+            return QueryInterface(self._db, table)
+        concepts = self._concepts
+
+        def map_concept_names(data: pd.DataFrame) -> pd.DataFrame:
+            return concepts.map_names(data, concept_id_cols)
+
+        return QueryInterfaceProcessed(self._db, table, map_concept_names)
+
+    def _concept_name_condition(
+        self, condition: Callable, name_col: str, kwarg: str
+    ) -> tuple:
+        """Get an operation filtering on a concept name column.
+
+        With the concept cache, the name column is not in the query, so the
+        operation filters the concept ID column on the IDs of matching concepts.
+
+        Parameters
+        ----------
+        condition: Callable
+            Condition operation on the name column.
+        name_col: str
+            Concept name column.
+        kwarg: str
+            Keyword argument of the query method to filter on.
+
+        Returns
+        -------
+        tuple
+            Operation for cyclops.query.ops.process_operations.
+
+        """
+        if self._concepts is None:
+            return (condition, [name_col, qo.QAP(kwarg)], {})
+
+        return (
+            qo.ConditionIn,
+            [
+                name_col.replace(NAME, ID),
+                qo.QAP(
+                    kwarg,
+                    transform_fn=partial(self._concepts.find_ids, condition),
+                ),
+            ],
+            {},
+        )
+
     def _map_care_site_id(self, source_table: Subquery) -> Subquery:
         """Map care_site_id in a source table to care_site table.
 
@@ -176,7 +439,7 @@ class OMOPQuerier(DatasetQuerier):
         self,
         drop_null_person_ids=True,
         **process_kwargs,
-    ) -> QueryInterface:
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
         """Query OMOP visit_occurrence table.
 
         Parameters
@@ -186,7 +449,8 @@ class OMOPQuerier(DatasetQuerier):
 
         Returns
         -------
-        cyclops.query.interface.QueryInterface
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
             Constructed query, wrapped in an interface object.
 
         Other Parameters
@@ -216,9 +480,8 @@ class OMOPQuerier(DatasetQuerier):
         table = qo.Cast([VISIT_START_DATETIME], "timestamp")(table)
 
         # Map concept IDs to concept table cols.
-        table = self._map_concept_ids_to_name(
-            table, ["visit_concept_id", "visit_type_concept_id"]
-        )
+        concept_id_cols = ["visit_concept_id", "visit_type_concept_id"]
+        table = self._map_concept_ids_to_name(table, concept_id_cols)
 
         # Map care_site ID to care_site information from care_site table.
         table = self._map_care_site_id(table)
@@ -238,14 +501,14 @@ class OMOPQuerier(DatasetQuerier):
 
         table = qo.process_operations(table, operations, process_kwargs)
 
-        return QueryInterface(self._db, table)
+        return self._get_concept_interface(table, concept_id_cols)
 
     @table_params_to_type(Subquery)
     def visit_detail(
         self,
         visit_occurrence_table: Optional[TableTypes] = None,
         **process_kwargs,
-    ) -> QueryInterface:
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
         """Query OMOP visit_detail table.
 
         Parameters
@@ -272,7 +535,8 @@ class OMOPQuerier(DatasetQuerier):
 
         Returns
         -------
-        cyclops.query.interface.QueryInterface
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
             Constructed query, wrapped in an interface object.
 
         """
@@ -286,9 +550,8 @@ class OMOPQuerier(DatasetQuerier):
                 visit_occurrence_table, on=[PERSON_ID, VISIT_OCCURRENCE_ID]
             )(table)
 
-        table = self._map_concept_ids_to_name(
-            table, ["visit_detail_concept_id", "visit_detail_type_concept_id"]
-        )
+        concept_id_cols = ["visit_detail_concept_id", "visit_detail_type_concept_id"]
+        table = self._map_concept_ids_to_name(table, concept_id_cols)
 
         operations: List[tuple] = [
             (
@@ -303,24 +566,22 @@ class OMOPQuerier(DatasetQuerier):
             ),
             (qo.ConditionInYears, [VISIT_DETAIL_START_DATETIME, qo.QAP("years")], {}),
             (qo.ConditionInMonths, [VISIT_DETAIL_START_DATETIME, qo.QAP("months")], {}),
-            (
-                qo.ConditionSubstring,
-                [VISIT_DETAIL_CONCEPT_NAME, qo.QAP("care_unit")],
-                {},
+            self._concept_name_condition(
+                qo.ConditionSubstring, VISIT_DETAIL_CONCEPT_NAME, "care_unit"
             ),
             (qo.Limit, [qo.QAP("limit")], {}),
         ]
 
         table = qo.process_operations(table, operations, process_kwargs)
 
-        return QueryInterface(self._db, table)
+        return self._get_concept_interface(table, concept_id_cols)
 
     @table_params_to_type(Subquery)
     def person(
         self,
         visit_occurrence_table: Optional[TableTypes] = None,
         **process_kwargs,
-    ) -> QueryInterface:
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
         """Query OMOP person table.
 
         Parameters
@@ -341,7 +602,8 @@ class OMOPQuerier(DatasetQuerier):
 
         Returns
         -------
-        cyclops.query.interface.QueryInterface
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
             Constructed query, wrapped in an interface object.
 
         """
@@ -350,27 +612,32 @@ class OMOPQuerier(DatasetQuerier):
         if visit_occurrence_table is not None:
             table = qo.Join(visit_occurrence_table, on=PERSON_ID)(table)
 
-        table = self._map_concept_ids_to_name(
-            table, ["gender_concept_id", "race_concept_id", "ethnicity_concept_id"]
-        )
+        concept_id_cols = [
+            "gender_concept_id",
+            "race_concept_id",
+            "ethnicity_concept_id",
+        ]
+        table = self._map_concept_ids_to_name(table, concept_id_cols)
 
         operations: List[tuple] = [
-            (qo.ConditionIn, [GENDER_CONCEPT_NAME, qo.QAP("gender")], {}),
-            (qo.ConditionIn, [RACE_CONCEPT_NAME, qo.QAP("race")], {}),
-            (qo.ConditionIn, [ETHNICITY_CONCEPT_NAME, qo.QAP("ethnicity")], {}),
+            self._concept_name_condition(qo.ConditionIn, GENDER_CONCEPT_NAME, "gender"),
+            self._concept_name_condition(qo.ConditionIn, RACE_CONCEPT_NAME, "race"),
+            self._concept_name_condition(
+                qo.ConditionIn, ETHNICITY_CONCEPT_NAME, "ethnicity"
+            ),
             (qo.Limit, [qo.QAP("limit")], {}),
         ]
 
         table = qo.process_operations(table, operations, process_kwargs)
 
-        return QueryInterface(self._db, table)
+        return self._get_concept_interface(table, concept_id_cols)
 
     @table_params_to_type(Subquery)
     def observation(
         self,
         visit_occurrence_table: Optional[TableTypes] = None,
         **process_kwargs,
-    ) -> QueryInterface:
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
         """Query OMOP observation table.
 
         Parameters
@@ -395,7 +662,8 @@ class OMOPQuerier(DatasetQuerier):
 
         Returns
         -------
-        cyclops.query.interface.QueryInterface
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
             Constructed query, wrapped in an interface object.
 
         """
@@ -409,9 +677,8 @@ class OMOPQuerier(DatasetQuerier):
         # Possibly cast string representations to timestamps
         table = qo.Cast([OBSERVATION_DATETIME], "timestamp")(table)
 
-        table = self._map_concept_ids_to_name(
-            table, [OBSERVATION_CONCEPT_ID, OBSERVATION_TYPE_CONCEPT_ID]
-        )
+        concept_id_cols = [OBSERVATION_CONCEPT_ID, OBSERVATION_TYPE_CONCEPT_ID]
+        table = self._map_concept_ids_to_name(table, concept_id_cols)
 
         operations: List[tuple] = [
             (qo.ConditionBeforeDate, [OBSERVATION_DATETIME, qo.QAP("before_date")], {}),
@@ -423,14 +690,14 @@ class OMOPQuerier(DatasetQuerier):
 
         table = qo.process_operations(table, operations, process_kwargs)
 
-        return QueryInterface(self._db, table)
+        return self._get_concept_interface(table, concept_id_cols)
 
     @table_params_to_type(Subquery)
     def measurement(
         self,
         visit_occurrence_table: Optional[TableTypes] = None,
         **process_kwargs,
-    ) -> QueryInterface:
+    ) -> Union[QueryInterface, QueryInterfaceProcessed]:
         """Query OMOP measurement table.
 
         Parameters
@@ -455,7 +722,8 @@ class OMOPQuerier(DatasetQuerier):
 
         Returns
         -------
-        cyclops.query.interface.QueryInterface
+        cyclops.query.interface.QueryInterface or
+        cyclops.query.interface.QueryInterfaceProcessed
             Constructed query, wrapped in an interface object.
 
         """
@@ -472,10 +740,12 @@ class OMOPQuerier(DatasetQuerier):
         # Cast value_as_concept_id to int.
         table = qo.Cast([VALUE_AS_CONCEPT_ID], "int")(table)
 
-        table = self._map_concept_ids_to_name(
-            table,
-            [MEASUREMENT_CONCEPT_ID, MEASUREMENT_TYPE_CONCEPT_ID, UNIT_CONCEPT_ID],
-        )
+        concept_id_cols = [
+            MEASUREMENT_CONCEPT_ID,
+            MEASUREMENT_TYPE_CONCEPT_ID,
+            UNIT_CONCEPT_ID,
+        ]
+        table = self._map_concept_ids_to_name(table, concept_id_cols)
 
         operations: List[tuple] = [
             (qo.ConditionBeforeDate, [MEASUREMENT_DATETIME, qo.QAP("before_date")], {}),
@@ -487,4 +757,4 @@ class OMOPQuerier(DatasetQuerier):
 
         table = qo.process_operations(table, operations, process_kwargs)
 
-        return QueryInterface(self._db, table)
+        return self._get_concept_interface(table, concept_id_cols)
@@ -8,33 +8,51 @@ which can be used in high-level query API functions specific to datasets.
 # pylint: disable=too-many-lines
 
 import logging
+import os
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 import sqlalchemy
-from sqlalchemy import and_, cast, extract, func, literal_column, or_, select
+from omegaconf import OmegaConf
+from sqlalchemy import (
+    and_,
+    cast,
+    extract,
+    func,
+    literal_column,
+    or_,
+    select,
+    tablesample,
+)
 from sqlalchemy.sql.elements import BinaryExpression
 from sqlalchemy.sql.expression import literal
+from sqlalchemy.sql.schema import Table
 from sqlalchemy.sql.selectable import Select, Subquery
+from sqlalchemy.sql.util import ClauseAdapter
 from sqlalchemy.types import Boolean
 
-# Logging.
+from cyclops.query.orm import Database
 from cyclops.query.util import (
+    RandomFraction,
     TableTypes,
+    _is_mergeable,
     apply_to_columns,
     check_timestamp_columns,
     drop_columns,
     ends_with,
     equals,
     filter_columns,
+    flatten_subqueries,
     get_column,
     get_column_names,
     get_columns,
     get_delta_column,
     has_columns,
     has_substring,
+    hash_fraction,
     in_,
+    in_table,
     not_equals,
     process_column,
     rename_columns,
@@ -46,9 +64,16 @@ from cyclops.query.util import (
 from cyclops.utils.common import to_datetime_format, to_list, to_list_optional
 from cyclops.utils.log import setup_logging
 
+# Logging.
 LOGGER = logging.getLogger(__name__)
 setup_logging(print_level="INFO", logger=LOGGER)
 
+# Number of values above which ConditionIn loads them into a temporary table,
+# as configured by 'in_table_threshold' in the default query config.
+IN_TABLE_THRESHOLD = OmegaConf.load(
+    os.path.join(os.path.dirname(__file__), "configs", "config.yaml")
+).get("in_table_threshold")
+
 
 @dataclass
 class QAP:
@@ -150,11 +175,12 @@ def process_operations(  # pylint: disable=too-many-locals
         return [arg(**user_kwargs) if isinstance(arg, QAP) else arg for arg in args]
 
     def process_kwargs(kwargs):
+        kwargs = dict(kwargs)
         for key, value in kwargs.items():
             if isinstance(value, QAP):
                 # Convert if found
                 if str(value) in user_kwargs:
-                    kwargs[key] = value(user_kwargs)
+                    kwargs[key] = value(**user_kwargs)
                 # Otherwise, ensure it wasn't required and remove later
                 else:
                     if value.required:
@@ -1200,17 +1226,27 @@ class ConditionIn:  # pylint: disable=too-few-public-methods
         Take negation of condition.
     binarize_col: str, optional
         If specified, create a Boolean column of name binarize_col instead of filtering.
+    table_threshold: int, optional
+        If there are more values than this, they are loaded into a temporary
+        table, against which a semi-join is performed, rather than inlined in
+        the SQL. This is faster for long lists of values. Defaults to
+        'in_table_threshold' in the query config, and values are always
+        inlined if None. The table is loaded on the connections from
+        cyclops.query.orm.Database.connect, which run the query. The Dask
+        backend of cyclops.query.orm.Database.run_query inlines the values
+        instead.
     **cond_kwargs
         Optional keyword arguments for processing the condition.
 
     """
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         col: str,
         values: Union[Any, List[Any]],
         not_: bool = False,
         binarize_col: Optional[str] = None,
+        table_threshold: Optional[int] = IN_TABLE_THRESHOLD,
         **cond_kwargs,
     ):
         """Initialize."""
@@ -1218,6 +1254,7 @@ class ConditionIn:  # pylint: disable=too-few-public-methods
         self.values = values
         self.not_ = not_
         self.binarize_col = binarize_col
+        self.table_threshold = table_threshold
         self.cond_kwargs = cond_kwargs
 
     def __call__(self, table: TableTypes) -> Subquery:
@@ -1235,11 +1272,12 @@ class ConditionIn:  # pylint: disable=too-few-public-methods
 
         """
         table = _process_checks(table, cols=self.col, cols_not_in=self.binarize_col)
-        cond = in_(
-            get_column(table, self.col),
-            to_list(self.values),
-            **self.cond_kwargs,
+        values = to_list(self.values)
+        use_table = (
+            self.table_threshold is not None and len(values) > self.table_threshold
         )
+        in_fn = in_table if use_table else in_
+        cond = in_fn(get_column(table, self.col), values, **self.cond_kwargs)
         if self.not_:
             cond = cond._negate()
 
@@ -1722,6 +1760,81 @@ class RandomizeOrder:
         return select(table).order_by(func.random()).subquery()
 
 
+@dataclass
+class Sample:
+    """Sample a fraction of table rows, without sorting the table.
+
+    Unlike RandomizeOrder followed by Limit, which sorts the whole table,
+    the rows are sampled while scanning the table, or, with TABLESAMPLE,
+    only part of the table is read.
+
+    Parameters
+    ----------
+    fraction: float
+        Fraction of rows to sample, greater than 0 and at most 1.
+    method: str, optional
+        'bernoulli' samples each row independently, and 'system' samples
+        whole disk pages, which is faster but clusters the sample. Both use
+        TABLESAMPLE on PostgreSQL when the table selects directly from a
+        database table, and otherwise filter rows on a random number, e.g.,
+        on SQLite and DuckDB. 'hash' deterministically samples the rows whose
+        value in a column hashes below the fraction, so the same values, e.g.,
+        encounters, are sampled on every run and across tables sampled on the
+        same column. See cyclops.query.util.hash_fraction.
+    col: str, optional
+        Column to hash, required by the 'hash' method.
+    seed: int, optional
+        Seed making TABLESAMPLE samples repeatable on PostgreSQL, or selecting
+        a different deterministic sample with the 'hash' method.
+
+    """
+
+    fraction: float
+    method: str = "bernoulli"
+    col: Optional[str] = None
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Check the sampling parameters."""
+        if not 0 < self.fraction <= 1:
+            raise ValueError("Fraction must be greater than 0 and at most 1.")
+        if self.method not in ("bernoulli", "system", "hash"):
+            raise ValueError(f"Sampling method {self.method} is not supported.")
+        if self.method == "hash" and self.col is None:
+            raise ValueError("A column to hash must be specified to sample by hash.")
+
+    @table_params_to_type(Subquery)
+    def __call__(self, table: TableTypes) -> Subquery:
+        """Process the table.
+
+        Parameters
+        ----------
+        table : cyclops.query.util.TableTypes
+            Table on which to perform the operation.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Processed table.
+
+        """
+        if self.method == "hash":
+            cond = hash_fraction(get_column(table, self.col), self.seed or 0)
+            return select(table).where(cond < self.fraction).subquery()
+
+        # TABLESAMPLE only applies to tables, so sample the table the query
+        # selects from if it only projects and filters its rows.
+        stmt = flatten_subqueries(table).element
+        froms = stmt.get_final_froms()
+        if len(froms) == 1 and isinstance(froms[0], Table) and _is_mergeable(stmt):
+            sampling = getattr(func, self.method)(self.fraction * 100)
+            seed = None if self.seed is None else literal(self.seed)
+            sampled = tablesample(froms[0], sampling, seed=seed)
+            return ClauseAdapter(sampled).traverse(stmt).subquery()
+
+        return select(table).where(RandomFraction() < self.fraction).subquery()
+
+
 @dataclass
 class DropNulls:
     """Remove rows with null values in some specified columns.
@@ -1955,3 +2068,82 @@ class GroupByAggregate:
             agg_cols.append(agg_col.label(aggfunc_names[i]))
 
         return select(*groupby_cols, *agg_cols).group_by(*groupby_cols).subquery()
+
+
+@dataclass
+class Compile:  # pylint: disable=too-few-public-methods
+    """Flatten the nested subqueries created by chained operations.
+
+    Each operation wraps its input in a subquery. Consecutive projections,
+    renames and filters are merged into a single SELECT statement, which is
+    faster to compile and simpler for query planners. The results are unchanged.
+
+    Examples
+    --------
+    >>> Compile()(table)
+
+    """
+
+    @table_params_to_type(Subquery)
+    def __call__(self, table: TableTypes) -> Subquery:
+        """Process the table.
+
+        Parameters
+        ----------
+        table : cyclops.query.util.TableTypes
+            Table on which to perform the operation.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Processed table.
+
+        """
+        return flatten_subqueries(table)
+
+
+@dataclass
+class Materialize:  # pylint: disable=too-few-public-methods
+    """Run a query once into a table of the database, for reuse by other queries.
+
+    Expensive intermediate queries, e.g., patient encounters, are otherwise
+    recomputed inside every query using them. The table is a permanent table,
+    not a temporary one, so it outlives the connection creating it. Callers
+    should drop it using cyclops.query.orm.Database.drop_materialized, or
+    query within a ``with querier:`` block, which drops it on exit. Otherwise,
+    it is dropped when the database object is garbage collected, or at
+    interpreter exit, which is skipped if the process is killed.
+
+    Parameters
+    ----------
+    database: cyclops.query.orm.Database
+        Database in which to create the table.
+    name: str, optional
+        Name of the table. Defaults to a name derived from the query.
+
+    Examples
+    --------
+    >>> Materialize(database)(table)
+    >>> Materialize(database, name="encounters")(table)
+
+    """
+
+    database: Database
+    name: Optional[str] = None
+
+    @table_params_to_type(Subquery)
+    def __call__(self, table: TableTypes) -> Subquery:
+        """Process the table.
+
+        Parameters
+        ----------
+        table : cyclops.query.util.TableTypes
+            Table on which to perform the operation.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Subquery selecting from the materialized table.
+
+        """
+        return self.database.materialize(table, name=self.name)
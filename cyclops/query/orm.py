@@ -1,24 +1,66 @@
 """Object Relational Mapper (ORM) using sqlalchemy."""
 
 import csv
+import hashlib
+import importlib.util
+import io
 import logging
 import os
+import pickle
 import socket
-from typing import Literal, Optional, Union
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Any, Dict, Generator, List, Literal, Optional, Tuple, Union
 
 import dask.dataframe as dd
 import pandas as pd
-import pyarrow.csv as pv
+import pyarrow as pa
 import pyarrow.parquet as pq
 from omegaconf import DictConfig
-from sqlalchemy import MetaData, create_engine, inspect
-from sqlalchemy.engine.base import Engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.session import Session
-from sqlalchemy.sql.selectable import Select
-
-from cyclops.query.util import DBSchema, DBTable, TableTypes, table_params_to_type
-from cyclops.utils.file import exchange_extension, process_file_save_path
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Table,
+    create_engine,
+    event,
+    inspect,
+    select,
+    text,
+    types,
+)
+from sqlalchemy.engine.base import Connection, Engine
+from sqlalchemy.engine.cursor import CursorResult
+from sqlalchemy.exc import NoSuchTableError, SQLAlchemyError
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.selectable import Select, Subquery
+
+from cyclops.query.cache import QueryCache, get_cache_key
+from cyclops.query.dtypes import DtypeOptions, compact_dtypes
+from cyclops.query.local import (
+    LOCAL_DB_DIR,
+    LOCAL_DBMS,
+    SQLITE_MAIN_SCHEMA,
+    _arrow_to_sql_type,
+    attach_sqlite_schemas,
+    build_sqlite_schemas,
+    define_parquet_tables,
+    register_duckdb_views,
+)
+from cyclops.query.util import (
+    DBSchema,
+    DBTable,
+    TableTypes,
+    _to_select,
+    get_values_tables,
+    inline_values_tables,
+    table_params_to_type,
+)
+from cyclops.utils.file import join, process_file_save_path
 from cyclops.utils.log import setup_logging
 from cyclops.utils.profile import time_function
 
@@ -28,6 +70,54 @@ setup_logging(print_level="INFO", logger=LOGGER)
 
 
 SOCKET_CONNECTION_TIMEOUT = 5
+MATERIALIZED_TABLE_PREFIX = "cyclops_materialized_"
+# Number of batches held back to infer the type of all-null columns on write.
+SCHEMA_INFERENCE_MAX_BATCHES = 10
+EXPLAIN_COLUMNS = [
+    "depth",
+    "node",
+    "relation",
+    "estimated_rows",
+    "estimated_cost",
+    "actual_rows",
+    "actual_time",
+]
+
+# Process-wide registry of engines, so connection pools are shared.
+_ENGINES: Dict[Tuple[str, Tuple], Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+@dataclass
+class CompileStats:
+    """Statistics of the compilation of queries run by a Database.
+
+    Parameters
+    ----------
+    compiles: int
+        Number of queries compiled, i.e., not found in SQLAlchemy's compiled
+        cache.
+    cache_hits: int
+        Number of queries whose compiled form was found in the compiled cache.
+    compile_time: float
+        Total time in seconds spent compiling, or looking up compiled queries.
+
+    """
+
+    compiles: int = 0
+    cache_hits: int = 0
+    compile_time: float = 0.0
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        """Get the statistics as a dictionary.
+
+        Returns
+        -------
+        dict
+            The statistics.
+
+        """
+        return asdict(self)
 
 
 def _get_db_url(  # pylint: disable=too-many-arguments
@@ -37,9 +127,410 @@ def _get_db_url(  # pylint: disable=too-many-arguments
     return f"{dbms}://{user}:{pwd}@{host}:{port}/{database}"
 
 
-def _get_attr_name(name: str) -> str:
-    """Get attribute name (second part of first.second)."""
-    return name.split(".")[-1]
+def _engine_key(url: str, pool_options: Dict[str, Any]) -> Tuple[str, Tuple]:
+    """Get the registry key of an engine."""
+    return url, tuple(sorted(pool_options.items()))
+
+
+def _is_engine_registered(url: str, pool_options: Dict[str, Any]) -> bool:
+    """Check whether an engine is in the registry."""
+    return _engine_key(url, pool_options) in _ENGINES
+
+
+def get_engine(url: str, **pool_options: Any) -> Engine:
+    """Get the shared engine for a database URL, creating it if needed.
+
+    Engines, and hence their connection pools, are shared across all
+    Database objects in the process with the same URL and pool options.
+
+    Parameters
+    ----------
+    url
+        Database URL.
+    **pool_options
+        Connection pool options passed to sqlalchemy.create_engine, e.g.,
+        pool_size, max_overflow, pool_pre_ping and pool_recycle.
+
+    Returns
+    -------
+    sqlalchemy.engine.base.Engine
+        The shared engine.
+
+    """
+    key = _engine_key(url, pool_options)
+    with _ENGINES_LOCK:
+        if key not in _ENGINES:
+            _ENGINES[key] = create_engine(url, **pool_options)
+
+        return _ENGINES[key]
+
+
+def dispose_engines() -> None:
+    """Dispose of all shared engines, closing their pooled connections."""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+
+def _flatten_postgresql_plan(plan: Dict, depth: int = 0) -> List[Dict]:
+    """Flatten a PostgreSQL JSON query plan into a list of plan nodes.
+
+    Parameters
+    ----------
+    plan
+        A plan node of the output of EXPLAIN (FORMAT JSON).
+    depth
+        Depth of the plan node.
+
+    Returns
+    -------
+    list of dict
+        The node and its descendants, in depth-first order.
+
+    """
+    nodes = [
+        {
+            "depth": depth,
+            "node": plan["Node Type"],
+            "relation": plan.get("Relation Name"),
+            "estimated_rows": plan.get("Plan Rows"),
+            "estimated_cost": plan.get("Total Cost"),
+            "actual_rows": plan.get("Actual Rows"),
+            "actual_time": plan.get("Actual Total Time"),
+        }
+    ]
+    for child in plan.get("Plans", []):
+        nodes.extend(_flatten_postgresql_plan(child, depth + 1))
+
+    return nodes
+
+
+def _flatten_sqlite_plan(rows: List[Tuple]) -> List[Dict]:
+    """Convert the rows of a SQLite EXPLAIN QUERY PLAN into plan nodes.
+
+    Parameters
+    ----------
+    rows
+        Rows of (id, parent, notused, detail).
+
+    Returns
+    -------
+    list of dict
+        The plan nodes, in depth-first order.
+
+    """
+    depths = {0: -1}
+    nodes = []
+    for node_id, parent, _, detail in rows:
+        depths[node_id] = depths.get(parent, -1) + 1
+        relation = None
+        words = detail.split()
+        if words[0] in ("SCAN", "SEARCH") and len(words) > 1:
+            relation = words[1]
+        nodes.append(
+            {
+                "depth": depths[node_id],
+                "node": detail,
+                "relation": relation,
+                "estimated_rows": None,
+                "estimated_cost": None,
+                "actual_rows": None,
+                "actual_time": None,
+            }
+        )
+
+    return nodes
+
+
+def _drop_tables(engine: Engine, tables: Dict[str, Table]) -> None:
+    """Drop the materialized tables of a database object which is finalized.
+
+    Registered with weakref.finalize, so it runs when the object is garbage
+    collected, or at interpreter exit, at the latest.
+
+    Parameters
+    ----------
+    engine
+        Engine with which the tables were created.
+    tables
+        Tables to drop, by key, which is cleared.
+
+    """
+    if not tables:
+        return
+    try:
+        with engine.begin() as conn:
+            for table in tables.values():
+                table.drop(conn, checkfirst=True)
+    except SQLAlchemyError as error:
+        LOGGER.warning("Could not drop materialized tables: %s", error)
+    tables.clear()
+
+
+def _load_values_table(conn: Connection, table: Table) -> None:
+    """Load the values of a temporary table of values into the table.
+
+    Parameters
+    ----------
+    conn
+        Connection on which the table was created.
+    table
+        Table, as defined by cyclops.query.util.values_table, or a temporary
+        table uploaded by cyclops.query.orm.Database.upload_table.
+
+    """
+    if "data" in table.info:
+        _load_dataframe(conn, table, table.info["data"], table.info["batch_size"])
+        return
+
+    values = table.info["values"]
+    if not values:
+        return
+
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(
+            [value] for value in values
+        )
+        buffer.seek(0)
+        name = conn.dialect.identifier_preparer.quote(table.name)
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {name} (value) FROM STDIN WITH CSV", buffer)
+    else:
+        conn.execute(table.insert(), [{"value": value} for value in values])
+
+
+def _load_dataframe(
+    conn: Connection, table: Table, data: pd.DataFrame, batch_size: int
+) -> None:
+    """Load a DataFrame into a table, using COPY on PostgreSQL.
+
+    Parameters
+    ----------
+    conn
+        Connection on which the table was created.
+    table
+        Table with the columns of the DataFrame.
+    data
+        Data to load.
+    batch_size
+        Number of rows inserted at a time, when not using COPY.
+
+    """
+    if data.empty:
+        return
+
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        data.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        preparer = conn.dialect.identifier_preparer
+        cols = ", ".join(preparer.quote(col) for col in data.columns)
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {preparer.format_table(table)} ({cols}) FROM STDIN WITH CSV",
+                buffer,
+            )
+        return
+
+    for start in range(0, len(data), batch_size):
+        batch = data.iloc[start : start + batch_size].astype(object)
+        conn.execute(
+            table.insert(), batch.where(batch.notna(), None).to_dict("records")
+        )
+
+
+def _copy_query_to_csv(
+    conn: Connection, sql: str, params: Optional[Union[Dict, Tuple]], path: str
+) -> Optional[int]:
+    """Save a query to CSV using PostgreSQL's COPY, streamed to the file.
+
+    Parameters
+    ----------
+    conn
+        PostgreSQL connection.
+    sql
+        Query SQL, in the driver's parameter style.
+    params
+        Query parameters, which are bound by the driver before running COPY,
+        since COPY does not accept parameters. None for raw SQL, which is
+        run as is.
+    path
+        Save path.
+
+    Returns
+    -------
+    int, optional
+        Number of rows saved, if reported by the driver.
+
+    """
+    with conn.connection.cursor() as cursor:
+        if params is not None:
+            sql = cursor.mogrify(sql, params).decode(conn.dialect.encoding)
+        with open(path, "w", encoding="utf-8", newline="") as file_descriptor:
+            cursor.copy_expert(
+                f"COPY ({sql}) TO STDOUT WITH CSV HEADER", file_descriptor
+            )
+        n_rows = cursor.rowcount
+
+    return None if n_rows < 0 else n_rows
+
+
+def _write_query_to_csv(
+    conn: Connection, query: TableTypes, path: str, batch_size: int
+) -> int:
+    """Save a query to CSV, streaming the rows in batches to a CSV writer.
+
+    Parameters
+    ----------
+    conn
+        Connection.
+    query
+        Query to save.
+    path
+        Save path.
+    batch_size
+        Number of rows fetched at a time.
+
+    Returns
+    -------
+    int
+        Number of rows saved.
+
+    """
+    conn = conn.execution_options(stream_results=True, max_row_buffer=batch_size)
+    result = conn.execute(query)
+    n_rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as file_descriptor:
+        outcsv = csv.writer(file_descriptor)
+        outcsv.writerow(result.keys())
+        for rows in iter(partial(result.fetchmany, batch_size), []):
+            outcsv.writerows(rows)
+            n_rows += len(rows)
+
+    return n_rows
+
+
+def _sql_type_to_arrow(sql_type: types.TypeEngine) -> Optional[pa.DataType]:
+    """Get the Arrow type corresponding to a SQLAlchemy column type.
+
+    Parameters
+    ----------
+    sql_type
+        SQLAlchemy column type.
+
+    Returns
+    -------
+    pyarrow.DataType, optional
+        The Arrow type, or None if the type has no known mapping and must
+        be inferred from the data.
+
+    """
+    # Order matters, since, e.g., BigInteger is a subclass of Integer.
+    if isinstance(sql_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, types.SmallInteger):
+        return pa.int16()
+    if isinstance(sql_type, types.Integer):
+        return pa.int64()
+    if isinstance(sql_type, types.REAL):
+        return pa.float32()
+    if isinstance(sql_type, (types.Float, types.Numeric)):
+        return pa.float64()
+    if isinstance(sql_type, types.DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, types.Date):
+        return pa.date32()
+    if isinstance(sql_type, types.Time):
+        return pa.time64("us")
+    if isinstance(sql_type, types.Interval):
+        return pa.duration("us")
+    if isinstance(sql_type, types.String):
+        return pa.string()
+    if isinstance(sql_type, types.LargeBinary):
+        return pa.binary()
+
+    return None
+
+
+def _get_arrow_schema(query: Union[Select, str], data: pd.DataFrame) -> pa.Schema:
+    """Derive the Arrow schema of a query result from its column types.
+
+    Columns without a known type mapping, e.g., those of raw SQL string queries,
+    are inferred from a sample of the data. Those which are all null in the
+    sample cannot be inferred, and have the null type.
+
+    Parameters
+    ----------
+    query
+        Query whose result is being written.
+    data
+        A sample of the query result, e.g., the first batch.
+
+    Returns
+    -------
+    pyarrow.Schema
+        Schema of the query result.
+
+    """
+    inferred = pa.Schema.from_pandas(data, preserve_index=False)
+    sql_types = {}
+    if isinstance(query, Select):
+        sql_types = {col.name: col.type for col in query.selected_columns}
+
+    fields: List[pa.Field] = []
+    for field in inferred:
+        arrow_type = None
+        if field.name in sql_types:
+            arrow_type = _sql_type_to_arrow(sql_types[field.name])
+        fields.append(pa.field(field.name, arrow_type or field.type))
+
+    return pa.schema(fields)
+
+
+def _fill_null_fields(schema: pa.Schema, other: pa.Schema) -> pa.Schema:
+    """Replace the null-typed fields of a schema by those of another schema.
+
+    Parameters
+    ----------
+    schema
+        Schema whose null-typed fields are replaced.
+    other
+        Schema with the same fields, e.g., inferred from another batch.
+
+    Returns
+    -------
+    pyarrow.Schema
+        The schema, with types from the other schema where it had none.
+
+    """
+    return pa.schema(
+        [
+            other.field(field.name) if pa.types.is_null(field.type) else field
+            for field in schema
+        ]
+    )
+
+
+def _null_fields_to_string(schema: pa.Schema) -> Tuple[List[str], pa.Schema]:
+    """Replace the null-typed fields of a schema, which were never inferred.
+
+    Parameters
+    ----------
+    schema
+        Schema with possibly null-typed fields.
+
+    Returns
+    -------
+    tuple
+        Names of the replaced fields, and the schema with these as strings.
+
+    """
+    names = [field.name for field in schema if pa.types.is_null(field.type)]
+    fields = [pa.field(field.name, pa.string()) for field in schema]
+
+    return names, _fill_null_fields(schema, pa.schema(fields))
 
 
 class Database:
@@ -53,7 +544,19 @@ class Database:
         SQL extraction engine.
     inspector: sqlalchemy.engine.reflection.Inspector
         Module for schema inspection.
-    session: sqlalchemy.orm.session.Session
+    cache: cyclops.query.cache.QueryCache, optional
+        On-disk cache of query results, used if a cache directory is configured.
+    dtype_options: cyclops.query.dtypes.DtypeOptions, optional
+        Options to compact the data types of query results from the Pandas
+        backend, used if 'compact_dtypes' is configured.
+    compile_stats: cyclops.query.orm.CompileStats
+        Compilation statistics of the queries run into DataFrames.
+    _materialized: dict
+        Tables created by materialize or upload_table, by name, which are owned
+        by this object.
+    _owner_id: str
+        Random identifier, which makes default names of materialized tables
+        unique to this object.
 
     """
 
@@ -67,74 +570,269 @@ class Database:
 
         """
         self.config = config
-
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(SOCKET_CONNECTION_TIMEOUT)
-        try:
-            is_port_open = sock.connect_ex((self.config.host, self.config.port))
-        except socket.gaierror:
-            LOGGER.error("""Server name not known, cannot establish connection!""")
-            return
-        if is_port_open:
-            LOGGER.error(
-                """Valid server host but port seems open, check if server is up!"""
+        self.cache = None
+        self._materialized: Dict[str, Table] = {}
+        self._owner_id = uuid.uuid4().hex[:8]
+        self.compile_stats = CompileStats()
+        self._stats_lock = threading.Lock()
+        self.dtype_options = None
+        if config.get("compact_dtypes"):
+            self.dtype_options = DtypeOptions(
+                category_max_ratio=config.get("category_max_ratio", 0.5),
+                downcast_ints=config.get("downcast_ints", True),
+                min_int_bits=config.get("min_int_bits", 32),
+                float32=config.get("float32", False),
+            )
+        if config.get("cache_dir"):
+            self.cache = QueryCache(
+                config.cache_dir,
+                max_bytes=config.get("cache_max_bytes"),
+                ttl=config.get("cache_ttl"),
             )
-            return
-
-        self.engine = self._create_engine()
-        self.session = self._create_session()
-        self._setup()
-        LOGGER.info("Database setup, ready to run queries!")
 
-    def _create_engine(self) -> Engine:
-        """Create an engine."""
-        self.conn = _get_db_url(
-            self.config.dbms,
-            self.config.user,
-            self.config.password,
-            self.config.host,
-            self.config.port,
-            self.config.database,
-        )
-        engine = create_engine(
-            _get_db_url(
+        # Local databases over a Parquet snapshot need no server.
+        is_local = config.dbms in LOCAL_DBMS and bool(config.get("data_dir"))
+        if is_local:
+            self.conn = self._get_local_db_url()
+        else:
+            self.conn = _get_db_url(
                 self.config.dbms,
                 self.config.user,
                 self.config.password,
                 self.config.host,
                 self.config.port,
                 self.config.database,
-            ),
-        )
-        return engine
+            )
+        # An engine already in the registry has connected before, so the
+        # server does not need to be probed again.
+        is_registered = _is_engine_registered(self.conn, self._pool_options())
+        if not is_local and not is_registered:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(SOCKET_CONNECTION_TIMEOUT)
+            try:
+                is_port_open = sock.connect_ex((self.config.host, self.config.port))
+            except socket.gaierror:
+                LOGGER.error("""Server name not known, cannot establish connection!""")
+                return
+            finally:
+                sock.close()
+            if is_port_open:
+                LOGGER.error(
+                    """Valid server host but port seems open, check if server is up!"""
+                )
+                return
 
-    def _create_session(self) -> Session:
-        """Create session."""
+        self.engine = get_engine(self.conn, **self._pool_options())
+        if is_local and not is_registered:
+            if config.dbms == "sqlite":
+                attach_sqlite_schemas(self.engine, self._sqlite_db_paths)
+            else:
+                register_duckdb_views(self.engine, config.data_dir)
         self.inspector = inspect(self.engine)
+        # Drop materialized tables left over once this object is discarded.
+        weakref.finalize(self, _drop_tables, self.engine, self._materialized)
+        self._setup()
+        LOGGER.info("Database setup, ready to run queries!")
+
+    def _get_local_db_url(self) -> str:
+        """Prepare a local database over the configured Parquet snapshot.
+
+        With SQLite, the snapshot is loaded into database files, one per
+        schema, which are attached to each connection. With DuckDB, the
+        snapshot's tables are registered as views when the engine is created.
 
-        # Create a session for using ORM.
-        session = sessionmaker(self.engine)
-        session.configure(bind=self.engine)
-        return session()
+        Returns
+        -------
+        str
+            Database URL.
+
+        """
+        db_dir = self.config.get("local_db_dir") or join(
+            self.config.data_dir, LOCAL_DB_DIR
+        )
+        os.makedirs(db_dir, exist_ok=True)
+        if self.config.dbms == "sqlite":
+            self._sqlite_db_paths = build_sqlite_schemas(self.config.data_dir, db_dir)
+            return f"sqlite:///{join(db_dir, SQLITE_MAIN_SCHEMA + '.db')}"
+
+        if importlib.util.find_spec("duckdb_engine") is None:
+            raise ImportError(
+                "The DuckDB backend requires the duckdb and duckdb-engine packages, "
+                "installed with pip install pycyclops[duckdb]."
+            )
+
+        return f"duckdb:///{join(db_dir, 'snapshot.duckdb')}"
+
+    def _pool_options(self) -> Dict[str, Any]:
+        """Get the connection pool options from the configuration."""
+        options = {
+            "pool_pre_ping": self.config.get("pool_pre_ping", True),
+            "pool_recycle": self.config.get("pool_recycle", -1),
+        }
+        # SQLite and DuckDB use pools which do not accept size options.
+        if self.config.dbms not in LOCAL_DBMS:
+            options["pool_size"] = self.config.get("pool_size", 5)
+            options["max_overflow"] = self.config.get("max_overflow", 10)
+
+        return options
 
     def _setup(self):
-        """Prepare ORM DB."""
-        meta: dict = {}
-        schemas = self.inspector.get_schema_names()
-        for schema_name in schemas:
-            metadata = MetaData(schema=schema_name)
-            metadata.reflect(bind=self.engine)
-            meta[schema_name] = metadata
-            schema = DBSchema(schema_name, meta[schema_name])
-            for table_name in meta[schema_name].tables:
-                table = DBTable(table_name, meta[schema_name].tables[table_name])
-                for column in meta[schema_name].tables[table_name].columns:
-                    setattr(table, column.name, column)
-                if not isinstance(table.name, str):
-                    table.name = str(table.name)
-                setattr(schema, _get_attr_name(table.name), table)
+        """Prepare ORM DB.
+
+        Tables are reflected lazily, on first access through their schema.
+        Tables of a DuckDB snapshot are defined from their Parquet files instead.
+
+        """
+        self._metadata_cache_loaded: set = set()
+        if self.engine.dialect.name == "duckdb" and self.config.get("data_dir"):
+            for schema_name, metadata in define_parquet_tables(
+                self.config.data_dir
+            ).items():
+                schema = DBSchema(
+                    schema_name,
+                    metadata,
+                    reflect_fn=partial(self._reflect_table, schema_name),
+                )
+                setattr(self, schema_name, schema)
+            return
+
+        for schema_name in self.inspector.get_schema_names():
+            schema = DBSchema(
+                schema_name,
+                MetaData(schema=schema_name),
+                reflect_fn=partial(self._reflect_table, schema_name),
+            )
             setattr(self, schema_name, schema)
 
+    def _reflect_table(self, schema_name: str, table_name: str) -> Optional[DBTable]:
+        """Reflect a table, using the metadata cache if configured.
+
+        Parameters
+        ----------
+        schema_name
+            Name of the schema.
+        table_name
+            Name of the table.
+
+        Returns
+        -------
+        cyclops.query.util.DBTable, optional
+            The reflected table, or None if the table does not exist.
+
+        """
+        schema = getattr(self, schema_name)
+        if self.config.get("metadata_cache_dir"):
+            self._load_cached_metadata(schema)
+
+        key = f"{schema_name}.{table_name}"
+        if key not in schema.data.tables:
+            try:
+                Table(table_name, schema.data, autoload_with=self.engine)
+            except NoSuchTableError:
+                return None
+            if self.config.get("metadata_cache_dir"):
+                self._save_cached_metadata(schema)
+
+        table = DBTable(key, schema.data.tables[key])
+        for column in table.data.columns:
+            setattr(table, column.name, column)
+
+        return table
+
+    def _get_schema_fingerprint(self, schema_name: str) -> str:
+        """Get a fingerprint of the structure of a schema.
+
+        The fingerprint changes when tables or columns in the schema change,
+        and is cheap to compute compared to reflecting the schema.
+
+        Parameters
+        ----------
+        schema_name
+            Name of the schema.
+
+        Returns
+        -------
+        str
+            Schema fingerprint.
+
+        """
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            query = text(
+                "SELECT table_name, column_name, data_type, is_nullable "
+                "FROM information_schema.columns WHERE table_schema = :schema "
+                "ORDER BY table_name, ordinal_position"
+            ).bindparams(schema=schema_name)
+        elif dialect == "sqlite":
+            quoted_schema = self.engine.dialect.identifier_preparer.quote(schema_name)
+            query = text(
+                f"SELECT name, sql FROM {quoted_schema}.sqlite_master ORDER BY name"
+            )
+        else:
+            query = None
+
+        if query is None:
+            rows = sorted(self.inspector.get_table_names(schema=schema_name))
+        else:
+            with self.engine.connect() as conn:
+                rows = [tuple(row) for row in conn.execute(query)]
+
+        return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+    def _metadata_cache_path(self, schema_name: str) -> str:
+        """Get the path of the cached metadata of a schema."""
+        return join(self.config.metadata_cache_dir, f"{schema_name}.pkl")
+
+    def _load_cached_metadata(self, schema: DBSchema) -> None:
+        """Load the cached metadata of a schema, unless stale or already loaded.
+
+        Parameters
+        ----------
+        schema
+            Schema for which to load the cached metadata.
+
+        """
+        if schema.name in self._metadata_cache_loaded:
+            return
+        self._metadata_cache_loaded.add(schema.name)
+
+        path = self._metadata_cache_path(schema.name)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as file_descriptor:
+                cached = pickle.load(file_descriptor)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            LOGGER.warning("Could not load cached metadata of %s.", schema.name)
+            return
+
+        if cached["fingerprint"] != self._get_schema_fingerprint(schema.name):
+            LOGGER.info("Schema %s changed, ignoring cached metadata.", schema.name)
+            return
+        schema.data = cached["metadata"]
+
+    def _save_cached_metadata(self, schema: DBSchema) -> None:
+        """Save the metadata of a schema to the metadata cache.
+
+        Parameters
+        ----------
+        schema
+            Schema whose metadata to save.
+
+        """
+        os.makedirs(self.config.metadata_cache_dir, exist_ok=True)
+        path = self._metadata_cache_path(schema.name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file_descriptor:
+            pickle.dump(
+                {
+                    "fingerprint": self._get_schema_fingerprint(schema.name),
+                    "metadata": schema.data,
+                },
+                file_descriptor,
+            )
+        os.replace(tmp_path, path)
+
     @time_function
     @table_params_to_type(Select)
     def run_query(
@@ -144,9 +842,15 @@ class Database:
         backend: Literal["pandas", "dask"] = "pandas",
         index_col: Optional[str] = None,
         n_partitions: Optional[int] = None,
+        use_cache: bool = True,
+        timings: Optional[Dict[str, float]] = None,
     ) -> Union[pd.DataFrame, dd.DataFrame]:
         """Run query.
 
+        If a result cache is configured, results of the Pandas backend are
+        looked up in, and saved to, the cache. If 'compact_dtypes' is
+        configured, their data types are compacted, see dtype_options.
+
         Parameters
         ----------
         query
@@ -160,6 +864,12 @@ class Database:
             Should be a indexed column in the SQL server, and any orderable type.
         n_partitions
             Number of partitions. Check dask documentation for additional details.
+        use_cache
+            Whether to use the result cache, if configured.
+        timings
+            If given, updated in place with the time in seconds spent on each
+            step of running the query, i.e., 'compile', 'execute', 'fetch',
+            'build' and 'compact' for the Pandas backend.
 
         Returns
         -------
@@ -177,32 +887,548 @@ class Database:
         if limit is not None:
             query = query.limit(limit)  # type: ignore
 
+        dtype_options = None
+        if self.dtype_options is not None and backend == "pandas":
+            dtype_options = asdict(self.dtype_options)
+
+        cache_key = None
+        if use_cache and self.cache is not None and backend == "pandas":
+            cache_key = get_cache_key(
+                query, self.engine, index_col=index_col, dtypes=dtype_options
+            )
+            start_time = time.perf_counter()
+            data = self.cache.get(cache_key)
+            if data is not None:
+                if timings is not None:
+                    timings["cache"] = time.perf_counter() - start_time
+                LOGGER.info("Query result loaded from cache!")
+                return data
+
         # Run the query and return the results.
-        with self.session.connection():
-            if backend == "pandas":
-                data = pd.read_sql_query(query, self.engine, index_col=index_col)
-            elif backend == "dask":
-                data = dd.read_sql_query(
-                    query, self.conn, index_col=index_col, npartitions=n_partitions
+        if backend == "pandas":
+            data = self._read_query(query, index_col=index_col, timings=timings)
+        elif backend == "dask":
+            if get_values_tables(query):
+                LOGGER.warning(
+                    "Dask cannot load temporary tables of values, so the values "
+                    "are inlined in the query instead."
                 )
-                data = data.reset_index(drop=False)
-            else:
-                raise ValueError("Invalid backend, can either be Pandas or Dask!")
+                query = inline_values_tables(query)
+            if get_values_tables(query):
+                raise ValueError(
+                    "Queries using uploaded temporary tables cannot be run "
+                    "with Dask, use Pandas!"
+                )
+            start_time = time.perf_counter()
+            data = dd.read_sql_query(
+                query, self.conn, index_col=index_col, npartitions=n_partitions
+            )
+            data = data.reset_index(drop=False)
+            if timings is not None:
+                timings["execute"] = time.perf_counter() - start_time
+        else:
+            raise ValueError("Invalid backend, can either be Pandas or Dask!")
         LOGGER.info("Query returned successfully!")
 
+        if dtype_options is not None:
+            start_time = time.perf_counter()
+            data = self._compact_dtypes(query, data)
+            if timings is not None:
+                timings["compact"] = time.perf_counter() - start_time
+
+        if cache_key is not None:
+            self.cache.put(cache_key, data)  # type: ignore
+
+        return data
+
+    def _compile_to_driver_sql(
+        self, query: Union[TableTypes, str]
+    ) -> Tuple[str, Union[Dict, Tuple]]:
+        """Compile a query to SQL and parameters for the database driver.
+
+        Parameters
+        ----------
+        query
+            Query to compile.
+
+        Returns
+        -------
+        tuple
+            The SQL, and its parameters in the driver's parameter style.
+
+        """
+        if isinstance(query, str):
+            return query, {}
+
+        compiled = _to_select(query).compile(
+            dialect=self.engine.dialect,
+            compile_kwargs={"render_postcompile": True},
+        )
+        params = compiled.params
+        if compiled.positional:
+            return str(compiled), tuple(params[name] for name in compiled.positiontup)
+
+        return str(compiled), params
+
+    def _replace_table(self, conn: Connection, table: Table, key: str) -> None:
+        """Drop a table created by this object before it is created again.
+
+        Parameters
+        ----------
+        conn
+            Connection on which to drop the table.
+        table
+            Table which will be created.
+        key
+            Name of the table, qualified by its schema if any.
+
+        Raises
+        ------
+        ValueError
+            If the table exists, but was not created by this object, as it may
+            be a table of the database, or used by another querier.
+
+        """
+        if key in self._materialized:
+            self._materialized.pop(key).drop(conn, checkfirst=True)
+        elif inspect(conn).has_table(table.name, schema=table.schema):
+            raise ValueError(
+                f"Table {key} already exists, and was not created by this "
+                "querier, so it is not replaced. Use another name."
+            )
+
+    def materialize(self, query: TableTypes, name: Optional[str] = None) -> Subquery:
+        """Run a query once into a table, which other queries can then use.
+
+        The table is an unlogged table on PostgreSQL, which skips the
+        write-ahead log, and is analyzed so the planner has statistics for it.
+        It is created in the schema configured as 'materialize_schema', or the
+        default schema, and remains until dropped with drop_materialized, or
+        until this object is garbage collected or the interpreter exits.
+        Materializing the same query again reuses the table.
+
+        Tables are owned by the object creating them, so default names are
+        unique to it, and only tables it created are replaced or dropped.
+
+        Parameters
+        ----------
+        query
+            Query to materialize.
+        name
+            Name of the table. Defaults to a name derived from the query.
+            A table of this name is only replaced if created by this object.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Subquery selecting from the table.
+
+        Raises
+        ------
+        ValueError
+            If a table of this name exists, but was not created by this object.
+
+        """
+        query = _to_select(query)
+        sql, params = self._compile_to_driver_sql(query)
+        digest = hashlib.sha256(f"{sql}{params!r}".encode("utf-8")).hexdigest()
+        if name is None:
+            name = f"{MATERIALIZED_TABLE_PREFIX}{self._owner_id}_{digest[:16]}"
+
+        schema = self.config.get("materialize_schema")
+        key = name if schema is None else f"{schema}.{name}"
+        table = self._materialized.get(key)
+        if table is None or table.info.get("digest") != digest:
+            table = Table(
+                name,
+                MetaData(schema=schema),
+                *[Column(col.name, col.type) for col in query.selected_columns],
+                info={"digest": digest},
+            )
+            table_name = self.engine.dialect.identifier_preparer.format_table(table)
+            is_postgresql = self.engine.dialect.name == "postgresql"
+            with self.connect(query) as conn, conn.begin():
+                self._replace_table(conn, table, key)
+                unlogged = "UNLOGGED " if is_postgresql else ""
+                conn.exec_driver_sql(
+                    f"CREATE {unlogged}TABLE {table_name} AS {sql}", params
+                )
+                if is_postgresql:
+                    conn.exec_driver_sql(f"ANALYZE {table_name}")
+            self._materialized[key] = table
+            LOGGER.info("Query materialized into table %s!", table_name)
+
+        return select(table).subquery()
+
+    def upload_table(
+        self,
+        data: pd.DataFrame,
+        name: str,
+        temporary: bool = True,
+        batch_size: int = 10000,
+    ) -> Subquery:
+        """Upload a DataFrame into a table, which queries can join against.
+
+        This lets a cohort built client-side filter large tables in the
+        database, e.g., using cyclops.query.ops.Join. The data is loaded using
+        COPY on PostgreSQL, and batched inserts otherwise.
+
+        A temporary table is only visible to the connection creating it, so
+        it is created and loaded on each connection running a query using it,
+        and dropped afterwards, see connect. Otherwise, the table is created
+        once, in the schema configured as 'materialize_schema', or the default
+        schema, and remains until dropped with drop_materialized, or until this
+        object is garbage collected or the interpreter exits.
+
+        Parameters
+        ----------
+        data
+            Data to upload. The column types are derived from its dtypes.
+        name
+            Name of the table. An existing, non-temporary table of this name
+            is only replaced if created by this object.
+        temporary
+            Whether to upload into a temporary table.
+        batch_size
+            Number of rows inserted at a time, when not using COPY.
+
+        Returns
+        -------
+        sqlalchemy.sql.selectable.Subquery
+            Subquery selecting from the table.
+
+        Raises
+        ------
+        ValueError
+            If a non-temporary table of this name exists, but was not created
+            by this object.
+
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
+        data = data.reset_index(drop=True)
+        columns = [
+            Column(field.name, _arrow_to_sql_type(field.type))
+            for field in pa.Schema.from_pandas(data, preserve_index=False)
+        ]
+        # Identifies the data in cache keys of queries using the table.
+        digest = hashlib.sha256(
+            repr(list(data.columns)).encode("utf-8")
+            + pd.util.hash_pandas_object(data, index=False).values.tobytes()
+        ).hexdigest()
+
+        if temporary:
+            table = Table(
+                name,
+                MetaData(),
+                *columns,
+                prefixes=["TEMPORARY"],
+                info={"data": data, "batch_size": batch_size, "digest": digest},
+            )
+            return select(table).subquery()
+
+        schema = self.config.get("materialize_schema")
+        key = name if schema is None else f"{schema}.{name}"
+        table = Table(name, MetaData(schema=schema), *columns, info={"digest": digest})
+        with self.engine.begin() as conn:
+            self._replace_table(conn, table, key)
+            table.create(conn)
+            _load_dataframe(conn, table, data, batch_size)
+            if self.engine.dialect.name == "postgresql":
+                table_name = self.engine.dialect.identifier_preparer.format_table(table)
+                conn.exec_driver_sql(f"ANALYZE {table_name}")
+        self._materialized[key] = table
+        LOGGER.info("Uploaded %d rows into table %s!", len(data), name)
+
+        return select(table).subquery()
+
+    def drop_materialized(self) -> None:
+        """Drop all tables created by materialize or upload_table of this object."""
+        if not self._materialized:
+            return
+        with self.engine.begin() as conn:
+            for table in self._materialized.values():
+                table.drop(conn, checkfirst=True)
+        self._materialized.clear()
+
+    def _compact_dtypes(
+        self, query: Union[TableTypes, str], data: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Compact the data types of a query result, logging the memory saved.
+
+        Parameters
+        ----------
+        query
+            Query which returned the data, whose column types guide compaction.
+        data
+            Query result.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Query result with compact data types.
+
+        """
+        sql_types = None
+        if not isinstance(query, str):
+            sql_types = {
+                col.name: col.type for col in _to_select(query).selected_columns
+            }
+        memory_before = data.memory_usage(index=True, deep=True).sum()
+        data = compact_dtypes(data, sql_types=sql_types, options=self.dtype_options)
+        memory_after = data.memory_usage(index=True, deep=True).sum()
+        LOGGER.info(
+            "Compacted data types, reducing memory use from %.1f MB to %.1f MB.",
+            memory_before / 2**20,
+            memory_after / 2**20,
+        )
+
+        return data
+
+    @contextmanager
+    def connect(self, *queries: Any) -> Generator[Connection, None, None]:
+        """Check out a connection on which the given queries can be run.
+
+        Temporary tables of values referenced by the queries, as created by
+        cyclops.query.util.values_table, are created and loaded on the
+        connection, and dropped afterwards. On PostgreSQL, values are loaded
+        using COPY.
+
+        Parameters
+        ----------
+        *queries
+            Queries which will be run on the connection.
+
+        Yields
+        ------
+        sqlalchemy.engine.Connection
+            The connection.
+
+        """
+        tables = []
+        for query in queries:
+            if isinstance(query, DBTable):
+                query = query.data
+            if isinstance(query, ClauseElement):
+                tables.extend(get_values_tables(query))
+
+        with self.engine.connect() as conn:
+            try:
+                for table in tables:
+                    table.create(conn, checkfirst=True)
+                    _load_values_table(conn, table)
+                yield conn
+            finally:
+                for table in tables:
+                    table.drop(conn, checkfirst=True)
+
+    def _execute(
+        self, conn: Connection, statement: ClauseElement, timings: Dict[str, float]
+    ) -> CursorResult:
+        """Execute a statement, timing its compilation and execution separately.
+
+        The statement is compiled, or its compiled form looked up in the
+        engine's compiled cache, as part of the execution. The cursor is only
+        called once it is compiled, so the time until then is compile time.
+
+        Parameters
+        ----------
+        conn
+            Connection on which to execute the statement.
+        statement
+            Statement to execute.
+        timings
+            Updated in place with the time in seconds spent compiling the
+            statement and executing it.
+
+        Returns
+        -------
+        sqlalchemy.engine.CursorResult
+            Result of the execution.
+
+        """
+        compiled_times = []
+
+        def _on_cursor_execute(*_: Any) -> None:
+            compiled_times.append(time.perf_counter())
+
+        event.listen(conn, "before_cursor_execute", _on_cursor_execute)
+        try:
+            start_time = time.perf_counter()
+            result = conn.execute(statement)
+            end_time = time.perf_counter()
+        finally:
+            event.remove(conn, "before_cursor_execute", _on_cursor_execute)
+
+        compiled_time = compiled_times[0] if compiled_times else end_time
+        timings["compile"] = compiled_time - start_time
+        timings["execute"] = end_time - compiled_time
+
+        is_cache_hit = result.context.cache_hit == conn.dialect.CACHE_HIT
+        with self._stats_lock:
+            if is_cache_hit:
+                self.compile_stats.cache_hits += 1
+            else:
+                self.compile_stats.compiles += 1
+            self.compile_stats.compile_time += timings["compile"]
+
+        return result
+
+    def _read_query(
+        self,
+        query: Union[Select, str],
+        index_col: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> pd.DataFrame:
+        """Run a query into a Pandas DataFrame, timing each step.
+
+        Parameters
+        ----------
+        query
+            Query to run.
+        index_col
+            Column which becomes the index.
+        timings
+            If given, updated in place with the time in seconds spent compiling
+            the query, executing it, fetching the rows and building the DataFrame.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Extracted data from query.
+
+        """
+        if timings is None:
+            timings = {}
+        statement = text(query) if isinstance(query, str) else query
+
+        with self.connect(statement) as conn:
+            result = self._execute(conn, statement, timings)
+
+            start_time = time.perf_counter()
+            columns = list(result.keys())
+            rows = result.fetchall()
+            timings["fetch"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        data = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+        # As in pandas.read_sql_query, convert timezone-aware columns to UTC.
+        for col in data.columns:
+            if isinstance(data[col].dtype, pd.DatetimeTZDtype):
+                data[col] = data[col].dt.tz_convert("UTC")
+        if index_col is not None:
+            data = data.set_index(index_col)
+        timings["build"] = time.perf_counter() - start_time
+
         return data
 
+    def explain(
+        self, query: Union[TableTypes, str], analyze: bool = False
+    ) -> pd.DataFrame:
+        """Get the plan of a query from the database's EXPLAIN statement.
+
+        PostgreSQL and SQLite are supported. SQLite does not estimate costs or
+        row counts, so those columns are null for SQLite.
+
+        Parameters
+        ----------
+        query
+            Query to explain.
+        analyze
+            Whether to also run the query and report the actual row counts and
+            times. Only supported for PostgreSQL.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The plan, with one row per plan node in depth-first order, and
+            columns 'depth', 'node', 'relation', 'estimated_rows',
+            'estimated_cost', 'actual_rows' and 'actual_time'.
+
+        """
+        dialect = self.engine.dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            raise ValueError(f"EXPLAIN is not supported for the {dialect} dialect.")
+        if analyze and dialect != "postgresql":
+            raise ValueError("EXPLAIN ANALYZE is only supported for PostgreSQL.")
+
+        sql, params = self._compile_to_driver_sql(query)
+        with self.connect(query) as conn:
+            if dialect == "postgresql":
+                options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+                plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {sql}", params)
+                nodes = _flatten_postgresql_plan(plan.scalar()[0]["Plan"])
+            else:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)
+                nodes = _flatten_sqlite_plan(plan.fetchall())
+
+        return pd.DataFrame(nodes, columns=EXPLAIN_COLUMNS)
+
+    @table_params_to_type(Select)
+    def yield_query_batches(
+        self,
+        query: Union[TableTypes, str],
+        batch_size: int,
+        limit: Optional[int] = None,
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Run query, yielding the results in batches.
+
+        The rows are streamed using a server-side cursor, so only one batch
+        of rows is held in memory at a time, regardless of the result size.
+
+        Parameters
+        ----------
+        query
+            Query to run.
+        batch_size
+            Maximum number of rows in each yielded batch.
+        limit
+            Limit query result to limit.
+
+        Yields
+        ------
+        pandas.DataFrame
+            A batch of the extracted data.
+
+        """
+        if isinstance(query, str) and limit is not None:
+            raise ValueError(
+                "Cannot use limit argument when running raw SQL string query!"
+            )
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
+        if limit is not None:
+            query = query.limit(limit)  # type: ignore
+
+        with self.connect(query) as conn:
+            conn = conn.execution_options(
+                stream_results=True, max_row_buffer=batch_size
+            )
+            for batch in pd.read_sql_query(query, conn, chunksize=batch_size):
+                yield batch
+
     @time_function
     @table_params_to_type(Select)
-    def save_query_to_csv(self, query: TableTypes, path: str) -> str:
+    def save_query_to_csv(
+        self, query: TableTypes, path: str, batch_size: int = 100000
+    ) -> str:
         """Save query in a .csv format.
 
+        On PostgreSQL, the server writes the CSV using COPY, which is streamed
+        straight to the file, so the rows are never handled in Python. Values
+        are then formatted as by PostgreSQL, e.g., booleans as 't' and 'f'.
+        Other dialects stream the rows in batches to a CSV writer. The number
+        of rows and the throughput are logged.
+
         Parameters
         ----------
         query
             Query to save.
         path
             Save path.
+        batch_size
+            Number of rows fetched from the database at a time, when not
+            using COPY.
 
         Returns
         -------
@@ -210,28 +1436,68 @@ class Database:
             Processed save path for upstream use.
 
         """
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
         path = process_file_save_path(path, "csv")
 
-        with self.session.connection():
-            result = self.engine.execute(query)
-            with open(path, "w", encoding="utf-8") as file_descriptor:
-                outcsv = csv.writer(file_descriptor)
-                outcsv.writerow(result.keys())
-                outcsv.writerows(result)
+        start_time = time.perf_counter()
+        with self.connect(query) as conn:
+            if conn.dialect.name == "postgresql":
+                sql, params = self._compile_to_driver_sql(query)
+                n_rows = _copy_query_to_csv(
+                    conn, sql, None if isinstance(query, str) else params, path
+                )
+            else:
+                n_rows = _write_query_to_csv(conn, query, path, batch_size)
+        seconds = max(time.perf_counter() - start_time, 1e-9)
+
+        megabytes = os.path.getsize(path) / 2**20
+        rows = (
+            "" if n_rows is None else f"{n_rows} rows, {n_rows / seconds:.0f} rows/s, "
+        )
+        LOGGER.info(
+            "Saved query to %s in %.2f s: %s%.1f MB, %.1f MB/s.",
+            path,
+            seconds,
+            rows,
+            megabytes,
+            megabytes / seconds,
+        )
 
         return path
 
     @time_function
     @table_params_to_type(Select)
-    def save_query_to_parquet(self, query: TableTypes, path: str) -> str:
+    def save_query_to_parquet(  # pylint: disable=too-many-arguments
+        self,
+        query: TableTypes,
+        path: str,
+        batch_size: int = 100000,
+        row_group_size: Optional[int] = None,
+        compression: str = "snappy",
+    ) -> str:
         """Save query in a .parquet format.
 
+        The query result is streamed from the database in batches, which are
+        written directly to the Parquet file, so the full result is never
+        held in memory. The Parquet schema is derived from the column types
+        of the query. Columns without a known type, e.g., of raw SQL string
+        queries, are inferred from the first batch in which they are not all
+        null, or written as strings if still all null after a few batches.
+
         Parameters
         ----------
         query
             Query to save.
         path
             Save path.
+        batch_size
+            Number of rows fetched from the database at a time.
+        row_group_size
+            Maximum number of rows in each Parquet row group. Defaults to
+            the batch size.
+        compression
+            Parquet compression codec, e.g., "snappy", "gzip", "zstd" or "none".
 
         Returns
         -------
@@ -241,11 +1507,49 @@ class Database:
         """
         path = process_file_save_path(path, "parquet")
 
-        # Save to CSV, load with pyarrow, save to Parquet
-        csv_path = exchange_extension(path, "csv")
-        self.save_query_to_csv(query, csv_path)
-        table = pv.read_csv(csv_path)
-        os.remove(csv_path)
-        pq.write_table(table, path)
+        # Batches are held back while columns are all null, so their type can
+        # be inferred from a later batch, up to a limit after which they are
+        # written as strings.
+        schema = None
+        pending: List[pd.DataFrame] = []
+        string_cols: List[str] = []
+        writer = None
+
+        def write(batch: pd.DataFrame) -> None:
+            for col in string_cols:
+                batch[col] = batch[col].astype("string")
+            writer.write_table(
+                pa.Table.from_pandas(batch, schema=schema, preserve_index=False),
+                row_group_size=row_group_size,
+            )
+
+        try:
+            for batch in self.yield_query_batches(query, batch_size):
+                if writer is not None:
+                    write(batch)
+                    continue
+                batch_schema = _get_arrow_schema(query, batch)
+                schema = (
+                    batch_schema
+                    if schema is None
+                    else _fill_null_fields(schema, batch_schema)
+                )
+                pending.append(batch)
+                is_inferred = not any(pa.types.is_null(field.type) for field in schema)
+                if is_inferred or len(pending) >= SCHEMA_INFERENCE_MAX_BATCHES:
+                    string_cols, schema = _null_fields_to_string(schema)
+                    writer = pq.ParquetWriter(path, schema, compression=compression)
+                    for pending_batch in pending:
+                        write(pending_batch)
+                    pending = []
+
+            if writer is None and schema is not None:
+                string_cols, schema = _null_fields_to_string(schema)
+                writer = pq.ParquetWriter(path, schema, compression=compression)
+                for pending_batch in pending:
+                    write(pending_batch)
+        finally:
+            if writer is not None:
+                writer.close()
 
         return path
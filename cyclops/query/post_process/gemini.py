@@ -1,5 +1,7 @@
 """Post-processing functions applied to queried GEMINI data (Pandas DataFrames)."""
 
+from typing import Optional
+
 import pandas as pd
 
 from cyclops.query.post_process.util import process_care_unit_changepoints
@@ -19,7 +21,9 @@ CARE_UNIT_HIERARCHY = [
 ]
 
 
-def process_gemini_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
+def process_gemini_care_unit_changepoints(
+    data: pd.DataFrame, encounter_col: Optional[str] = None
+) -> pd.DataFrame:
     """Process GEMINI changepoint care unit information in a hierarchical fashion.
 
     Using the admit, discharge, and care unit information, create a
@@ -30,10 +34,11 @@ def process_gemini_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
     Parameters
     ----------
     data: pandas.DataFrame
-        The admit, discharge, and care unit information for a single encounter.
+        The admit, discharge, and care unit information of one or more encounters.
         Expects columns "admit", "discharge", and CARE_UNIT.
-    care_unit_hierarchy: list
-        Ordered list of care units from most relevant to to least.
+    encounter_col: str, optional
+        Column identifying the encounters. If None, all rows belong to a
+        single encounter.
 
     Returns
     -------
@@ -41,4 +46,6 @@ def process_gemini_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
         Changepoint information with associated care unit.
 
     """
-    return process_care_unit_changepoints(data, CARE_UNIT_HIERARCHY)
+    return process_care_unit_changepoints(
+        data, CARE_UNIT_HIERARCHY, encounter_col=encounter_col
+    )
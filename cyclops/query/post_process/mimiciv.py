@@ -1,5 +1,7 @@
 """Post-processing functions applied to queried MIMIC data (Pandas DataFrames)."""
 
+from typing import Optional
+
 import pandas as pd
 
 from cyclops.process.column_names import CARE_UNIT
@@ -77,7 +79,9 @@ NONSPECIFIC_CARE_UNIT_MAP = {
 CARE_UNIT_HIERARCHY = [ER, ICU, SCU, IP]
 
 
-def process_mimic_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
+def process_mimic_care_unit_changepoints(
+    data: pd.DataFrame, encounter_col: Optional[str] = None
+) -> pd.DataFrame:
     """Process MIMIC changepoint care unit information in a hierarchical fashion.
 
     Using the admit, discharge, and care unit information, create a
@@ -88,8 +92,11 @@ def process_mimic_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
     Parameters
     ----------
     data: pandas.DataFrame
-        The admit, discharge, and care unit information for a single encounter.
+        The admit, discharge, and care unit information of one or more encounters.
         Expects columns "admit", "discharge", and CARE_UNIT.
+    encounter_col: str, optional
+        Column identifying the encounters. If None, all rows belong to a
+        single encounter.
 
     Returns
     -------
@@ -97,7 +104,9 @@ def process_mimic_care_unit_changepoints(data: pd.DataFrame) -> pd.DataFrame:
         Changepoint information with associated care unit.
 
     """
-    return process_care_unit_changepoints(data, CARE_UNIT_HIERARCHY)
+    return process_care_unit_changepoints(
+        data, CARE_UNIT_HIERARCHY, encounter_col=encounter_col
+    )
 
 
 @time_function
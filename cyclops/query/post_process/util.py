@@ -1,6 +1,6 @@
 """Post-processing functions applied to queried data (Pandas DataFrames)."""
 
-from typing import Union
+from typing import Optional, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -125,7 +125,9 @@ def plot_admit_discharge(
 
 
 def process_care_unit_changepoints(
-    data: pd.DataFrame, care_unit_hierarchy: list
+    data: pd.DataFrame,
+    care_unit_hierarchy: list,
+    encounter_col: Optional[str] = None,
 ) -> pd.DataFrame:
     """Process changepoint care unit information in a hierarchical fashion.
 
@@ -134,56 +136,98 @@ def process_care_unit_changepoints(
     If a patient is in multiple care units at a changepoint, the care
     unit highest in the hierarchy is selected.
 
+    The admit and discharge times of all encounters are sorted once, and swept
+    in order, keeping count of the active stays in each care unit of the
+    hierarchy, so many encounters are processed at once, without a groupby-apply.
+
     Parameters
     ----------
     data: pandas.DataFrame
-        The admit, discharge, and care unit information for a single encounter.
-        Expects columns "admit", "discharge", and CARE_UNIT.
+        The admit, discharge, and care unit information of one or more encounters.
+        Expects columns "admit", "discharge", and CARE_UNIT. Rows with a missing
+        admit or discharge time are ignored.
     care_unit_hierarchy: list
         Ordered list of care units from most relevant to to least.
+    encounter_col: str, optional
+        Column identifying the encounters. If None, all rows belong to a
+        single encounter.
 
     Returns
     -------
     pandas.DataFrame
-        Changepoint information with associated care unit. The care unit
-        information is relevant up until the next change point
+        Changepoint information with associated care unit, and the encounter
+        if encounter_col is given. The care unit information is relevant up
+        until the next change point of the encounter.
 
     """
-    # Define mapping dictionaries
-    hierarchy = {care_unit_hierarchy[i]: i for i in range(len(care_unit_hierarchy))}
-    hierarchy_inv = {i: care_unit_hierarchy[i] for i in range(len(care_unit_hierarchy))}
-
-    # Create changepoints
-    changepoints = pd.concat([data["admit"], data["discharge"]])
-    changepoints.sort_values(inplace=True)
-    changepoints = changepoints.unique()
-
-    # Remove the final changepoint, which is the final discharge (has no careunit)
-    changepoints = changepoints[:-1]
-
-    # Select the most relevant care unit for each changepoint
-    changepoint_data = []
-    for changepoint in changepoints:
-        is_between = event_time_between(
-            changepoint,
-            data["admit"],
-            data["discharge"],
-            admit_inclusive=True,
-            discharge_inclusive=False,
-        )
-        care_units = data[is_between][CARE_UNIT].unique()
-        if len(care_units) > 0:
-            care_unit_inds = list(map(lambda x: hierarchy[x], care_units))
-            care_unit_selected = hierarchy_inv[min(care_unit_inds)]
-        else:
-            care_unit_selected = np.nan
-        changepoint_data.append([changepoint, care_unit_selected])
-
-    checkpoint_df = pd.DataFrame(changepoint_data, columns={"changepoint", "care_unit"})
-
-    # Remove consequtive duplicates, i.e., remove a changepoint if the
-    # previous changepoint has the same care unit
-    change_mask = checkpoint_df["care_unit"] != checkpoint_df["care_unit"].shift(-1)
-
-    checkpoint_df = checkpoint_df[change_mask]
-    return checkpoint_df
+    cols = ["admit", "discharge", CARE_UNIT]
+    if encounter_col is not None:
+        cols.append(encounter_col)
+    has_columns(data, cols, raise_error=True)
+
+    ranks = pd.Categorical(data[CARE_UNIT], categories=care_unit_hierarchy).codes
+    if (ranks == -1).any():
+        unknown = data[CARE_UNIT][ranks == -1].unique().tolist()
+        raise ValueError(f"Care units {unknown} are not in the care unit hierarchy.")
+
+    if encounter_col is None:
+        encounters = np.zeros(len(data), dtype=np.int64)
+        encounter_ids = None
+    else:
+        encounters, encounter_ids = pd.factorize(data[encounter_col], sort=True)
+
+    admit = to_timestamp(data["admit"]).reset_index(drop=True)
+    discharge = to_timestamp(data["discharge"]).reset_index(drop=True)
+    valid = (admit.notna() & discharge.notna()).to_numpy() & (encounters != -1)
+    admit, discharge = admit[valid], discharge[valid]
+
+    # Boundary events: a stay is active from its admit (inclusive) to its
+    # discharge (exclusive). Stays ending before they start are never active,
+    # but their times remain changepoints.
+    times = pd.concat([admit, discharge], ignore_index=True)
+    is_stay = (admit < discharge).to_numpy().astype(np.int64)
+    deltas = np.concatenate([is_stay, -is_stay])
+    ranks = np.tile(ranks[valid], 2)
+    encounters = np.tile(encounters[valid], 2)
+
+    order = np.lexsort((times.values.view("int64"), encounters))
+    deltas, ranks, encounters = deltas[order], ranks[order], encounters[order]
+    time_values = times.values.view("int64")[order]
+
+    # The stays of an encounter all end within it, so the running count of
+    # active stays per care unit needs no reset between encounters. Sweeping
+    # from the least to the most relevant care unit leaves the most relevant.
+    selected = np.full(len(order), -1, dtype=np.int64)
+    for rank in np.unique(ranks)[::-1]:
+        active = np.cumsum(np.where(ranks == rank, deltas, 0)) > 0
+        selected[active] = rank
+
+    # The state after the last event at each time of each encounter, except
+    # the encounter's final discharge, which has no care unit.
+    new_encounter = np.ones(len(order), dtype=bool)
+    new_encounter[:-1] = encounters[1:] != encounters[:-1]
+    is_last = new_encounter.copy()
+    is_last[:-1] |= time_values[1:] != time_values[:-1]
+    changepoints = np.flatnonzero(is_last & ~new_encounter)
+    selected, encounters = selected[changepoints], encounters[changepoints]
+
+    # Remove a changepoint if the previous changepoint has the same care unit.
+    is_change = np.ones(len(changepoints), dtype=bool)
+    is_change[1:] = (encounters[1:] != encounters[:-1]) | (
+        selected[1:] != selected[:-1]
+    )
+    changepoints = changepoints[is_change]
+    selected, encounters = selected[is_change], encounters[is_change]
+
+    # Changepoints without an active stay select the trailing null care unit.
+    care_units = np.array(list(care_unit_hierarchy) + [np.nan], dtype=object)
+    changepoint_data = pd.DataFrame(
+        {
+            "changepoint": times.take(order[changepoints]).reset_index(drop=True),
+            CARE_UNIT: care_units[selected],
+        }
+    )
+    if encounter_col is not None:
+        changepoint_data.insert(0, encounter_col, encounter_ids.take(encounters))
+
+    return changepoint_data
@@ -3,18 +3,40 @@
 # mypy: ignore-errors
 # pylint: disable=too-many-lines
 
+import hashlib
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from functools import wraps
 from typing import Any, Callable, List, Optional, Union
 
 import sqlalchemy
-from sqlalchemy import cast, func, select
-from sqlalchemy.sql.elements import BinaryExpression
+from sqlalchemy import MetaData, cast, func, select
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import (
+    BinaryExpression,
+    ColumnElement,
+    FunctionFilter,
+    Label,
+    Over,
+    WithinGroup,
+)
 from sqlalchemy.sql.expression import ColumnClause
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.sql.schema import Column, Table
-from sqlalchemy.sql.selectable import Select, Subquery
-from sqlalchemy.types import Boolean, Date, DateTime, Float, Integer, Interval, String
+from sqlalchemy.sql.selectable import Join, ScalarSelect, Select, Subquery, TableSample
+from sqlalchemy.types import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    Interval,
+    String,
+)
 
 from cyclops.utils.common import to_list, to_list_optional
 from cyclops.utils.log import setup_logging
@@ -24,6 +46,11 @@ LOGGER = logging.getLogger(__name__)
 setup_logging(print_level="INFO", logger=LOGGER)
 
 COLUMN_OBJECTS = [Column, ColumnClause]
+VALUES_TABLE_PREFIX = "cyclops_values_"
+# Multiplicative hashing of values for sampling. The multiplier is the modulus
+# divided by the golden ratio, which spreads consecutive values, e.g., IDs, evenly.
+SAMPLE_HASH_MODULUS = 2147483647
+SAMPLE_HASH_MULTIPLIER = 1327217885
 
 
 @dataclass
@@ -36,11 +63,31 @@ class DBSchema:
         Name of schema.
     data: sqlalchemy.sql.schema.MetaData
         Metadata for schema.
+    reflect_fn: Callable, optional
+        Function taking a table name and returning the reflected DBTable, or
+        None if no such table exists. If given, tables are reflected lazily,
+        on first attribute access.
 
     """
 
     name: str
     data: sqlalchemy.sql.schema.MetaData
+    reflect_fn: Optional[Callable] = field(default=None, repr=False)
+
+    def __getattr__(self, name: str) -> "DBTable":
+        """Reflect a table on first access, if reflecting lazily."""
+        reflect_fn = self.__dict__.get("reflect_fn")
+        if name.startswith("_") or reflect_fn is None:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+
+        table = reflect_fn(name)
+        if table is None:
+            raise AttributeError(f"Schema '{self.name}' has no table '{name}'")
+        setattr(self, name, table)
+
+        return table
 
 
 @dataclass
@@ -972,6 +1019,253 @@ def in_(
     )
 
 
+def _infer_values_type(values: List[Any]) -> sqlalchemy.types.TypeEngine:
+    """Infer the SQL type of a list of values from the first non-null value."""
+    value = next((value for value in values if value is not None), None)
+    if isinstance(value, bool):
+        return Boolean()
+    if isinstance(value, int):
+        return BigInteger()
+    if isinstance(value, float):
+        return Float()
+    if isinstance(value, datetime):
+        return DateTime()
+    if isinstance(value, date):
+        return Date()
+
+    return String()
+
+
+def values_table(values: List[Any]) -> Table:
+    """Define a temporary table holding a list of values.
+
+    The table is not created here. Its values are kept in the table's info
+    dictionary, and the table is created and loaded on the connection which
+    runs a query referencing it, see cyclops.query.orm.Database.connect.
+    The table name is derived from the values, so equal lists give equal
+    queries.
+
+    Parameters
+    ----------
+    values: list of any
+        Values, which are deduplicated.
+
+    Returns
+    -------
+    sqlalchemy.sql.schema.Table
+        Table with a single 'value' column.
+
+    """
+    values = list(dict.fromkeys(values))
+    digest = hashlib.sha256(repr(values).encode("utf-8")).hexdigest()[:16]
+
+    return Table(
+        VALUES_TABLE_PREFIX + digest,
+        MetaData(),
+        Column("value", _infer_values_type(values)),
+        prefixes=["TEMPORARY"],
+        info={"values": values},
+    )
+
+
+def get_values_tables(query: Any) -> List[Table]:
+    """Get the temporary tables of values referenced in a query.
+
+    Parameters
+    ----------
+    query: any
+        Query, or any other SQLAlchemy clause.
+
+    Returns
+    -------
+    list of sqlalchemy.sql.schema.Table
+        The tables, as defined by cyclops.query.util.values_table, or
+        temporary tables uploaded by cyclops.query.orm.Database.upload_table.
+
+    """
+    tables = {}
+    for elem in visitors.iterate(query):
+        if isinstance(elem, Table) and ("values" in elem.info or "data" in elem.info):
+            tables[elem.name] = elem
+
+    return list(tables.values())
+
+
+def in_table(
+    col: Column, lst: List[Any], lower: bool = True, trim: bool = True, **kwargs: bool
+) -> BinaryExpression:
+    """Condition that a column value is in a list of values, held in a table.
+
+    Equivalent to cyclops.query.util.in_, but rather than inlining the values
+    in the SQL, they are loaded into a temporary table, against which a
+    semi-join is performed. This is much faster for long lists of values.
+
+    Parameters
+    ----------
+    col : sqlalchemy.sql.schema.Column
+        The column to condition.
+    lst : list of any
+        The values.
+    lower : bool, default=True
+        Whether to convert the value and column to lowercase.
+        This is only relevant when the column/value are strings.
+    trim : bool, default=True
+        Whether to trim (strip) whitespace on the value and column.
+        This is only relevant when the column/value are strings.
+    **kwargs : dict, optional
+        Remaining preprocessing keyword arguments.
+
+    Returns
+    -------
+    sqlalchemy.sql.elements.BinaryExpression
+        An expression representing where the condition was satisfied.
+
+    """
+    table = values_table(process_list(lst, lower=lower, trim=trim, **kwargs))
+
+    return process_column(col, lower=lower, trim=trim, **kwargs).in_(
+        select(table.c.value)
+    )
+
+
+def inline_values_tables(query: Any) -> Any:
+    """Inline the values of temporary tables of values in a query.
+
+    Reverses cyclops.query.util.in_table, for queries which are run without a
+    connection on which the tables can be loaded.
+
+    Parameters
+    ----------
+    query: any
+        Query, or any other SQLAlchemy clause.
+
+    Returns
+    -------
+    any
+        The query, with conditions on tables defined by
+        cyclops.query.util.values_table replaced by inlined IN conditions.
+
+    """
+
+    def replace(elem: Any) -> Optional[BinaryExpression]:
+        if not (
+            isinstance(elem, BinaryExpression)
+            and elem.operator in (operators.in_op, operators.not_in_op)
+            and isinstance(elem.right, ScalarSelect)
+        ):
+            return None
+        tables = get_values_tables(elem.right)
+        if len(tables) != 1 or "values" not in tables[0].info:
+            return None
+        values = tables[0].info["values"]
+        if elem.operator is operators.not_in_op:
+            return elem.left.not_in(values)
+
+        return elem.left.in_(values)
+
+    return visitors.replacement_traverse(query, {}, replace)
+
+
+class RandomFraction(FunctionElement):  # pylint: disable=too-many-ancestors
+    """Random number, uniformly distributed in [0, 1), drawn for each row.
+
+    SQLite's random() returns a 64-bit integer, which is rescaled.
+
+    """
+
+    type = Float()
+    name = "random_fraction"
+    inherit_cache = True
+
+
+@compiles(RandomFraction)
+def _compile_random_fraction(element, compiler, **kwargs):
+    return "random()"
+
+
+@compiles(RandomFraction, "sqlite")
+def _compile_random_fraction_sqlite(element, compiler, **kwargs):
+    return "(abs(random() % 1000000) / 1000000.0)"
+
+
+class TextHash(FunctionElement):  # pylint: disable=too-many-ancestors
+    """Non-negative integer hash of the text of a value.
+
+    Supported on PostgreSQL and DuckDB.
+
+    """
+
+    type = BigInteger()
+    name = "text_hash"
+    inherit_cache = True
+
+
+@compiles(TextHash)
+def _compile_text_hash(element, compiler, **kwargs):
+    raise CompileError(
+        f"Hashing text is not supported for the {compiler.dialect.name} dialect, "
+        "use an integer column."
+    )
+
+
+@compiles(TextHash, "postgresql")
+def _compile_text_hash_postgresql(element, compiler, **kwargs):
+    value = compiler.process(element.clauses, **kwargs)
+    return f"('x' || substr(md5(CAST({value} AS TEXT)), 1, 8))::bit(32)::bigint"
+
+
+@compiles(TextHash, "duckdb")
+def _compile_text_hash_duckdb(element, compiler, **kwargs):
+    value = compiler.process(element.clauses, **kwargs)
+    return f"(hash(CAST({value} AS VARCHAR)) % 4294967296)"
+
+
+@compiles(TableSample, "sqlite")
+@compiles(TableSample, "duckdb")
+def _compile_tablesample_fallback(element, compiler, **kwargs):
+    # Without TABLESAMPLE, rows are filtered on a random number, ignoring any
+    # seed. The sampling function's argument is the percentage of rows.
+    percent = list(element.sampling.clauses)[0].effective_value
+    sampled = (
+        select(element.element)
+        .where(RandomFraction() < percent / 100)
+        .subquery(element.name)
+    )
+    return compiler.process(sampled, **{**kwargs, "asfrom": True})
+
+
+def hash_fraction(col: Column, seed: int = 0) -> ColumnElement:
+    """Hash the values of a column to numbers in [0, 1).
+
+    Equal values hash to the same number, so conditioning the hash on a
+    threshold deterministically samples the same values, e.g., encounter IDs,
+    on every run and across tables. Integers are hashed using arithmetic on
+    any dialect, other types using their text, on PostgreSQL and DuckDB.
+
+    Parameters
+    ----------
+    col : sqlalchemy.sql.schema.Column
+        The column to hash.
+    seed : int, default=0
+        Seed, changing the hash of each value.
+
+    Returns
+    -------
+    sqlalchemy.sql.elements.ColumnElement
+        The hash.
+
+    """
+    col = cast(col, BigInteger) if isinstance(col.type, Integer) else TextHash(col)
+    value = func.abs(col + seed if seed else col) % SAMPLE_HASH_MODULUS
+
+    return (
+        value
+        * SAMPLE_HASH_MULTIPLIER
+        % SAMPLE_HASH_MODULUS
+        / float(SAMPLE_HASH_MODULUS)
+    )
+
+
 def _check_column_type(
     table: TableTypes,
     cols: Union[str, List[str]],
@@ -1107,3 +1401,248 @@ def get_delta_column(
         combined_interval_col = combined_interval_col + interval_cols[i]
 
     return combined_interval_col
+
+
+# Functions which must not be merged into an outer query, since they aggregate
+# rows, or would return different values if evaluated more than once.
+UNMERGEABLE_FUNCTIONS = {
+    "array_agg",
+    "avg",
+    "bool_and",
+    "bool_or",
+    "count",
+    "every",
+    "json_agg",
+    "max",
+    "min",
+    "mode",
+    "percentile_cont",
+    "percentile_disc",
+    "random",
+    "stddev",
+    "string_agg",
+    "sum",
+    "variance",
+}
+
+
+def _is_mergeable(stmt: Select) -> bool:
+    """Check whether a subquery's statement can be merged into an outer query.
+
+    Only statements which project and filter rows can be merged, i.e., those
+    without grouping, ordering, limits, DISTINCT, aggregates or window functions.
+
+    Parameters
+    ----------
+    stmt: sqlalchemy.sql.selectable.Select
+        The subquery's statement.
+
+    Returns
+    -------
+    bool
+        Whether the statement can be merged.
+
+    """
+    # pylint: disable=protected-access
+    if (
+        stmt._group_by_clauses
+        or stmt._having_criteria
+        or stmt._order_by_clauses
+        or stmt._limit_clause is not None
+        or stmt._offset_clause is not None
+        or stmt._fetch_clause is not None
+        or stmt._distinct
+        or stmt._distinct_on
+        or stmt._prefixes
+        or stmt._suffixes
+    ):
+        return False
+
+    for col in stmt.selected_columns:
+        for elem in visitors.iterate(col):
+            if isinstance(elem, (Over, WithinGroup, FunctionFilter)):
+                return False
+            if (
+                isinstance(elem, FunctionElement)
+                and getattr(elem, "name", "").lower() in UNMERGEABLE_FUNCTIONS
+            ):
+                return False
+
+    return True
+
+
+def _is_select_subquery(from_: Any) -> bool:
+    """Check whether a FROM clause element is a subquery of a SELECT statement."""
+    return type(
+        from_
+    ) is Subquery and isinstance(  # pylint: disable=unidiomatic-typecheck
+        from_.element, Select
+    )
+
+
+def _flatten_from(from_: Any, replacements: dict) -> Any:
+    """Flatten the subqueries in a FROM clause element, including joined ones.
+
+    Parameters
+    ----------
+    from_: sqlalchemy.sql.selectable.FromClause
+        FROM clause element.
+    replacements: dict
+        Updated in place to map the ids of the replaced elements and columns
+        to their replacements.
+
+    Returns
+    -------
+    sqlalchemy.sql.selectable.FromClause
+        The flattened element.
+
+    """
+    if isinstance(from_, Join):
+        left = _flatten_from(from_.left, replacements)
+        right = _flatten_from(from_.right, replacements)
+        onclause = visitors.replacement_traverse(
+            from_.onclause, {}, lambda elem: replacements.get(id(elem))
+        )
+        flattened = left.join(right, onclause, isouter=from_.isouter, full=from_.full)
+    elif _is_select_subquery(from_):
+        flattened = _flatten_select(from_.element).subquery(from_.name)
+        for col, flattened_col in zip(from_.c, flattened.c):
+            replacements[id(col)] = flattened_col
+    else:
+        return from_
+
+    replacements[id(from_)] = flattened
+
+    return flattened
+
+
+def _replace_subqueries(stmt: Select, replacements: dict) -> Select:
+    """Replace subqueries, and references to their columns, in a statement.
+
+    Parameters
+    ----------
+    stmt: sqlalchemy.sql.selectable.Select
+        Statement in which to replace subqueries.
+    replacements: dict
+        Maps the ids of subqueries and their columns to their replacements.
+
+    Returns
+    -------
+    sqlalchemy.sql.selectable.Select
+        Statement with replaced subqueries.
+
+    """
+    if not replacements:
+        return stmt
+
+    return visitors.replacement_traverse(
+        stmt, {}, lambda elem: replacements.get(id(elem))
+    )
+
+
+def _merge_subquery(stmt: Select, subquery: Subquery) -> Select:
+    """Merge the only subquery in a statement's FROM clause into the statement.
+
+    Parameters
+    ----------
+    stmt: sqlalchemy.sql.selectable.Select
+        Statement selecting from the subquery.
+    subquery: sqlalchemy.sql.selectable.Subquery
+        Mergeable subquery.
+
+    Returns
+    -------
+    sqlalchemy.sql.selectable.Select
+        Equivalent statement without the subquery.
+
+    """
+    inner = subquery.element
+    replacements = {}
+    for col, inner_col in zip(subquery.c, inner.selected_columns):
+        replacements[id(col)] = (
+            inner_col.element if isinstance(inner_col, Label) else inner_col
+        )
+
+    # Replace all references in a single pass, then restore the output names
+    # of the replaced columns.
+    merged = _replace_subqueries(stmt, replacements)
+    columns = []
+    for col, new_col in zip(stmt.selected_columns, merged.selected_columns):
+        name = getattr(col, "name", None)
+        if name is not None and getattr(new_col, "name", None) != name:
+            new_col = new_col.label(name)
+        columns.append(new_col)
+
+    merged = merged.with_only_columns(*columns)
+    merged = merged.select_from(*inner.get_final_froms())
+    if inner.whereclause is not None:
+        merged = merged.where(inner.whereclause)
+
+    # The subquery cannot be merged if it is still referenced.
+    if subquery in merged.get_final_froms():
+        return stmt
+
+    return merged
+
+
+def _flatten_select(stmt: Select) -> Select:
+    """Flatten the nested subqueries of a statement, where possible.
+
+    Parameters
+    ----------
+    stmt: sqlalchemy.sql.selectable.Select
+        Statement to flatten.
+
+    Returns
+    -------
+    sqlalchemy.sql.selectable.Select
+        Equivalent statement.
+
+    """
+    # Select the columns explicitly, rather than whole subqueries or joins,
+    # such that each column can be replaced.
+    joins = [from_ for from_ in stmt.columns_clause_froms if isinstance(from_, Join)]
+    stmt = stmt.with_only_columns(*stmt.selected_columns).select_from(*joins)
+
+    # Flatten the subqueries in the FROM clause, e.g., both sides of a join.
+    replacements: dict = {}
+    for from_ in stmt.get_final_froms():
+        _flatten_from(from_, replacements)
+    stmt = _replace_subqueries(stmt, replacements)
+
+    # Merge a single subquery, which is now flat, into this statement.
+    froms = stmt.get_final_froms()
+    if (
+        len(froms) == 1
+        and _is_select_subquery(froms[0])
+        and _is_mergeable(froms[0].element)
+    ):
+        stmt = _merge_subquery(stmt, froms[0])
+
+    return stmt
+
+
+@table_params_to_type(Subquery)
+def flatten_subqueries(table: TableTypes) -> Subquery:
+    """Flatten the nested subqueries created by chained query operations.
+
+    Consecutive projections, renames and filters are merged into a single
+    SELECT statement, which reduces compile time and can help query planners.
+    Subqueries with grouping, ordering, limits, DISTINCT, aggregates or window
+    functions are kept, as is.
+
+    Parameters
+    ----------
+    table: cyclops.query.util.TableTypes
+        Table to flatten.
+
+    Returns
+    -------
+    sqlalchemy.sql.selectable.Subquery
+        Equivalent, flattened table.
+
+    """
+    if not isinstance(table.element, Select):
+        return table
+
+    return _flatten_select(table.element).subquery()
@@ -0,0 +1,64 @@
+"""Test sparse.py."""
+
+import numpy as np
+import pytest
+
+from cyclops.process.feature.sparse import SparseData
+
+
+@pytest.fixture
+def dense_data():
+    """Dense data, mostly null, with an explicit zero."""
+    data = np.full((2, 3, 4), np.nan)
+    data[0, 0, 1] = 1.0
+    data[0, 2, 3] = 0.0
+    data[1, 1, 0] = 3.0
+    data[1, 2, 2] = 4.0
+    return data
+
+
+def test_from_dense(dense_data):  # pylint: disable=redefined-outer-name
+    """Test creating sparse data from dense data, and back."""
+    data = SparseData.from_dense(dense_data)
+    assert data.shape == (2, 3, 4)
+    assert data.ndim == 3
+    assert data.matrix.shape == (6, 4)
+    assert data.matrix.nnz == 4
+    assert np.array_equal(data.toarray(), dense_data, equal_nan=True)
+
+    with pytest.raises(ValueError):
+        SparseData.from_dense(np.zeros(3))
+    with pytest.raises(ValueError):
+        SparseData(data.matrix, (3, 3, 4))
+
+
+def test_from_coordinates(dense_data):  # pylint: disable=redefined-outer-name
+    """Test creating sparse data from unordered coordinates."""
+    data = SparseData.from_coordinates(
+        np.array([5, 0, 4, 2]),
+        np.array([2, 1, 0, 3]),
+        np.array([4.0, 1.0, 3.0, 0.0]),
+        (2, 3, 4),
+    )
+    assert np.array_equal(data.toarray(), dense_data, equal_nan=True)
+
+
+def test_index_codes(dense_data):  # pylint: disable=redefined-outer-name
+    """Test getting the index along an axis of each stored value."""
+    data = SparseData.from_dense(dense_data)
+    assert data.index_codes(0).tolist() == [0, 0, 1, 1]
+    assert data.index_codes(1).tolist() == [0, 2, 1, 2]
+    assert data.index_codes(2).tolist() == [1, 3, 0, 2]
+    assert data.values.tolist() == [1.0, 0.0, 3.0, 4.0]
+
+
+def test_take(dense_data):  # pylint: disable=redefined-outer-name
+    """Test taking indices along each axis."""
+    data = SparseData.from_dense(dense_data)
+    for axis in range(3):
+        indices = [2, 0] if axis else [1]
+        assert np.array_equal(
+            data.take(indices, axis).toarray(),
+            np.take(dense_data, indices, axis=axis),
+            equal_nan=True,
+        )
@@ -293,6 +293,53 @@ def test_vectorized_normalizer_subset(  # pylint: disable=redefined-outer-name
     vec_out.normalize()
 
 
+def test_sparse(  # pylint: disable=redefined-outer-name
+    input_data,
+):
+    """Test Vectorized with sparse data."""
+    data, indexes = input_data
+    data = data.astype(float)
+    data[0, 1, :] = np.nan
+    data[1, 0, 2] = np.nan
+    data[1, 1, 0] = 0
+    dense = Vectorized(data, indexes, ["A", "B", "C"])
+    sparse = dense.to_sparse()
+    assert sparse.is_sparse and not dense.is_sparse
+    assert sparse.shape == dense.shape
+    assert sparse.data.matrix.nnz == 8
+    assert np.array_equal(sparse.to_dense().data, data, equal_nan=True)
+
+    # Take and split over the time and non-time axes
+    for axis, indices in [("A", [1]), ("B", [1, 0]), ("C", [2, 0])]:
+        assert np.array_equal(
+            sparse.take_with_indices(axis, indices).to_dense().data,
+            dense.take_with_indices(axis, indices).data,
+            equal_nan=True,
+        )
+    vec_in, vec_out = sparse.split_out("B", ["1-0"])
+    assert vec_in.is_sparse and vec_out.is_sparse
+    assert list(vec_out.get_index("B")) == ["1-0"]
+    assert np.array_equal(vec_out.to_dense().data, data[:, :1], equal_nan=True)
+
+    # Normalize only the stored values, as done for dense data
+    for vec in [dense, sparse]:
+        vec.add_normalizer("B", normalization_method=STANDARD)
+        vec.fit_normalizer()
+        vec.normalize()
+    assert np.allclose(sparse.to_dense().data, dense.data, equal_nan=True)
+
+    # Densify batch by batch
+    batches = list(sparse.yield_dense_batches("A", 1))
+    assert [batch.shape for batch in batches] == [(1, 2, 3), (1, 2, 3)]
+    assert not batches[0].is_sparse and batches[0].is_normalized
+    assert np.allclose(
+        np.concatenate([batch.data for batch in batches]), dense.data, equal_nan=True
+    )
+
+    with pytest.raises(NotImplementedError):
+        sparse.swap_axes("A", "C")
+
+
 def test_concat_over_axis():
     """Test Vectorized method concat_over_axis."""
     # Use this format to test the concatentation
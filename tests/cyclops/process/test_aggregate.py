@@ -1,13 +1,16 @@
 """Test aggregation functions."""
 
+import multiprocessing
+import os
 from datetime import datetime
+from functools import partial
 
 import numpy as np
 import pandas as pd
 import pytest
 from pandas import Timestamp
 
-from cyclops.process.aggregate import AGGFUNCS, Aggregator
+from cyclops.process.aggregate import AGGFUNCS, Aggregator, aggregate_partitions
 from cyclops.process.column_names import (
     ENCOUNTER_ID,
     EVENT_NAME,
@@ -19,7 +22,9 @@ from cyclops.process.column_names import (
     STOP_TIMESTAMP,
     TIMESTEP,
 )
-from cyclops.process.constants import MEAN, MEDIAN
+from cyclops.process.constants import FFILL, MEAN, MEDIAN
+from cyclops.process.impute import AggregatedImputer, SeriesImputer, TabularImputer
+from cyclops.query.dtypes import compact_dtypes
 
 DATE1 = datetime(2022, 11, 3, hour=13)
 DATE2 = datetime(2022, 11, 3, hour=14)
@@ -27,6 +32,11 @@ DATE3 = datetime(2022, 11, 4, hour=3)
 DATE4 = datetime(2022, 11, 4, hour=13)
 
 
+def keep_events(events, event_names):
+    """Keep the events with one of some names."""
+    return events[events[EVENT_NAME].isin(event_names)]
+
+
 @pytest.fixture
 def test_input():
     """Create a test events input."""
@@ -226,6 +236,65 @@ def test_aggregate_multiple(  # pylint: disable=redefined-outer-name
     assert res["event_value2"].equals(res[EVENT_VALUE] * 2)
 
 
+def test_aggregate_intra_imputation(  # pylint: disable=redefined-outer-name
+    test_input,
+):
+    """Test imputation within timesteps, with aggregation metadata."""
+    data, _, _ = test_input
+
+    for imputefunc in [MEAN, FFILL]:
+        aggregator = Aggregator(
+            aggfuncs={EVENT_VALUE: lambda series: series.count()},
+            timestamp_col=EVENT_TIMESTAMP,
+            time_by=ENCOUNTER_ID,
+            agg_by=[ENCOUNTER_ID, EVENT_NAME],
+            timestep_size=1,
+            imputer=AggregatedImputer(
+                intra_imputer=TabularImputer({EVENT_VALUE: SeriesImputer(imputefunc)})
+            ),
+            agg_meta_for=EVENT_VALUE,
+        )
+        res = aggregator(data)
+
+        assert res.loc[(2, "eventA", 14)][EVENT_VALUE] == 3
+        assert res.loc[(2, "eventB", 14)][EVENT_VALUE] == 2
+        assert res.loc[(2, "eventB", 0)][EVENT_VALUE] == 0
+        assert res.loc[(2, "eventA", 14)][
+            EVENT_VALUE + "_null_fraction"
+        ] == pytest.approx(1 / 3)
+        assert res.loc[(2, "eventB", 14)][EVENT_VALUE + "_count"] == 2
+
+
+def test_aggregate_compact_dtypes(  # pylint: disable=redefined-outer-name
+    test_input,
+):
+    """Test aggregating query results with compacted, e.g., categorical, dtypes."""
+    data, _, _ = test_input
+    compacted = compact_dtypes(data)
+    assert compacted[EVENT_NAME].dtype == "category"
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+        window_duration=15,
+        agg_meta_for=EVENT_VALUE,
+    )
+    expected = aggregator(data)
+    res = aggregator(compacted)
+
+    # Unobserved combinations of categories are not aggregated.
+    assert len(res) == len(expected)
+    pd.testing.assert_frame_equal(
+        res.reset_index().astype({ENCOUNTER_ID: int, EVENT_NAME: object}),
+        expected.reset_index(),
+    )
+    vectorized = aggregator.vectorize(res)
+    assert vectorized.data.shape == aggregator.vectorize(expected).data.shape
+
+
 def test_aggregate_one_group_outlier():
     """Test very specific one group outlier case (currently still broken).
 
@@ -293,6 +362,75 @@ def test_aggregate_one_group_outlier():
     )
 
 
+def test_aggregate_one_group_outlier_meta():
+    """Test the one group outlier case, with aggregation metadata.
+
+    If only one group in the agg_by and the timesteps form a range, e.g., 0-N,
+    then the agg_by columns and TIMESTEP were once dropped and an index range
+    returned.
+
+    """
+    data = pd.DataFrame(
+        {
+            ENCOUNTER_ID: [0, 0, 0, 0],
+            EVENT_NAME: ["eventA"] * 4,
+            EVENT_VALUE: [10.0, np.nan, 12.0, 13.0],
+            EVENT_TIMESTAMP: pd.date_range("2022-11-03 14:00", periods=4, freq="H"),
+            "some_str_col": ["wash"] * 4,
+        }
+    )
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+        agg_meta_for=EVENT_VALUE,
+    )
+    res = aggregator(data)
+
+    assert res.index.names == [ENCOUNTER_ID, EVENT_NAME, TIMESTEP]
+    assert res.index.get_level_values(TIMESTEP).tolist() == [0, 1, 2]
+    assert res[EVENT_VALUE + "_count"].tolist() == [1, 1, 1]
+    assert res[EVENT_VALUE + "_null_fraction"].tolist() == [0.0, 1.0, 0.0]
+
+
+def test_aggregate_meta_row_order():
+    """Test rows aggregated with metadata are ordered by agg_by group first."""
+    data = pd.DataFrame(
+        {
+            ENCOUNTER_ID: [1, 1, 1, 1, 1],
+            EVENT_NAME: ["eventA", "eventB", "eventA", "eventB", "eventA"],
+            EVENT_VALUE: [1.0, 2.0, 3.0, np.nan, 5.0],
+            EVENT_TIMESTAMP: [DATE1, DATE1, DATE2, DATE2, DATE3],
+        }
+    )
+    kwargs = {
+        "aggfuncs": {EVENT_VALUE: MEAN},
+        "timestamp_col": EVENT_TIMESTAMP,
+        "time_by": ENCOUNTER_ID,
+        "agg_by": [ENCOUNTER_ID, EVENT_NAME],
+        "timestep_size": 1,
+    }
+    res = Aggregator(**kwargs, agg_meta_for=EVENT_VALUE)(data)
+    assert res.index.tolist() == [
+        (1, "eventA", 0),
+        (1, "eventA", 1),
+        (1, "eventB", 0),
+        (1, "eventB", 1),
+    ]
+
+    # Without metadata or imputation, rows are in the order first seen.
+    res = Aggregator(**kwargs)(data)
+    assert res.index.tolist() == [
+        (1, "eventA", 0),
+        (1, "eventB", 0),
+        (1, "eventA", 1),
+        (1, "eventB", 1),
+    ]
+
+
 def test_vectorization(  # pylint: disable=redefined-outer-name
     test_input,
 ):
@@ -337,3 +475,156 @@ def test_vectorization(  # pylint: disable=redefined-outer-name
         vectorized[list(agg_col_index).index("event_value3")],
         equal_nan=True,
     )
+
+
+def test_aggregate_timesteps_interleaved():
+    """Test timesteps of interleaved encounters, at and around bin boundaries."""
+    data = pd.DataFrame(
+        {
+            ENCOUNTER_ID: [2, 1, 2, 1, 2],
+            EVENT_NAME: ["eventA"] * 5,
+            EVENT_VALUE: [1, 2, 3, 4, 5],
+            EVENT_TIMESTAMP: [
+                DATE1,
+                DATE2,
+                DATE1 + pd.Timedelta(hours=2),
+                DATE2 + pd.Timedelta(hours=2, microseconds=-1),
+                DATE1 + pd.Timedelta(hours=4, microseconds=1),
+            ],
+        }
+    )
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=2,
+    )
+    res = aggregator(data)
+
+    # The window of each encounter stops at its last event, which is excluded.
+    assert res.index.get_level_values(ENCOUNTER_ID).tolist() == [1, 2, 2]
+    assert res.index.get_level_values(TIMESTEP).tolist() == [0, 0, 1]
+    assert res[EVENT_VALUE].tolist() == [2, 1, 3]
+
+
+def test_vectorization_out(  # pylint: disable=redefined-outer-name
+    test_input, tmp_path
+):
+    """Test vectorization into a given data type, memory-mapped or sparse output."""
+    data, _, _ = test_input
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+        window_duration=15,
+    )
+    aggregated = aggregator(data)
+    expected = aggregator.vectorize(aggregated).data
+
+    vectorized = aggregator.vectorize(aggregated, dtype="float32")
+    assert vectorized.data.dtype == np.float32
+    assert np.array_equal(vectorized.data, expected, equal_nan=True)
+
+    out = np.lib.format.open_memmap(
+        str(tmp_path / "vectorized.npy"),
+        mode="w+",
+        dtype=np.float32,
+        shape=expected.shape,
+    )
+    vectorized = aggregator.vectorize(aggregated, out=out)
+    assert vectorized.data is out
+    out.flush()
+    assert np.array_equal(
+        np.load(str(tmp_path / "vectorized.npy")), expected, equal_nan=True
+    )
+
+    with pytest.raises(ValueError):
+        aggregator.vectorize(aggregated, out=np.empty((1, 2, 2, 14)))
+
+    vectorized = aggregator.vectorize(aggregated, sparse=True)
+    assert vectorized.is_sparse
+    assert vectorized.data.matrix.nnz == np.count_nonzero(~np.isnan(expected))
+    assert np.array_equal(vectorized.to_dense().data, expected, equal_nan=True)
+
+
+def test_aggregate_partitions(  # pylint: disable=redefined-outer-name
+    test_input, tmp_path
+):
+    """Test aggregating partitioned event files on a pool of processes."""
+    data, window_start_time, _ = test_input
+    input_dir = tmp_path / "events"
+    os.makedirs(input_dir / "nested")
+    data[data[ENCOUNTER_ID] == 1].to_parquet(input_dir / "batch_0000.parquet")
+    data[data[ENCOUNTER_ID] == 2].to_parquet(
+        input_dir / "nested" / "batch_0001.parquet"
+    )
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+    )
+    output_dir = str(tmp_path / "aggregated")
+    output_paths = aggregate_partitions(
+        aggregator,
+        str(input_dir),
+        output_dir,
+        window_start_time=window_start_time,
+        num_workers=2,
+    )
+
+    assert output_paths == [
+        os.path.join(output_dir, "batch_0000.parquet"),
+        os.path.join(output_dir, "nested", "batch_0001.parquet"),
+    ]
+    aggregated = pd.concat([pd.read_parquet(path) for path in output_paths])
+    expected = aggregator(data, window_start_time=window_start_time)
+    pd.testing.assert_frame_equal(aggregated.sort_index(), expected.sort_index())
+
+    # Partitions which were already aggregated are skipped.
+    mtimes = [os.stat(path).st_mtime_ns for path in output_paths]
+    os.remove(output_paths[1])
+    aggregate_partitions(aggregator, str(input_dir), output_dir, num_workers=1)
+    assert os.stat(output_paths[0]).st_mtime_ns == mtimes[0]
+    assert os.path.exists(output_paths[1])
+
+
+def test_aggregate_partitions_spawn(  # pylint: disable=redefined-outer-name
+    test_input, tmp_path
+):
+    """Test aggregating partitions on processes started with spawn."""
+    data, window_start_time, _ = test_input
+    input_dir = tmp_path / "events"
+    os.makedirs(input_dir)
+    data[data[ENCOUNTER_ID] == 1].to_parquet(input_dir / "batch_0000.parquet")
+    data[data[ENCOUNTER_ID] == 2].to_parquet(input_dir / "batch_0001.parquet")
+
+    aggregator = Aggregator(
+        aggfuncs={EVENT_VALUE: MEAN},
+        timestamp_col=EVENT_TIMESTAMP,
+        time_by=ENCOUNTER_ID,
+        agg_by=[ENCOUNTER_ID, EVENT_NAME],
+        timestep_size=1,
+    )
+    output_paths = aggregate_partitions(
+        aggregator,
+        str(input_dir),
+        str(tmp_path / "aggregated"),
+        window_start_time=window_start_time,
+        filter_fn=partial(keep_events, event_names=["eventA"]),
+        num_workers=2,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+    aggregated = pd.concat([pd.read_parquet(path) for path in output_paths])
+    expected = aggregator(
+        keep_events(data, ["eventA"]).reset_index(drop=True),
+        window_start_time=window_start_time,
+    )
+    pd.testing.assert_frame_equal(aggregated.sort_index(), expected.sort_index())
@@ -289,3 +289,23 @@ def test_tabular_imputation(  # pylint: disable=redefined-outer-name
         )
     except ValueError:
         pass
+
+
+def test_series_impute_groups():
+    """Test imputing the groups of a series separately."""
+    series = pd.Series([np.nan, 1.0, np.nan, 5.0, np.nan, 2.0, np.nan, 4.0])
+    by = [pd.Series([1, 1, 2, 2, 1, 1, 2, 2])]
+
+    res = SeriesImputer(MEAN).impute_groups(series.copy(), by)
+    assert res.tolist() == [1.5, 1.0, 4.5, 5.0, 1.5, 2.0, 4.5, 4.0]
+
+    res = SeriesImputer(FFILL_BFILL).impute_groups(series.copy(), by)
+    assert res.tolist() == [1.0, 1.0, 5.0, 5.0, 1.0, 2.0, 5.0, 4.0]
+
+    res = SeriesImputer(LINEAR_INTERP).impute_groups(series.copy(), by)
+    assert np.isnan(res[0])
+    assert res[4] == 1.5
+    assert res[6] == 4.5
+
+    with pytest.raises(ValueError):
+        SeriesImputer(FFILL, allow_nulls_returned=False).impute_groups(series, by)
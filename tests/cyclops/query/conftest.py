@@ -0,0 +1,74 @@
+"""Shared fixtures for the query package tests."""
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from omegaconf import OmegaConf
+from sqlalchemy import create_engine
+
+from cyclops.query.orm import Database, dispose_engines
+
+
+@pytest.fixture
+def events_data():
+    """Create dummy events data, with several events per encounter."""
+    data = pd.DataFrame(
+        {
+            "encounter_id": [1, 1, 1, 2, 2, 3, 4, 4, 4, 4, 5],
+            "event_name": [
+                "hr",
+                "bp",
+                "hr",
+                "hr",
+                "bp",
+                "hr",
+                "bp",
+                "hr",
+                "hr",
+                "bp",
+                "hr",
+            ],
+            "event_value": [
+                80.0,
+                120.0,
+                82.5,
+                90.0,
+                110.0,
+                70.0,
+                115.0,
+                60.0,
+                65.0,
+                118.0,
+                99.0,
+            ],
+        }
+    )
+    data["event_timestamp"] = pd.date_range("2020-01-01", periods=len(data), freq="H")
+
+    return data
+
+
+@pytest.fixture
+def sqlite_database(events_data, tmp_path):  # pylint: disable=redefined-outer-name
+    """Create a SQLite database standing in for a database server."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    events_data.to_sql("events", engine, index=False)
+    config = OmegaConf.create(
+        {
+            "dbms": "sqlite",
+            "host": "localhost",
+            "port": 5432,
+            "database": "test",
+            "user": "user",
+            "password": "pwd",
+        }
+    )
+    with patch("cyclops.query.orm.socket.socket") as socket_mock, patch(
+        "cyclops.query.orm.create_engine", return_value=engine
+    ):
+        socket_mock.return_value.connect_ex.return_value = 0
+        database = Database(config)
+
+    yield database
+    dispose_engines()
@@ -4,7 +4,12 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from cyclops.query.post_process.util import event_time_between, to_timestamp
+from cyclops.process.column_names import CARE_UNIT, ENCOUNTER_ID
+from cyclops.query.post_process.util import (
+    event_time_between,
+    process_care_unit_changepoints,
+    to_timestamp,
+)
 
 
 def test_to_timestamp():
@@ -61,3 +66,57 @@ def test_event_time_between():
         admit_inclusive=False,
     )
     assert not is_between[0] and not is_between[1]
+
+
+def test_process_care_unit_changepoints():
+    """Test process_care_unit_changepoints fn."""
+    hierarchy = ["ER", "ICU", "IP"]
+    data = pd.DataFrame(
+        {
+            ENCOUNTER_ID: [2, 2, 2, 2, 1, 1],
+            "admit": pd.to_datetime(
+                [
+                    "2020-01-01 00:00",
+                    "2020-01-01 02:00",
+                    "2020-01-01 04:00",
+                    "2020-01-01 08:00",
+                    "2020-01-01 00:00",
+                    "2020-01-01 03:00",
+                ]
+            ),
+            "discharge": pd.to_datetime(
+                [
+                    "2020-01-01 06:00",
+                    "2020-01-01 03:00",
+                    "2020-01-01 05:00",
+                    "2020-01-01 09:00",
+                    "2020-01-01 03:00",
+                    "2020-01-01 05:00",
+                ]
+            ),
+            CARE_UNIT: ["IP", "ICU", "IP", "ER", "ER", "ER"],
+        }
+    )
+
+    changepoints = process_care_unit_changepoints(
+        data, hierarchy, encounter_col=ENCOUNTER_ID
+    )
+    assert changepoints.columns.tolist() == [ENCOUNTER_ID, "changepoint", CARE_UNIT]
+    assert changepoints[ENCOUNTER_ID].tolist() == [1, 2, 2, 2, 2, 2]
+    assert changepoints["changepoint"].dt.hour.tolist() == [0, 0, 2, 3, 6, 8]
+    assert changepoints[CARE_UNIT].tolist()[:4] == ["ER", "IP", "ICU", "IP"]
+    assert pd.isna(changepoints[CARE_UNIT][4])
+    assert changepoints[CARE_UNIT][5] == "ER"
+
+    single = process_care_unit_changepoints(
+        data[data[ENCOUNTER_ID] == 2].drop(columns=ENCOUNTER_ID), hierarchy
+    )
+    pd.testing.assert_frame_equal(
+        single,
+        changepoints[changepoints[ENCOUNTER_ID] == 2]
+        .drop(columns=ENCOUNTER_ID)
+        .reset_index(drop=True),
+    )
+
+    with pytest.raises(ValueError):
+        process_care_unit_changepoints(data, ["ER", "IP"])
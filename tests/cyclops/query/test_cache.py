@@ -0,0 +1,113 @@
+"""Test query result cache module in query package."""
+
+import multiprocessing
+import time
+
+import pandas as pd
+from sqlalchemy import select
+
+from cyclops.query.cache import QueryCache, get_cache_key
+
+
+def test_get_cache_key(sqlite_database):
+    """Test cache key depends on SQL, parameters and run arguments."""
+    events = sqlite_database.main.events.data
+    engine = sqlite_database.engine
+    query = select(events).where(events.c.encounter_id == 1)
+
+    assert get_cache_key(query, engine) == get_cache_key(query, engine)
+    assert get_cache_key(query, engine) != get_cache_key(
+        select(events).where(events.c.encounter_id == 2), engine
+    )
+    assert get_cache_key(query, engine) != get_cache_key(
+        query, engine, index_col="encounter_id"
+    )
+    assert get_cache_key("SELECT 1", engine) != get_cache_key("SELECT 2", engine)
+
+
+def test_query_cache(tmp_path, events_data):
+    """Test hits, misses and persistence of the query cache."""
+    cache = QueryCache(str(tmp_path))
+    assert cache.get("key") is None
+    cache.put("key", events_data)
+    pd.testing.assert_frame_equal(cache.get("key"), events_data)
+    assert cache.stats.to_dict() == {
+        "hits": 1,
+        "misses": 1,
+        "expirations": 0,
+        "evictions": 0,
+    }
+
+    # The cache persists across objects.
+    pd.testing.assert_frame_equal(QueryCache(str(tmp_path)).get("key"), events_data)
+
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def _put_results(cache_dir, worker, n_results):
+    """Cache results from a separate process."""
+    cache = QueryCache(cache_dir)
+    for i in range(n_results):
+        cache.put(f"key_{worker}_{i}", pd.DataFrame({"a": [worker, i]}))
+
+
+def test_query_cache_processes(tmp_path):
+    """Test processes sharing a query cache do not lose each other's entries."""
+    processes = [
+        multiprocessing.Process(target=_put_results, args=(str(tmp_path), worker, 10))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    cache = QueryCache(str(tmp_path))
+    for worker in range(4):
+        for i in range(10):
+            assert cache.get(f"key_{worker}_{i}")["a"].tolist() == [worker, i]
+    assert cache.stats.hits == 40
+
+
+def test_query_cache_ttl(tmp_path, events_data):
+    """Test TTL invalidation of the query cache."""
+    cache = QueryCache(str(tmp_path), ttl=0.05)
+    cache.put("key", events_data)
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats.expirations == 1
+
+
+def test_query_cache_lru_eviction(tmp_path, events_data):
+    """Test least recently used eviction of the query cache."""
+    cache = QueryCache(str(tmp_path))
+    cache.put("first", events_data)
+    size = (tmp_path / "first.parquet").stat().st_size
+
+    cache = QueryCache(str(tmp_path), max_bytes=2 * size)
+    cache.put("second", events_data)
+    assert cache.get("first") is not None
+    cache.put("third", events_data)
+
+    assert cache.stats.evictions == 1
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+
+
+def test_run_query_cache(sqlite_database, tmp_path):
+    """Test Database.run_query uses the configured result cache."""
+    sqlite_database.cache = QueryCache(str(tmp_path))
+    events = sqlite_database.main.events
+
+    data = sqlite_database.run_query(events)
+    cached = sqlite_database.run_query(events)
+    pd.testing.assert_frame_equal(data, cached)
+    assert sqlite_database.cache.stats.hits == 1
+    assert sqlite_database.cache.stats.misses == 1
+
+    sqlite_database.run_query(events, use_cache=False)
+    sqlite_database.run_query(events, limit=2)
+    assert sqlite_database.cache.stats.misses == 2
@@ -0,0 +1,94 @@
+"""Test compaction of query result data types."""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import types
+
+from cyclops.query.dtypes import DtypeOptions, compact_dtypes, memory_summary
+from cyclops.query.interface import QueryInterface
+
+
+def test_compact_dtypes():
+    """Test compact_dtypes."""
+    data = pd.DataFrame(
+        {
+            "encounter_id": [1, 2, 300, 4],
+            "subject_id": [1.0, None, 70000.0, 2.0],
+            "event_name": ["hr", "bp", "hr", "hr"],
+            "note": ["a", "b", "c", "d"],
+            "event_value": [Decimal("1.5"), None, Decimal("2"), Decimal("3.25")],
+            "event_timestamp": [
+                datetime(2020, 1, 1, tzinfo=timezone.utc),
+                None,
+                datetime(2020, 1, 2, tzinfo=timezone.utc),
+                datetime(2020, 1, 3, tzinfo=timezone.utc),
+            ],
+            "died": [True, None, False, False],
+        }
+    )
+    sql_types = {
+        "subject_id": types.BigInteger(),
+        "event_value": types.Numeric(),
+        "event_timestamp": types.DateTime(timezone=True),
+        "died": types.Boolean(),
+    }
+
+    compacted = compact_dtypes(data, sql_types=sql_types)
+    assert compacted["encounter_id"].dtype == np.int32
+    assert compacted["subject_id"].dtype == pd.Int32Dtype()
+    assert compacted["event_name"].dtype == "category"
+    assert compacted["note"].dtype == object
+    assert compacted["event_value"].dtype == np.float64
+    assert compacted["event_timestamp"].dtype == pd.DatetimeTZDtype(tz="UTC")
+    assert compacted["died"].dtype == pd.BooleanDtype()
+    assert compacted["subject_id"].tolist() == [1, pd.NA, 70000, 2]
+    assert compacted["event_name"].tolist() == data["event_name"].tolist()
+    assert compacted["event_value"].tolist()[2:] == [2.0, 3.25]
+    assert compacted["event_timestamp"].isna().tolist() == [False, True, False, False]
+    assert compacted["died"].tolist() == [True, pd.NA, False, False]
+
+    compacted = compact_dtypes(data, options=DtypeOptions(min_int_bits=8))
+    assert compacted["encounter_id"].dtype == np.int16
+
+    options = DtypeOptions(category_max_ratio=None, downcast_ints=False, float32=True)
+    compacted = compact_dtypes(data, sql_types=sql_types, options=options)
+    assert compacted["encounter_id"].dtype == np.int64
+    assert compacted["event_name"].dtype == object
+    assert compacted["event_value"].dtype == np.float32
+
+
+def test_memory_summary():
+    """Test memory_summary."""
+    data = pd.DataFrame({"a": np.arange(10, dtype="int8"), "b": ["x"] * 10})
+    summary = memory_summary(data)
+    assert summary.index.tolist() == ["Index", "a", "b", "total"]
+    assert summary.loc["a", "dtype"] == "int8"
+    assert summary.loc["a", "memory_bytes"] == 10
+    assert summary.loc["total", "memory_bytes"] == summary["memory_bytes"][:-1].sum()
+    assert summary.loc["total", "share"] == 1.0
+
+
+def test_run_query_compact_dtypes(sqlite_database, events_data):
+    """Test compacting the data types of query results."""
+    events = sqlite_database.main.events
+    plain = sqlite_database.run_query(events)
+
+    sqlite_database.dtype_options = DtypeOptions(float32=True)
+    interface = QueryInterface(sqlite_database, events)
+    data = interface.run()
+    assert interface.timings["compact"] >= 0
+    assert data["encounter_id"].dtype == np.int32
+    assert data["event_name"].dtype == "category"
+    assert data["event_value"].dtype == np.float32
+    assert data["event_timestamp"].dtype == events_data["event_timestamp"].dtype
+    pd.testing.assert_frame_equal(data.astype(plain.dtypes.to_dict()), plain)
+
+    summary = interface.memory_summary()
+    assert summary.loc["event_name", "dtype"] == "category"
+    assert (
+        summary.loc["total", "memory_bytes"]
+        < memory_summary(plain).loc["total", "memory_bytes"]
+    )
@@ -1,15 +1,29 @@
 """Test functions for interface module in query package."""
 
+import asyncio
+import json
 import os
 import shutil
+import threading
+import time
+from decimal import Decimal
 from unittest.mock import patch
 
 import dask.dataframe as dd
 import pandas as pd
 import pytest
+from sqlalchemy import select
 
-from cyclops.query.interface import QueryInterface, QueryInterfaceProcessed
+import cyclops.query.ops as qo
+from cyclops.query import gather
+from cyclops.query.interface import (
+    QueryInterface,
+    QueryInterfaceProcessed,
+    _range_boundaries,
+    compact_partitions,
+)
 from cyclops.query.omop import OMOPQuerier
+from cyclops.utils.file import yield_dataframes
 
 
 @pytest.fixture
@@ -93,3 +107,249 @@ def test_query_interface_processed(
     shutil.rmtree("test_save")
     query_interface.clear_data()
     assert not query_interface.data
+
+
+def test_query_interface_iter_batches(
+    sqlite_database, events_data, tmp_path
+):  # pylint: disable=redefined-outer-name
+    """Test streaming QueryInterface results in batches."""
+    query_interface = QueryInterface(sqlite_database, sqlite_database.main.events)
+
+    batches = list(query_interface.iter_batches(batch_size=4))
+    assert [len(batch) for batch in batches] == [4, 4, 3]
+    assert pd.concat(batches, ignore_index=True).equals(events_data)
+
+    batches = list(query_interface.iter_batches(batch_size=4, group_col="encounter_id"))
+    assert pd.concat(batches, ignore_index=True).equals(events_data)
+    encounters = [set(batch["encounter_id"]) for batch in batches]
+    for i, encounters_i in enumerate(encounters):
+        for encounters_j in encounters[i + 1 :]:
+            assert not encounters_i.intersection(encounters_j)
+
+    # Groups spanning several fetched batches are kept whole, and not merged.
+    single_batches = list(
+        query_interface.iter_batches(batch_size=1, group_col="encounter_id")
+    )
+    assert [batch["encounter_id"].unique().tolist() for batch in single_batches] == [
+        [1],
+        [2],
+        [3],
+        [4],
+        [5],
+    ]
+    assert pd.concat(single_batches, ignore_index=True).equals(events_data)
+
+    events = select(sqlite_database.main.events.data).subquery()
+    empty_interface = QueryInterface(
+        sqlite_database, qo.ConditionEquals("event_name", "none")(events)
+    )
+    assert not list(
+        empty_interface.iter_batches(batch_size=4, group_col="encounter_id")
+    )
+
+    save_dir = query_interface.save_in_grouped_batches(
+        str(tmp_path / "batches"), "encounter_id", 4
+    )
+    loaded = list(yield_dataframes(save_dir, log=False))
+    assert len(loaded) == len(batches)
+    assert pd.concat(loaded, ignore_index=True).equals(events_data)
+
+    with pytest.raises(ValueError):
+        next(query_interface.iter_batches(batch_size=0))
+
+
+@pytest.mark.parametrize("partition_col", ["encounter_id", "event_timestamp"])
+@pytest.mark.parametrize("method", ["range", "quantile"])
+def test_query_interface_save_partitioned(
+    sqlite_database, events_data, tmp_path, partition_col, method
+):  # pylint: disable=redefined-outer-name, too-many-arguments
+    """Test saving QueryInterface results in parallel extracted partitions."""
+    query_interface = QueryInterface(sqlite_database, sqlite_database.main.events)
+    save_dir = query_interface.save_partitioned(
+        str(tmp_path / "partitions"), partition_col, 3, workers=2, method=method
+    )
+
+    with open(os.path.join(save_dir, "manifest.json"), encoding="utf-8") as file:
+        manifest = json.load(file)
+    assert manifest["partition_col"] == partition_col
+    assert len(manifest["partitions"]) == 3
+    assert sum(part["num_rows"] for part in manifest["partitions"]) == len(events_data)
+
+    loaded = pd.concat(
+        [
+            pd.read_parquet(os.path.join(save_dir, part["file"]))
+            for part in manifest["partitions"]
+        ],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(
+        loaded.sort_values(["event_timestamp"]).reset_index(drop=True),
+        events_data,
+    )
+
+    # Boundaries between merged partitions are removed.
+    boundaries = manifest["boundaries"]
+    num_rows = [part["num_rows"] for part in manifest["partitions"]]
+    assert len(boundaries) == 2 and num_rows[2] > 0
+    compact_partitions(save_dir, target_rows=num_rows[0] + num_rows[1])
+    with open(os.path.join(save_dir, "manifest.json"), encoding="utf-8") as file:
+        manifest = json.load(file)
+    assert manifest["boundaries"] == boundaries[1:]
+    assert [part["num_rows"] for part in manifest["partitions"]] == [
+        num_rows[0] + num_rows[1],
+        num_rows[2],
+    ]
+
+    compact_partitions(save_dir, target_rows=len(events_data))
+    with open(os.path.join(save_dir, "manifest.json"), encoding="utf-8") as file:
+        manifest = json.load(file)
+    assert manifest["boundaries"] == []
+    assert [part["file"] for part in manifest["partitions"]] == ["part_0004.parquet"]
+    assert sorted(os.listdir(save_dir)) == ["manifest.json", "part_0004.parquet"]
+
+    # Partition files of earlier saves are removed.
+    query_interface.save_partitioned(save_dir, partition_col, 2, method=method)
+    assert sorted(os.listdir(save_dir)) == [
+        "manifest.json",
+        "part_0000.parquet",
+        "part_0001.parquet",
+    ]
+
+
+def test__range_boundaries():
+    """Test range partition boundaries, e.g., of NUMERIC columns as Decimals."""
+    assert _range_boundaries(0, 9, 3) == [3, 6]
+    assert _range_boundaries(Decimal("0"), Decimal("9"), 3) == [3, 6]
+    assert _range_boundaries(Decimal("0.5"), Decimal("2"), 3) == [1.0, 1.5]
+    assert _range_boundaries(None, 9, 3) == []
+    with pytest.raises(ValueError):
+        _range_boundaries("a", "z", 3)
+
+
+def test_query_interface_save_partitioned_invalid(
+    sqlite_database, tmp_path
+):  # pylint: disable=redefined-outer-name
+    """Test invalid arguments of QueryInterface.save_partitioned."""
+    query_interface = QueryInterface(sqlite_database, sqlite_database.main.events)
+    with pytest.raises(ValueError):
+        query_interface.save_partitioned(str(tmp_path), "encounter_id", 0)
+    with pytest.raises(ValueError):
+        query_interface.save_partitioned(str(tmp_path), "event_name", 2)
+
+
+def test_query_interface_explain(
+    sqlite_database, events_data
+):  # pylint: disable=redefined-outer-name
+    """Test QueryInterface query plans and timings."""
+    query_interface = QueryInterface(sqlite_database, sqlite_database.main.events)
+    plan = query_interface.explain()
+    assert list(plan.columns) == [
+        "depth",
+        "node",
+        "relation",
+        "estimated_rows",
+        "estimated_cost",
+        "actual_rows",
+        "actual_time",
+    ]
+    assert plan["relation"].tolist() == ["main.events"]
+
+    with pytest.raises(ValueError):
+        query_interface.explain(analyze=True)
+
+    data = query_interface.run()
+    pd.testing.assert_frame_equal(data, events_data)
+    assert set(query_interface.timings) == {"compile", "execute", "fetch", "build"}
+    assert all(timing >= 0 for timing in query_interface.timings.values())
+
+
+def test_gather(sqlite_database, events_data):  # pylint: disable=redefined-outer-name
+    """Test running several queries concurrently."""
+    events = sqlite_database.main.events
+    interfaces = [
+        QueryInterface(sqlite_database, events),
+        QueryInterfaceProcessed(sqlite_database, events, lambda data: data.head(2)),
+        QueryInterface(sqlite_database, events),
+    ]
+    results = asyncio.run(gather(*interfaces, max_concurrency=2, limit=5))
+    assert [len(result) for result in results] == [5, 2, 5]
+    pd.testing.assert_frame_equal(results[0], events_data.head(5))
+
+    # The number of queries running at once is limited.
+    running, max_running = [0], [0]
+    lock = threading.Lock()
+
+    def run(**_):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    for interface in interfaces:
+        interface.run = run
+    asyncio.run(gather(*interfaces, max_concurrency=2))
+    assert max_running[0] == 2
+
+    with pytest.raises(ValueError):
+        asyncio.run(gather(*interfaces, max_concurrency=0))
+
+
+def test_query_interface_save_incremental(
+    sqlite_database, events_data, tmp_path
+):  # pylint: disable=redefined-outer-name
+    """Test incremental saving and compaction of partitions."""
+    query_interface = QueryInterface(sqlite_database, sqlite_database.main.events)
+    save_dir = str(tmp_path / "incremental")
+    new_events = events_data.copy()
+    new_events["event_timestamp"] += pd.Timedelta(days=1)
+
+    def load(save_dir):
+        with open(os.path.join(save_dir, "manifest.json"), encoding="utf-8") as file:
+            manifest = json.load(file)
+        data = pd.concat(
+            [
+                pd.read_parquet(os.path.join(save_dir, part["file"]))
+                for part in manifest["partitions"]
+            ],
+            ignore_index=True,
+        )
+        return manifest, data
+
+    query_interface.save(save_dir, watermark_col="event_timestamp")
+    query_interface.save(save_dir, watermark_col="event_timestamp")
+    manifest, data = load(save_dir)
+    assert len(manifest["partitions"]) == 1
+    pd.testing.assert_frame_equal(data, events_data)
+
+    new_events.iloc[:3].to_sql(
+        "events", sqlite_database.engine, index=False, if_exists="append"
+    )
+    query_interface.save_incremental(save_dir, "event_timestamp")
+    new_events.iloc[3:].to_sql(
+        "events", sqlite_database.engine, index=False, if_exists="append"
+    )
+    query_interface.save_incremental(save_dir, "event_timestamp")
+    manifest, data = load(save_dir)
+    assert [part["num_rows"] for part in manifest["partitions"]] == [11, 3, 8]
+    assert manifest["watermark"]["value"] == "2020-01-02T10:00:00"
+    all_events = pd.concat([events_data, new_events], ignore_index=True)
+    pd.testing.assert_frame_equal(data, all_events)
+
+    compact_partitions(save_dir, target_rows=12)
+    manifest, data = load(save_dir)
+    assert [part["file"] for part in manifest["partitions"]] == [
+        "part_0000.parquet",
+        "part_0003.parquet",
+    ]
+    assert [part["num_rows"] for part in manifest["partitions"]] == [11, 11]
+    assert sorted(os.listdir(save_dir)) == [
+        "manifest.json",
+        "part_0000.parquet",
+        "part_0003.parquet",
+    ]
+    pd.testing.assert_frame_equal(data, all_events)
+
+    with pytest.raises(ValueError):
+        query_interface.save_incremental(save_dir, "encounter_id")
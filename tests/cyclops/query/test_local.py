@@ -0,0 +1,122 @@
+"""Test local, file-backed databases over Parquet snapshots."""
+
+import os
+
+import pandas as pd
+import pytest
+from omegaconf import OmegaConf
+from sqlalchemy import select
+
+from cyclops.process.column_names import DIAGNOSIS_CODE, DIAGNOSIS_TITLE
+from cyclops.query.local import build_sqlite_schemas, find_parquet_tables
+from cyclops.query.mimiciv import MIMICIVQuerier
+from cyclops.query.ops import ConditionIn
+from cyclops.query.orm import Database, dispose_engines
+
+
+@pytest.fixture(name="snapshot_dir")
+def fixture_snapshot_dir(tmp_path):
+    """Parquet snapshot of a small dataset, with two schemas."""
+    data_dir = tmp_path / "snapshot"
+    os.makedirs(data_dir / "mimiciv_hosp" / "d_icd_diagnoses")
+    os.makedirs(data_dir / "mimiciv_icu")
+    diagnoses = pd.DataFrame(
+        {
+            "icd_code": [" A01", "B02 ", "C03", "D04"],
+            "icd_version": [9, 9, 10, 10],
+            "long_title": ["cholera", "typhoid", "flu", "cold"],
+        }
+    )
+    diagnoses.iloc[:2].to_parquet(
+        data_dir / "mimiciv_hosp" / "d_icd_diagnoses" / "part-0.parquet"
+    )
+    diagnoses.iloc[2:].to_parquet(
+        data_dir / "mimiciv_hosp" / "d_icd_diagnoses" / "part-1.parquet"
+    )
+    pd.DataFrame(
+        {
+            "itemid": [1, 2],
+            "label": ["hr", "bp"],
+            "charttime": pd.to_datetime(["2020-01-01 10:00", "2020-01-02 11:30"]),
+        }
+    ).to_parquet(data_dir / "mimiciv_icu" / "chartevents.parquet")
+
+    yield str(data_dir)
+    dispose_engines()
+
+
+def test_find_parquet_tables(snapshot_dir):
+    """Test finding the tables of a snapshot directory."""
+    tables = find_parquet_tables(snapshot_dir)
+    assert list(tables) == ["mimiciv_hosp", "mimiciv_icu"]
+    assert [
+        os.path.basename(path) for path in tables["mimiciv_hosp"]["d_icd_diagnoses"]
+    ] == ["part-0.parquet", "part-1.parquet"]
+    assert list(tables["mimiciv_icu"]) == ["chartevents"]
+
+
+def test_build_sqlite_schemas(snapshot_dir, tmp_path):
+    """Test schemas are only reloaded when their Parquet files change."""
+    db_dir = str(tmp_path / "db")
+    db_paths = build_sqlite_schemas(snapshot_dir, db_dir)
+    mtimes = {name: os.stat(path).st_mtime_ns for name, path in db_paths.items()}
+
+    assert build_sqlite_schemas(snapshot_dir, db_dir) == db_paths
+    assert {
+        name: os.stat(path).st_mtime_ns for name, path in db_paths.items()
+    } == mtimes
+
+    pd.DataFrame({"itemid": [3], "label": ["rr"]}).to_parquet(
+        os.path.join(snapshot_dir, "mimiciv_icu", "chartevents.parquet")
+    )
+    build_sqlite_schemas(snapshot_dir, db_dir)
+    assert os.stat(db_paths["mimiciv_hosp"]).st_mtime_ns == mtimes["mimiciv_hosp"]
+    assert os.stat(db_paths["mimiciv_icu"]).st_mtime_ns != mtimes["mimiciv_icu"]
+
+
+def test_local_sqlite_database(snapshot_dir):
+    """Test a SQLite database over a Parquet snapshot."""
+    config = OmegaConf.create({"dbms": "sqlite", "data_dir": snapshot_dir})
+    database = Database(config)
+
+    assert os.path.isdir(os.path.join(snapshot_dir, ".cyclops"))
+    events = database.run_query(database.mimiciv_icu.chartevents)
+    assert events["label"].tolist() == ["hr", "bp"]
+    assert events["charttime"].tolist() == list(
+        pd.to_datetime(["2020-01-01 10:00", "2020-01-02 11:30"])
+    )
+    diagnoses = database.mimiciv_hosp.d_icd_diagnoses
+    assert len(database.run_query(diagnoses)) == 4
+
+
+def test_local_sqlite_querier(snapshot_dir):
+    """Test a dataset querier runs unchanged over a Parquet snapshot."""
+    querier = MIMICIVQuerier(dbms="sqlite", data_dir=snapshot_dir)
+    diagnoses = querier.diagnoses(diagnosis_versions=[10]).run()
+    assert diagnoses[DIAGNOSIS_CODE].tolist() == ["C03", "D04"]
+    assert diagnoses[DIAGNOSIS_TITLE].tolist() == ["flu", "cold"]
+
+
+def test_local_duckdb_database(snapshot_dir):
+    """Test a DuckDB database over a Parquet snapshot."""
+    pytest.importorskip("duckdb")
+    pytest.importorskip("duckdb_engine")
+    config = OmegaConf.create({"dbms": "duckdb", "data_dir": snapshot_dir})
+    database = Database(config)
+
+    assert os.path.isfile(os.path.join(snapshot_dir, ".cyclops", "snapshot.duckdb"))
+    events = database.run_query(database.mimiciv_icu.chartevents)
+    assert events["label"].tolist() == ["hr", "bp"]
+    assert events["charttime"].tolist() == list(
+        pd.to_datetime(["2020-01-01 10:00", "2020-01-02 11:30"])
+    )
+    diagnoses = database.mimiciv_hosp.d_icd_diagnoses
+    assert len(database.run_query(diagnoses)) == 4
+    query = select(diagnoses.data).subquery()
+    query = ConditionIn("icd_version", [10], table_threshold=0)(query)
+    assert database.run_query(query)["long_title"].tolist() == ["flu", "cold"]
+
+    querier = MIMICIVQuerier(dbms="duckdb", data_dir=snapshot_dir)
+    diagnoses = querier.diagnoses(diagnosis_versions=[10]).run()
+    assert diagnoses[DIAGNOSIS_CODE].tolist() == ["C03", "D04"]
+    assert diagnoses[DIAGNOSIS_TITLE].tolist() == ["flu", "cold"]
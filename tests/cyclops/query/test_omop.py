@@ -1,8 +1,92 @@
 """Test OMOP query API."""
 
+import os
+
+import pandas as pd
 import pytest
 
-from cyclops.query.omop import OMOPQuerier
+from cyclops.query import omop
+from cyclops.query.omop import (
+    CONCEPT_ID,
+    CONCEPT_NAME,
+    GENDER_CONCEPT_NAME,
+    PERSON_ID,
+    RACE_CONCEPT_NAME,
+    OMOPQuerier,
+)
+from cyclops.query.orm import dispose_engines
+
+
+@pytest.fixture(name="snapshot_dir")
+def fixture_snapshot_dir(tmp_path):
+    """Parquet snapshot of a small OMOP dataset."""
+    schema_dir = tmp_path / "snapshot" / "omop"
+    os.makedirs(schema_dir)
+    pd.DataFrame(
+        {
+            PERSON_ID: [1, 2, 3, 4],
+            "gender_concept_id": [8507, 8532, 8532, None],
+            "race_concept_id": [8527, 8516, 9999, 8527],
+            "ethnicity_concept_id": [38003564, 38003564, 38003564, 38003564],
+        }
+    ).to_parquet(schema_dir / "person.parquet")
+    pd.DataFrame(
+        {
+            CONCEPT_ID: [8507, 8532, 8527, 8516, 38003564, 1],
+            CONCEPT_NAME: [
+                "MALE",
+                "FEMALE",
+                "White",
+                "Black",
+                "Not Hispanic",
+                "Unused",
+            ],
+        }
+    ).to_parquet(schema_dir / "concept.parquet")
+
+    yield str(tmp_path / "snapshot")
+    dispose_engines()
+
+
+def test_omop_querier_concept_cache(snapshot_dir, tmp_path, monkeypatch):
+    """Test mapping concept IDs to names with the concept cache."""
+    # Query the concept IDs in several batches.
+    monkeypatch.setattr(omop, "CONCEPT_BATCH_SIZE", 2)
+    cache_dir = str(tmp_path / "concepts")
+    joined = OMOPQuerier("omop", dbms="sqlite", data_dir=snapshot_dir)
+    querier = OMOPQuerier(
+        "omop",
+        concept_cache=True,
+        dbms="sqlite",
+        data_dir=snapshot_dir,
+        concept_cache_dir=cache_dir,
+    )
+
+    persons = querier.person().run().sort_values(PERSON_ID, ignore_index=True)
+    expected = joined.person().run().sort_values(PERSON_ID, ignore_index=True)
+    pd.testing.assert_frame_equal(persons, expected[persons.columns])
+    assert persons[GENDER_CONCEPT_NAME].tolist()[:3] == ["MALE", "FEMALE", "FEMALE"]
+    assert pd.isna(persons[RACE_CONCEPT_NAME][2])
+    assert len(querier._concepts) == 6  # pylint: disable=protected-access
+
+    females = querier.person(gender="FEMALE").run()
+    assert sorted(females[PERSON_ID].tolist()) == [2, 3]
+    assert females[GENDER_CONCEPT_NAME].tolist() == ["FEMALE", "FEMALE"]
+
+    # The cache is persisted, and reused by a new querier. Concepts missing
+    # from the concept table are not persisted, so they are looked up again.
+    assert len(os.listdir(cache_dir)) == 1
+    reloaded = OMOPQuerier(
+        "omop",
+        concept_cache=True,
+        dbms="sqlite",
+        data_dir=snapshot_dir,
+        concept_cache_dir=cache_dir,
+    )
+    assert len(reloaded._concepts) == 5  # pylint: disable=protected-access
+    assert reloaded.person().run()[GENDER_CONCEPT_NAME].notna().sum() == 3
+    assert len(reloaded._concepts) == 6  # pylint: disable=protected-access
+    assert len(pd.read_parquet(os.path.join(cache_dir, os.listdir(cache_dir)[0]))) == 5
 
 
 @pytest.mark.integration_test
@@ -1,31 +1,45 @@
 """Test low-level query API processing functions."""
 
+import gc
+
+import pandas as pd
 import pytest
 from sqlalchemy import column, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
 
 from cyclops.query.omop import OMOPQuerier
 from cyclops.query.ops import (
+    IN_TABLE_THRESHOLD,
     QAP,
     AddNumeric,
     Apply,
+    Compile,
+    ConditionEquals,
     ConditionIn,
     ConditionRegexMatch,
     ConditionSubstring,
     Drop,
+    DropNulls,
     ExtractTimestampComponent,
+    FilterColumns,
     GroupByAggregate,
+    Join,
     Limit,
     Literal,
+    Materialize,
     OrderBy,
     Rename,
     ReorderAfter,
+    Sample,
     Substring,
     Trim,
     _none_add,
     _process_checks,
     process_operations,
 )
-from cyclops.query.util import process_column
+from cyclops.query.orm import Database
+from cyclops.query.util import get_values_tables, inline_values_tables, process_column
 
 
 @pytest.fixture
@@ -73,6 +87,37 @@ def test_process_operations(test_table):  # pylint: disable=redefined-outer-name
     assert query_lines[-1] == "WHERE lower(CAST(anon_1.c AS VARCHAR)) LIKE :lower_1"
 
 
+def test_compile(sqlite_database):
+    """Test Compile, which flattens nested subqueries."""
+    events = sqlite_database.main.events.data
+    table = Rename({"event_name": "name"})(events)
+    table = ConditionIn("name", ["hr"])(table)
+    table = FilterColumns(["encounter_id", "name", "event_value"])(table)
+    table = AddNumeric("event_value", 1.0)(table)
+    table = DropNulls("event_value")(table)
+    aggregated = GroupByAggregate("encounter_id", {"event_value": "sum"})(table)
+    queries = [
+        table,
+        Limit(2)(OrderBy("event_value")(table)),
+        aggregated,
+        ConditionEquals("total", 81.0)(Rename({"event_value": "total"})(aggregated)),
+        Join(Rename({"event_value": "total"})(aggregated), on="encounter_id")(table),
+        Drop("name")(Limit(3)(table)),
+    ]
+
+    def run(query):
+        with sqlite_database.engine.connect() as conn:
+            return pd.read_sql_query(select(query), conn)
+
+    for query in queries:
+        compiled = Compile()(query)
+        pd.testing.assert_frame_equal(run(compiled), run(query))
+        assert str(compiled).count("SELECT") < str(query).count("SELECT")
+
+    assert str(Compile()(table)).count("SELECT") == 1
+    assert str(Compile()(queries[3])).count("SELECT") == 2
+
+
 @pytest.mark.integration_test
 def test_operations():
     """Test query operations."""
@@ -179,3 +224,129 @@ def test_operations():
     ) == measurements_regex_match["value_source_value"].str.contains(
         r"^[0-9]+(\.[0-9]+)?$"
     ).sum()
+
+
+def test_condition_in_table(sqlite_database, events_data):
+    """Test ConditionIn using a temporary table of values above a threshold."""
+    events = select(sqlite_database.main.events.data).subquery()
+    inlined = ConditionIn("encounter_id", [1, 2, 4, 4])(events)
+    query = ConditionIn("encounter_id", [1, 2, 4, 4], table_threshold=2)(events)
+    negated = ConditionIn("encounter_id", [1, 2, 4], not_=True, table_threshold=2)
+
+    (values_table,) = get_values_tables(query)
+    assert values_table.info["values"] == [1, 2, 4]
+    assert values_table.name in str(query)
+    assert "IN (SELECT" in str(query)
+    assert get_values_tables(Compile()(query)) == [values_table]
+
+    expected = events_data[events_data["encounter_id"].isin([1, 2, 4])]
+    data = sqlite_database.run_query(query)
+    pd.testing.assert_frame_equal(data, expected.reset_index(drop=True))
+    pd.testing.assert_frame_equal(data, sqlite_database.run_query(inlined))
+    assert len(sqlite_database.run_query(negated(events))) == len(events_data) - 9
+    batches = list(sqlite_database.yield_query_batches(query, batch_size=4))
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), data)
+    assert len(sqlite_database.explain(query)) > 0
+
+    with sqlite_database.connect(query) as conn:
+        count = select(func.count()).select_from(values_table)
+        assert conn.execute(count).scalar() == 3
+
+    # Above the configured threshold, values are loaded into a table by default.
+    values = list(range(IN_TABLE_THRESHOLD + 1))
+    many = ConditionIn("encounter_id", values)(events)
+    assert len(get_values_tables(many)) == 1
+    assert len(sqlite_database.run_query(many)) == len(events_data)
+    assert not get_values_tables(
+        ConditionIn("encounter_id", values, table_threshold=None)(events)
+    )
+
+    # Without a connection, e.g., with Dask, the values are inlined instead.
+    inlined_many = inline_values_tables(many)
+    assert not get_values_tables(inlined_many)
+    assert len(sqlite_database.run_query(inlined_many)) == len(events_data)
+    inlined_negated = inline_values_tables(negated(events))
+    assert not get_values_tables(inlined_negated)
+    assert "NOT IN" in str(inlined_negated)
+    assert len(sqlite_database.run_query(inlined_negated)) == len(events_data) - 9
+
+
+def test_sample(sqlite_database, events_data):
+    """Test Sample."""
+    events = select(sqlite_database.main.events.data).subquery()
+    assert len(sqlite_database.run_query(Sample(1.0)(events))) == len(events_data)
+    sampled = sqlite_database.run_query(Sample(0.5, seed=1)(events), use_cache=False)
+    assert sampled["event_value"].isin(events_data["event_value"]).all()
+
+    # TABLESAMPLE is used on PostgreSQL if sampling directly from a table.
+    dialect = postgresql.dialect()
+    query = Sample(0.1, method="system", seed=1)(
+        ConditionEquals("event_name", "hr")(events)
+    )
+    assert "TABLESAMPLE system" in str(select(query).compile(dialect=dialect))
+    query = Sample(0.1)(Limit(5)(events))
+    assert "TABLESAMPLE" not in str(select(query).compile(dialect=dialect))
+
+    # Hash sampling returns the same encounters, with all their events.
+    by_hash = Sample(0.5, method="hash", col="encounter_id")(events)
+    sampled = sqlite_database.run_query(by_hash, use_cache=False)
+    pd.testing.assert_frame_equal(
+        sqlite_database.run_query(by_hash, use_cache=False), sampled
+    )
+    expected = events_data[events_data["encounter_id"].isin(sampled["encounter_id"])]
+    assert len(sampled) == len(expected)
+
+    with pytest.raises(ValueError):
+        Sample(0)
+    with pytest.raises(ValueError):
+        Sample(0.5, method="reservoir")
+    with pytest.raises(ValueError):
+        Sample(0.5, method="hash")
+
+
+def test_materialize(sqlite_database, events_data):
+    """Test Materialize."""
+    events = select(sqlite_database.main.events.data).subquery()
+    encounters = ConditionIn("encounter_id", [1, 2, 4])(events)
+    materialized = Materialize(sqlite_database)(encounters)
+    assert "cyclops_materialized_" in str(materialized)
+    assert Materialize(sqlite_database)(encounters).compare(materialized)
+
+    expected = sqlite_database.run_query(encounters)
+    data = sqlite_database.run_query(materialized)
+    pd.testing.assert_frame_equal(data, expected)
+    assert data["event_timestamp"].dtype == events_data["event_timestamp"].dtype
+
+    hr_events = ConditionEquals("event_name", "hr")(materialized)
+    assert len(sqlite_database.run_query(hr_events)) == 5
+
+    named = Materialize(sqlite_database, name="encounters")(encounters)
+    assert len(sqlite_database.run_query(named)) == 9
+    # Materializing another query into a table of the same name replaces it.
+    named = Materialize(sqlite_database, name="encounters")(hr_events)
+    assert len(sqlite_database.run_query(named, use_cache=False)) == 5
+
+    # Other database objects own different tables, and cannot replace these.
+    other_database = Database(sqlite_database.config)
+    other = Materialize(other_database)(encounters)
+    assert not other.compare(materialized)
+    with pytest.raises(ValueError):
+        Materialize(other_database, name="encounters")(encounters)
+    other_database.drop_materialized()
+    assert sqlite_database.inspector.has_table("encounters")
+    pd.testing.assert_frame_equal(
+        sqlite_database.run_query(materialized, use_cache=False), expected
+    )
+
+    sqlite_database.drop_materialized()
+    assert not sqlite_database.inspector.has_table("encounters")
+    with pytest.raises(OperationalError):
+        sqlite_database.run_query(named, use_cache=False)
+
+    # Tables left over are dropped once their database object is collected.
+    other_database = Database(sqlite_database.config)
+    Materialize(other_database, name="leftover")(encounters)
+    assert sqlite_database.inspector.has_table("leftover")
+    del other_database
+    gc.collect()
+    assert not sqlite_database.inspector.has_table("leftover")
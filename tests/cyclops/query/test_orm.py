@@ -0,0 +1,244 @@
+"""Test functions for orm module in query package."""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import inspect, literal_column, select, text
+
+import cyclops.query.ops as qo
+from cyclops.query.cache import get_cache_key
+from cyclops.query.orm import (
+    Database,
+    _copy_query_to_csv,
+    _flatten_postgresql_plan,
+    dispose_engines,
+    get_engine,
+)
+
+
+def test_save_query_to_parquet(
+    sqlite_database, events_data, tmp_path
+):  # pylint: disable=redefined-outer-name
+    """Test saving a query directly to Parquet."""
+    events = sqlite_database.main.events
+    path = sqlite_database.save_query_to_parquet(
+        events, str(tmp_path / "events"), batch_size=4, row_group_size=2
+    )
+    assert path.endswith(".parquet")
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_rows == len(events_data)
+    assert parquet_file.metadata.num_row_groups == 6
+    schema = parquet_file.schema_arrow
+    assert schema.field("encounter_id").type == pa.int64()
+    assert schema.field("event_name").type == pa.string()
+    assert schema.field("event_value").type == pa.float64()
+    assert pa.types.is_timestamp(schema.field("event_timestamp").type)
+
+    loaded = pd.read_parquet(path)
+    loaded["event_timestamp"] = loaded["event_timestamp"].astype("datetime64[ns]")
+    assert loaded.equals(events_data)
+
+    # Empty results are still written with a schema.
+    query = select(events.data).where(events.data.c.encounter_id > 10)
+    path = sqlite_database.save_query_to_parquet(
+        query, str(tmp_path / "empty.parquet"), compression="zstd"
+    )
+    assert pq.ParquetFile(path).metadata.num_rows == 0
+
+    # Types of raw SQL columns which are all null in the first batch are
+    # inferred from later batches.
+    query = (
+        "SELECT encounter_id, CASE WHEN encounter_id > 2 THEN event_value END "
+        "AS late_value, NULL AS no_value FROM main.events ORDER BY encounter_id"
+    )
+    path = sqlite_database.save_query_to_parquet(
+        query, str(tmp_path / "raw.parquet"), batch_size=4
+    )
+    schema = pq.ParquetFile(path).schema_arrow
+    assert schema.field("late_value").type == pa.float64()
+    assert schema.field("no_value").type == pa.string()
+    loaded = pd.read_parquet(path)
+    assert loaded["late_value"].isna().tolist() == [True] * 5 + [False] * 6
+
+
+def test_save_query_to_csv(sqlite_database, events_data, tmp_path):
+    """Test saving a query to CSV in batches."""
+    events = sqlite_database.main.events
+    path = sqlite_database.save_query_to_csv(
+        events, str(tmp_path / "events"), batch_size=4
+    )
+    assert path.endswith(".csv")
+
+    loaded = pd.read_csv(path, parse_dates=["event_timestamp"])
+    pd.testing.assert_frame_equal(loaded, events_data, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        sqlite_database.save_query_to_csv(events, path, batch_size=0)
+
+
+def test__copy_query_to_csv(tmp_path):
+    """Test saving a query to CSV with PostgreSQL's COPY."""
+    conn = MagicMock()
+    conn.dialect.encoding = "utf-8"
+    cursor = conn.connection.cursor.return_value.__enter__.return_value
+    cursor.mogrify.return_value = b"SELECT a FROM t WHERE a > 1"
+    cursor.rowcount = 3
+
+    path = str(tmp_path / "data.csv")
+    assert (
+        _copy_query_to_csv(conn, "SELECT a FROM t WHERE a > %(a)s", {"a": 1}, path) == 3
+    )
+    cursor.mogrify.assert_called_once_with("SELECT a FROM t WHERE a > %(a)s", {"a": 1})
+    sql, file_descriptor = cursor.copy_expert.call_args.args
+    assert sql == "COPY (SELECT a FROM t WHERE a > 1) TO STDOUT WITH CSV HEADER"
+    assert file_descriptor.name == path
+
+    # Raw SQL is run as is, and an unreported row count is None.
+    cursor.rowcount = -1
+    assert _copy_query_to_csv(conn, "SELECT 1", None, path) is None
+    assert (
+        cursor.copy_expert.call_args.args[0]
+        == "COPY (SELECT 1) TO STDOUT WITH CSV HEADER"
+    )
+    cursor.mogrify.assert_called_once()
+
+
+def test_upload_table(sqlite_database):
+    """Test uploading a DataFrame into a table to join against."""
+    cohort = pd.DataFrame({"encounter_id": [4, 1], "label": ["b", None]})
+    events = select(sqlite_database.main.events.data).subquery()
+
+    for temporary in [True, False]:
+        cohort_table = sqlite_database.upload_table(
+            cohort, "cohort", temporary=temporary, batch_size=1
+        )
+        joined = qo.Join(cohort_table, on="encounter_id", join_table_cols=["label"])(
+            events
+        )
+        data = sqlite_database.run_query(joined)
+        assert sorted(data["encounter_id"].tolist()) == [1] * 3 + [4] * 4
+        assert data[data["encounter_id"] == 4]["label"].eq("b").all()
+        assert data[data["encounter_id"] == 1]["label"].isna().all()
+        # Temporary tables only exist on the connections running queries.
+        assert inspect(sqlite_database.engine).has_table("cohort") is not temporary
+
+    sqlite_database.drop_materialized()
+    assert not inspect(sqlite_database.engine).has_table("cohort")
+
+    # Queries using uploads of different data have different cache keys.
+    other_table = sqlite_database.upload_table(cohort.head(1), "cohort")
+    assert get_cache_key(select(cohort_table), sqlite_database.engine) != (
+        get_cache_key(select(other_table), sqlite_database.engine)
+    )
+    with pytest.raises(ValueError):
+        sqlite_database.upload_table(cohort, "cohort", batch_size=0)
+    # Tables not created by this object, e.g., of the database, are not replaced.
+    sqlite_database.upload_table(cohort, "cohort", temporary=False)
+    sqlite_database.upload_table(cohort.head(1), "cohort", temporary=False)
+    with pytest.raises(ValueError):
+        Database(sqlite_database.config).upload_table(cohort, "cohort", temporary=False)
+    with pytest.raises(ValueError):
+        sqlite_database.upload_table(cohort, "events", temporary=False)
+    sqlite_database.drop_materialized()
+
+
+def test_lazy_reflection(sqlite_database):
+    """Test tables are reflected on first access."""
+    schema = sqlite_database.main
+    assert not schema.data.tables
+
+    events = schema.events
+    assert events.name == "main.events"
+    assert "main.events" in schema.data.tables
+    assert events.encounter_id is events.data.c.encounter_id
+    assert schema.events is events
+
+    with pytest.raises(AttributeError):
+        schema.not_a_table  # pylint: disable=pointless-statement
+
+
+def test_metadata_cache(sqlite_database, tmp_path):
+    """Test reflected metadata is cached, and invalidated on schema changes."""
+    sqlite_database.config.metadata_cache_dir = str(tmp_path)
+    sqlite_database._setup()  # pylint: disable=protected-access
+    events = sqlite_database.main.events
+    assert (tmp_path / "main.pkl").exists()
+
+    # A restarted database object loads the cached metadata.
+    sqlite_database._setup()  # pylint: disable=protected-access
+    with patch("cyclops.query.orm.Table") as table_mock:
+        cached_events = sqlite_database.main.events
+        table_mock.assert_not_called()
+    assert cached_events.data.columns.keys() == events.data.columns.keys()
+
+    # Changing the schema invalidates the cached metadata.
+    with sqlite_database.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE events ADD COLUMN event_unit TEXT"))
+    sqlite_database._setup()  # pylint: disable=protected-access
+    assert "event_unit" in sqlite_database.main.events.data.columns
+
+
+def test_get_engine(tmp_path):
+    """Test engines are shared for the same URL and pool options."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = get_engine(url, pool_pre_ping=True)
+    assert get_engine(url, pool_pre_ping=True) is engine
+    assert get_engine(url, pool_pre_ping=False) is not engine
+
+    dispose_engines()
+    assert get_engine(url, pool_pre_ping=True) is not engine
+    dispose_engines()
+
+
+def test_database_shares_engine(sqlite_database):
+    """Test databases with the same configuration share an engine."""
+    with patch("cyclops.query.orm.socket.socket") as socket_mock:
+        database = Database(sqlite_database.config)
+        socket_mock.assert_not_called()
+    assert database.engine is sqlite_database.engine
+
+
+def test_compile_stats(sqlite_database):
+    """Test queries are compiled once, then found in the compiled cache."""
+    events = sqlite_database.main.events.data
+    stats = sqlite_database.compile_stats
+    compiles, cache_hits = stats.compiles, stats.cache_hits
+    for limit in [1, 2, 3]:
+        query = select(events, literal_column("1").label("test_compile_stats"))
+        timings = {}
+        data = sqlite_database._read_query(  # pylint: disable=protected-access
+            query.limit(limit), timings=timings
+        )
+        assert len(data) == limit
+        assert timings["compile"] >= 0 and timings["execute"] >= 0
+    assert stats.compiles == compiles + 1
+    assert stats.cache_hits == cache_hits + 2
+    assert stats.compile_time > 0
+
+
+def test__flatten_postgresql_plan():
+    """Test flattening PostgreSQL JSON query plans."""
+    plan = {
+        "Node Type": "Hash Join",
+        "Total Cost": 10.5,
+        "Plan Rows": 100,
+        "Plans": [
+            {
+                "Node Type": "Seq Scan",
+                "Relation Name": "events",
+                "Total Cost": 5.0,
+                "Plan Rows": 1000,
+            },
+            {"Node Type": "Hash", "Total Cost": 2.0, "Plan Rows": 10, "Plans": []},
+        ],
+    }
+    nodes = _flatten_postgresql_plan(plan)
+    assert [node["depth"] for node in nodes] == [0, 1, 1]
+    assert nodes[1]["relation"] == "events"
+    assert nodes[1]["estimated_rows"] == 1000
+    assert nodes[0]["estimated_cost"] == 10.5
+    assert nodes[0]["actual_rows"] is None
@@ -1,6 +1,7 @@
 """MIMICIV processor."""
 
 import logging
+from functools import partial
 from os import path
 from typing import Callable, Generator, List, Optional, Tuple
 
@@ -9,6 +10,7 @@ import pandas as pd
 
 from cyclops.process.aggregate import (
     Aggregator,
+    aggregate_partitions,
     tabular_as_aggregated,
     timestamp_ffill_agg,
 )
@@ -571,33 +573,44 @@ class MIMICIVProcessor:
         )
         return start_timestamps
 
-    def _aggregate_temporal_batches(
-        self,
-        generator: Generator[pd.DataFrame, None, None],
-        filter_fn: Optional[Callable] = None,
-    ) -> None:
-        """Aggregate the temporal data saved in batches.
+    def _aggregate_temporal_batches(self, filter_fn: Optional[Callable] = None) -> None:
+        """Aggregate the temporal data saved in batches, on a pool of processes.
+
+        Batches which were already aggregated are skipped. The features are
+        checked against the aggregator on the first batch, before aggregating.
 
         Parameters
         ----------
-        generator : Generator[pd.DataFrame, None, None]
-            Generator to yield the saved data files.
         filter_fn : Optional[Callable], optional
-            Filter the data records before aggregating, by default None.
+            Filter the data records before aggregating, by default None. It is
+            sent to the worker processes, so it must be picklable.
 
         """
-        start_timestamps = self._get_start_timestamps()
-        for save_count, batch in enumerate(generator):
+        first_batch = next(self._load_batches(self.cleaned_dir), None)
+        if first_batch is not None:
             if filter_fn:
-                batch = filter_fn(batch)
-            batch = batch.reset_index(drop=True)
-            temp_features = self._get_temporal_features(batch)
-            aggregated = temp_features.aggregate(window_start_time=start_timestamps)
-            save_dataframe(
-                aggregated,
-                join(self.aggregated_dir, "batch_" + f"{save_count + self.skip_n:04d}"),
+                first_batch = filter_fn(first_batch)
+            temp_features = self._get_temporal_features(
+                first_batch.reset_index(drop=True)
+            )
+            nonexistent = set(self.aggregator.get_aggfuncs()) - set(
+                temp_features.features
             )
-            del batch
+            if nonexistent:
+                raise ValueError(
+                    "The following columns are not features: "
+                    f"{', '.join(nonexistent)}."
+                )
+            del first_batch, temp_features
+
+        start_timestamps = self._get_start_timestamps()
+        aggregate_partitions(
+            self.aggregator,
+            self.cleaned_dir,
+            self.aggregated_dir,
+            window_start_time=start_timestamps,
+            filter_fn=filter_fn,
+        )
 
     def _vectorize_temporal_batches(self, generator: Generator) -> None:
         """Vectorize the temporal features saved in batches.
@@ -1291,7 +1304,6 @@ class MIMICIVProcessor:
             Vectorized temporal data.
 
         """
-        cleaned_generator = self._load_batches(self.cleaned_dir)
         filter_fn = None
         if (
             self.temp_params["query"] == mimic.EVENTS
@@ -1302,10 +1314,10 @@ class MIMICIVProcessor:
             top_events = get_top_events(
                 self.cleaned_dir, self.temp_params["top_n_events"]
             )
-            filter_fn = lambda events: valid_events(events, top_events)  # noqa: E731
+            filter_fn = partial(valid_events, top_events=top_events)
 
         LOGGER.info("Aggregating the temporal features in batches.")
-        self._aggregate_temporal_batches(cleaned_generator, filter_fn)
+        self._aggregate_temporal_batches(filter_fn)
 
         LOGGER.info("Vectorizing the temporal features in batches.")
         agg_generator = self._load_batches(self.aggregated_dir)